@@ -7,20 +7,26 @@ import json
 import time
 import random
 import logging
+import argparse
 from websocket import create_connection, WebSocketConnectionClosedException
 
-# Import libraries for reading PDF and Word documents
-import PyPDF2
-import docx
-
 # Import speech recognition and NLP libraries
 import speech_recognition as sr
 import nltk
 from nltk.sentiment import SentimentIntensityAnalyzer
+from transcription import create_service
+from resume_ingest import load_resume
+from cv_index import build_cv_index, snippet_count
+from mic_uplink import MicUplink
+from tracing import Tracer, start_metrics_server_from_env
+from session_journal import SessionJournal, journal_path, read_journal
 
 # Download NLTK data if not already present
 nltk.download('vader_lexicon', quiet=True)
 
+# Constructor arguments recorded at the start of a session journal
+JOURNALED_SETUP = ("role_type", "resume_text", "difficulty", "topics")
+
 class FinanceInterviewerAI:
     def __init__(self, api_key, role_type=None, resume_text=None, difficulty='Intermediate', topics=None):
         self.API_KEY = api_key
@@ -28,27 +34,35 @@ class FinanceInterviewerAI:
         self.resume_text = resume_text
         self.difficulty = difficulty
         self.topics = topics if topics else []
-        self.WS_URL = 'wss://api.openai.com/v1/realtime?model=gpt-4o-realtime-preview-2024-10-01'
+        self.WS_URL = os.environ.get('OPENAI_REALTIME_URL', 'wss://api.openai.com/v1/realtime?model=gpt-4o-realtime-preview-2024-10-01')
         
         # Audio configuration
         self.CHUNK_SIZE = 1024
         self.RATE = 24000
         self.FORMAT = pyaudio.paInt16
         self.REENGAGE_DELAY_MS = 500
+        self.TRANSCRIBE_SECONDS = 5
 
         # State management
         self.audio_buffer = bytearray()
         self.mic_queue = queue.Queue()
+        self.mic_uplink = MicUplink(self.mic_queue, self.RATE)
         self.stop_event = threading.Event()
         self.mic_on_at = 0
         self.mic_active = None
+        self.tracer = Tracer()
+        self.speech_stopped_at = None
+        self.response_started_at = None
+        self.response_bytes = 0
 
         # For feedback and scoring
-        self.recognizer = sr.Recognizer()
+        self.transcriber = create_service(tracer=self.tracer)
+        self.response_audio = bytearray()
         self.sia = SentimentIntensityAnalyzer()
         self.user_responses = []
         self.scores = []
         self.feedback = []
+        self.journal = None
 
         # Setup logging
         logging.basicConfig(level=logging.INFO, 
@@ -140,7 +154,7 @@ class FinanceInterviewerAI:
     {role_specific_focus.get(self.role_type, "")}
 
     **Candidate's Resume**:
-    {self.resume_text if self.resume_text else "No resume provided."}
+    {self._resume_excerpts(role_specific_focus.get(self.role_type, ""))}
 
     **Important Notes**:
     - Do not deviate from the interview structure.
@@ -150,13 +164,23 @@ class FinanceInterviewerAI:
 
         return base_context
 
+    def _resume_excerpts(self, focus):
+        """Whole resume if it is short; otherwise the sections most relevant to the role and its focus areas."""
+        if not self.resume_text:
+            return "No resume provided."
+        cv_index = build_cv_index(self.resume_text)
+        if cv_index is None:
+            return self.resume_text
+        query = f"{self.role_type} {focus} {' '.join(self.topics)}"
+        return cv_index.render(query, 2 * snippet_count(), max_tokens=1200)
+
     def mic_callback(self, in_data, frame_count, time_info, status):
         """Handle microphone input and manage voice activity detection."""
         if time.time() > self.mic_on_at:
             if self.mic_active != True:
                 logging.info('🎙️🟢 Mic active')
                 self.mic_active = True
-            self.mic_queue.put(in_data)
+            self.mic_queue.put((time.perf_counter(), in_data))
         else:
             if self.mic_active != False:
                 logging.info('🎙️🔴 Mic suppressed')
@@ -179,20 +203,9 @@ class FinanceInterviewerAI:
         return (audio_chunk, pyaudio.paContinue)
 
     def send_mic_audio(self, ws):
-        """Send microphone audio to WebSocket."""
+        """Send microphone audio to WebSocket in coalesced frames."""
         try:
-            while not self.stop_event.is_set():
-                if not self.mic_queue.empty():
-                    mic_chunk = self.mic_queue.get()
-                    logging.info(f'🎤 Sending {len(mic_chunk)} bytes of audio data.')
-                    encoded_chunk = base64.b64encode(mic_chunk).decode('utf-8')
-                    message = json.dumps({
-                        'type': 'input_audio_buffer.append', 
-                        'audio': encoded_chunk
-                    })
-                    ws.send(message)
-                    # Process the user's response for feedback
-                    self.process_user_response(mic_chunk)
+            self.mic_uplink.run(ws, self.stop_event, on_audio=self.process_user_response)
         except WebSocketConnectionClosedException:
             logging.error('WebSocket connection closed.')
         except Exception as e:
@@ -213,12 +226,27 @@ class FinanceInterviewerAI:
                 event_type = message['type']
                 logging.info(f'⚡️ Received WebSocket event: {event_type}')
 
-                if event_type == 'response.audio.delta':
+                if event_type == 'input_audio_buffer.speech_stopped':
+                    self.speech_stopped_at = time.perf_counter()
+                elif event_type == 'response.audio.delta':
                     audio_content = base64.b64decode(message['delta'])
+                    if self.response_started_at is None:
+                        self.response_started_at = time.perf_counter()
+                        self.response_bytes = 0
+                        if self.speech_stopped_at is not None:
+                            # End of the user's speech to the first audio of the reply
+                            self.tracer.turn += 1
+                            self.tracer.record("response_first_audio", self.response_started_at - self.speech_stopped_at)
+                            self.speech_stopped_at = None
+                    self.response_bytes += len(audio_content)
                     self.audio_buffer.extend(audio_content)
                     logging.info(f'🔵 Received {len(audio_content)} bytes, buffer: {len(self.audio_buffer)}')
                 elif event_type == 'response.audio.done':
                     logging.info('🔵 AI finished speaking.')
+                    if self.response_started_at is not None:
+                        self.tracer.record("response_audio", time.perf_counter() - self.response_started_at,
+                                           bytes=self.response_bytes)
+                        self.response_started_at = None
 
         except Exception as e:
             logging.error(f'Error in receive_audio: {e}')
@@ -226,21 +254,32 @@ class FinanceInterviewerAI:
             logging.info('Exiting receive_audio thread.')
 
     def process_user_response(self, audio_chunk):
-        """Transcribe and analyze the user's response."""
-        # Save audio chunk to a temporary WAV file
-        with open("temp_response.wav", "wb") as f:
-            f.write(audio_chunk)
-        # Transcribe using SpeechRecognition
+        """Batch the user's audio and transcribe each batch on the transcription worker pool."""
+        self.response_audio.extend(audio_chunk)
+        if len(self.response_audio) >= self.RATE * 2 * self.TRANSCRIBE_SECONDS:
+            self._submit_response_audio()
+
+    def _submit_response_audio(self):
+        if not self.response_audio:
+            return
+        audio = sr.AudioData(bytes(self.response_audio), self.RATE, 2)
+        self.response_audio.clear()
+        self.transcriber.submit(audio).add_done_callback(self._on_transcription)
+
+    def _on_transcription(self, future):
+        """Analyze a transcribed batch of the user's response."""
         try:
-            with sr.AudioFile("temp_response.wav") as source:
-                audio = self.recognizer.record(source)
-            response_text = self.recognizer.recognize_google(audio)
+            response_text = future.result()
+            if not response_text:
+                return
             self.user_responses.append(response_text)
             logging.info(f'User response transcribed: {response_text}')
             # Analyze the response and provide feedback
             score, feedback = self.analyze_response(response_text)
             self.scores.append(score)
             self.feedback.append(feedback)
+            if self.journal is not None:
+                self.journal.append("response", text=response_text, score=score, feedback=feedback)
             logging.info(f'Feedback: {feedback} | Score: {score}')
             # Optionally, speak out the feedback (implementation depends on your design)
         except Exception as e:
@@ -278,8 +317,40 @@ class FinanceInterviewerAI:
         print("- Books on investment banking and finance.")
         print("- Practice technical questions on financial forums.")
 
+    @classmethod
+    def resume(cls, api_key, session):
+        """Continue a journaled session (id or journal path): earlier answers, scores and feedback are restored
+        and the interviewer is told what the candidate already covered."""
+        path = journal_path(session)
+        records = read_journal(path)
+        if not records or records[0].get("mode") != "realtime":
+            raise ValueError(f"{path} is not a realtime session journal")
+        setup = records[0]
+        interviewer = cls(api_key, **{name: setup[name] for name in JOURNALED_SETUP})
+        interviewer.tracer.session_id = setup["session"]
+        for record in records[1:]:
+            if record["type"] == "response":
+                interviewer.user_responses.append(record["text"])
+                interviewer.scores.append(record["score"])
+                interviewer.feedback.append(record["feedback"])
+        if interviewer.user_responses:
+            earlier = " ".join(interviewer.user_responses)[-2000:]
+            interviewer.interview_context += f"""
+    **Resumed Interview**: this interview was interrupted and is continuing. The candidate's earlier answers were:
+    {earlier}
+    Do not repeat questions they have already answered.
+    """
+        interviewer.journal = SessionJournal(setup["session"], os.path.dirname(os.path.abspath(path)))
+        interviewer.journal.append("resume")
+        logging.info(f'Resumed session {setup["session"]} with {len(interviewer.user_responses)} earlier responses')
+        return interviewer
+
     def start_interview(self):
         """Start the interview session."""
+        if self.journal is None:
+            self.journal = SessionJournal(self.tracer.session_id)
+            self.journal.append("setup", mode="realtime", session=self.tracer.session_id,
+                                **{name: getattr(self, name) for name in JOURNALED_SETUP})
         p = pyaudio.PyAudio()
 
         # Setup audio streams
@@ -352,36 +423,19 @@ class FinanceInterviewerAI:
             spkr_stream.close()
             p.terminate()
             logging.info('Interview session completed.')
+            # Transcribe whatever audio is left before summarizing
+            self._submit_response_audio()
+            self.transcriber.close(wait=True)
+            logging.info(f'Transcription stats: {self.transcriber.stats()}')
+            logging.info(f'Mic uplink stats: {self.mic_uplink.stats()}')
+            logging.info(f'Stage latency: {self.tracer.summary()}')
+            self.tracer.close()
+            average_score = sum(self.scores) / len(self.scores) if self.scores else None
+            self.journal.append("end", average_score=average_score)
+            self.journal.close()
             # Provide post-interview feedback
             self.provide_post_interview_feedback()
 
-def extract_text_from_pdf(pdf_path):
-    """Extract text from a PDF file."""
-    text = ""
-    try:
-        with open(pdf_path, 'rb') as f:
-            reader = PyPDF2.PdfReader(f)
-            for page in reader.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text += page_text
-    except Exception as e:
-        logging.error(f"Error reading PDF file: {e}")
-        return None
-    return text
-
-def extract_text_from_docx(docx_path):
-    """Extract text from a Word (.docx) file."""
-    text = ""
-    try:
-        doc = docx.Document(docx_path)
-        for para in doc.paragraphs:
-            text += para.text + "\n"
-    except Exception as e:
-        logging.error(f"Error reading Word file: {e}")
-        return None
-    return text
-
 def main():
     # Available roles
     FINANCE_ROLES = [
@@ -394,12 +448,23 @@ def main():
         "Equity Capital Markets"
     ]
 
+    parser = argparse.ArgumentParser(description="Realtime voice interview for finance roles.")
+    parser.add_argument("--resume", metavar="SESSION",
+                        help="continue an interrupted session from its journal (session id or path)")
+    args = parser.parse_args()
+
     # Prompt user for API key securely
     API_KEY = input("Enter your OpenAI API key: ").strip()
     if not API_KEY:
         print("API key is required to proceed.")
         return
 
+    if args.resume:
+        interviewer = FinanceInterviewerAI.resume(API_KEY, args.resume)
+        start_metrics_server_from_env()
+        interviewer.start_interview()
+        return
+
     # Role selection with validation
     print("\nAvailable roles:")
     for idx, role in enumerate(FINANCE_ROLES, 1):
@@ -470,19 +535,10 @@ def main():
             continue
         break
 
-    # Determine file type and extract text
-    if resume_file_path.lower().endswith('.pdf'):
-        resume_text = extract_text_from_pdf(resume_file_path)
-        if resume_text is None:
-            print("Failed to extract text from the PDF file.")
-            return
-    elif resume_file_path.lower().endswith('.docx'):
-        resume_text = extract_text_from_docx(resume_file_path)
-        if resume_text is None:
-            print("Failed to extract text from the Word file.")
-            return
-    else:
-        print("Unsupported file format. Please provide a PDF or DOCX file.")
+    # Extract text (cached by file content, so repeat sessions skip parsing)
+    resume_text = load_resume(resume_file_path)
+    if resume_text is None:
+        print("Failed to extract text from the resume file.")
         return
 
     # Confirm starting the interview
@@ -500,6 +556,7 @@ def main():
         difficulty=selected_difficulty,
         topics=selected_topics
     )
+    start_metrics_server_from_env()
     interviewer.start_interview()
 
 if __name__ == '__main__':
@@ -6,12 +6,16 @@ import base64
 import json
 import time
 import logging
+import argparse
 from websocket import create_connection, WebSocketConnectionClosedException
-import PyPDF2
-import docx
 import speech_recognition as sr
 import nltk
 from nltk.sentiment import SentimentIntensityAnalyzer
+from transcription import create_service
+from resume_ingest import SUPPORTED_EXTENSIONS, load_resume
+from mic_uplink import MicUplink
+from tracing import Tracer, start_metrics_server_from_env
+from session_journal import SessionJournal, journal_path, read_journal
 
 nltk.download('vader_lexicon', quiet=True)
 
@@ -19,28 +23,36 @@ class FinanceInterviewerAI:
     def __init__(self, api_key, job_params):
         self.API_KEY = api_key
         self.job_params = job_params
-        self.WS_URL = 'wss://api.openai.com/v1/realtime?model=gpt-4o-realtime-preview-2024-10-01'
+        self.WS_URL = os.environ.get('OPENAI_REALTIME_URL', 'wss://api.openai.com/v1/realtime?model=gpt-4o-realtime-preview-2024-10-01')
         
         # Audio configuration
         self.CHUNK_SIZE = 1024
         self.RATE = 24000
         self.FORMAT = pyaudio.paInt16
         self.REENGAGE_DELAY_MS = 500
+        self.TRANSCRIBE_SECONDS = 5
 
         # State management
         self.audio_buffer = bytearray()
         self.mic_queue = queue.Queue()
+        self.mic_uplink = MicUplink(self.mic_queue, self.RATE)
         self.stop_event = threading.Event()
         self.mic_on_at = 0
         self.mic_active = None
+        self.tracer = Tracer()
+        self.speech_stopped_at = None
+        self.response_started_at = None
+        self.response_bytes = 0
 
         # Interview tracking
         self.current_question = 0
         self.last_question_type = None
         self.responses = []
+        self.journal = None
         
         # Analysis tools
-        self.recognizer = sr.Recognizer()
+        self.transcriber = create_service(tracer=self.tracer)
+        self.response_audio = bytearray()
         self.sia = SentimentIntensityAnalyzer()
         
         # Setup logging
@@ -88,7 +100,7 @@ Let's begin. Please ask me the first question now."""
             if self.mic_active != True:
                 logging.info('🎙️🟢 Mic active')
                 self.mic_active = True
-            self.mic_queue.put(in_data)
+            self.mic_queue.put((time.perf_counter(), in_data))
         else:
             if self.mic_active != False:
                 logging.info('🎙️🔴 Mic suppressed')
@@ -111,21 +123,9 @@ Let's begin. Please ask me the first question now."""
         return (audio_chunk, pyaudio.paContinue)
 
     def send_mic_audio(self, ws):
-        """Send microphone audio to WebSocket."""
+        """Send microphone audio to WebSocket in coalesced frames."""
         try:
-            while not self.stop_event.is_set():
-                if not self.mic_queue.empty():
-                    mic_chunk = self.mic_queue.get()
-                    logging.info(f'🎤 Sending {len(mic_chunk)} bytes of audio data.')
-                    encoded_chunk = base64.b64encode(mic_chunk).decode('utf-8')
-                    message = json.dumps({
-                        'type': 'input_audio_buffer.append', 
-                        'audio': encoded_chunk
-                    })
-                    ws.send(message)
-                    # Process the audio for transcription and analysis
-                    self.process_audio(mic_chunk)
-                time.sleep(0.1)  # Small delay to prevent busy waiting
+            self.mic_uplink.run(ws, self.stop_event, on_audio=self.process_audio)
         except WebSocketConnectionClosedException:
             logging.error('WebSocket connection closed.')
         except Exception as e:
@@ -146,12 +146,27 @@ Let's begin. Please ask me the first question now."""
                 event_type = message['type']
                 logging.info(f'⚡️ Received WebSocket event: {event_type}')
 
-                if event_type == 'response.audio.delta':
+                if event_type == 'input_audio_buffer.speech_stopped':
+                    self.speech_stopped_at = time.perf_counter()
+                elif event_type == 'response.audio.delta':
                     audio_content = base64.b64decode(message['delta'])
+                    if self.response_started_at is None:
+                        self.response_started_at = time.perf_counter()
+                        self.response_bytes = 0
+                        if self.speech_stopped_at is not None:
+                            # End of the user's speech to the first audio of the reply
+                            self.tracer.turn += 1
+                            self.tracer.record("response_first_audio", self.response_started_at - self.speech_stopped_at)
+                            self.speech_stopped_at = None
+                    self.response_bytes += len(audio_content)
                     self.audio_buffer.extend(audio_content)
                     logging.info(f'🔵 Received {len(audio_content)} bytes, buffer: {len(self.audio_buffer)}')
                 elif event_type == 'response.audio.done':
                     logging.info('🔵 AI finished speaking.')
+                    if self.response_started_at is not None:
+                        self.tracer.record("response_audio", time.perf_counter() - self.response_started_at,
+                                           bytes=self.response_bytes)
+                        self.response_started_at = None
                 elif event_type == 'response.text':
                     logging.info(f'📝 Received text: {message.get("text", "")}')
 
@@ -161,33 +176,58 @@ Let's begin. Please ask me the first question now."""
             logging.info('Exiting receive_audio thread.')
 
     def process_audio(self, audio_chunk):
-        """Process received audio chunks for transcription and analysis."""
+        """Batch received audio chunks and transcribe each batch on the transcription worker pool."""
+        self.response_audio.extend(audio_chunk)
+        if len(self.response_audio) >= self.RATE * 2 * self.TRANSCRIBE_SECONDS:
+            self._submit_response_audio()
+
+    def _submit_response_audio(self):
+        if not self.response_audio:
+            return
+        audio = sr.AudioData(bytes(self.response_audio), self.RATE, 2)
+        self.response_audio.clear()
+        self.transcriber.submit(audio).add_done_callback(self._on_transcription)
+
+    def _on_transcription(self, future):
+        """Store a transcribed batch for analysis."""
         try:
-            # Convert audio chunk to wav format for speech recognition
-            with open("temp_audio.wav", "wb") as f:
-                f.write(audio_chunk)
-
-            with sr.AudioFile("temp_audio.wav") as source:
-                audio = self.recognizer.record(source)
-                try:
-                    text = self.recognizer.recognize_google(audio)
-                    logging.info(f'Transcribed text: {text}')
-                    # Store response for analysis
-                    self.responses.append(text)
-                except sr.UnknownValueError:
-                    logging.debug('Speech not recognized')
-                except sr.RequestError as e:
-                    logging.error(f'Error with speech recognition service: {e}')
-
+            text = future.result()
+            if text:
+                logging.info(f'Transcribed text: {text}')
+                # Store response for analysis
+                self.responses.append(text)
+                if self.journal is not None:
+                    self.journal.append("response", text=text)
+            else:
+                logging.debug('Speech not recognized')
         except Exception as e:
             logging.error(f'Error processing audio: {e}')
-        finally:
-            # Cleanup temporary file
-            if os.path.exists("temp_audio.wav"):
-                os.remove("temp_audio.wav")
+
+    @classmethod
+    def resume(cls, api_key, session):
+        """Continue a journaled session (id or journal path) with its job parameters and earlier responses."""
+        path = journal_path(session)
+        records = read_journal(path)
+        if not records or records[0].get("mode") != "realtime_v2":
+            raise ValueError(f"{path} is not a realtime session journal")
+        setup = records[0]
+        interviewer = cls(api_key, setup["job_params"])
+        interviewer.tracer.session_id = setup["session"]
+        interviewer.responses = [record["text"] for record in records[1:] if record["type"] == "response"]
+        if interviewer.responses:
+            earlier = " ".join(interviewer.responses)[-2000:]
+            interviewer.initial_message += (f"\n\nThis mock interview was interrupted and is resuming. My earlier answers were: "
+                                            f"{earlier}\nDo not repeat questions I have already answered.")
+        interviewer.journal = SessionJournal(setup["session"], os.path.dirname(os.path.abspath(path)))
+        interviewer.journal.append("resume")
+        logging.info(f'Resumed session {setup["session"]} with {len(interviewer.responses)} earlier responses')
+        return interviewer
 
     def start_interview(self):
         """Start the interview session with the initial message."""
+        if self.journal is None:
+            self.journal = SessionJournal(self.tracer.session_id)
+            self.journal.append("setup", mode="realtime_v2", session=self.tracer.session_id, job_params=self.job_params)
         try:
             # Initialize WebSocket connection
             ws = create_connection(
@@ -270,33 +310,32 @@ Let's begin. Please ask me the first question now."""
             spkr_stream.close()
             p.terminate()
             ws.close()
+            self._submit_response_audio()
+            self.transcriber.close(wait=True)
+            logging.info(f'Transcription stats: {self.transcriber.stats()}')
+            logging.info(f'Mic uplink stats: {self.mic_uplink.stats()}')
+            logging.info(f'Stage latency: {self.tracer.summary()}')
+            self.tracer.close()
+            self.journal.append("end")
+            self.journal.close()
             logging.info('Interview session completed')
 
-def extract_text_from_pdf(pdf_path):
-    """Extract text from a PDF file."""
-    try:
-        with open(pdf_path, 'rb') as file:
-            reader = PyPDF2.PdfReader(file)
-            text = ''
-            for page in reader.pages:
-                text += page.extract_text() + '\n'
-        return text
-    except Exception as e:
-        logging.error(f"Error reading PDF file: {e}")
-        return None
+def main():
+    parser = argparse.ArgumentParser(description="Question-by-question realtime mock interview.")
+    parser.add_argument("--resume", metavar="SESSION",
+                        help="continue an interrupted session from its journal (session id or path)")
+    args = parser.parse_args()
 
-def extract_text_from_docx(docx_path):
-    """Extract text from a Word document."""
     try:
-        doc = docx.Document(docx_path)
-        text = '\n'.join([paragraph.text for paragraph in doc.paragraphs])
-        return text
-    except Exception as e:
-        logging.error(f"Error reading Word file: {e}")
-        return None
+        if args.resume:
+            api_key = input("Enter your OpenAI API key: ").strip()
+            if not api_key:
+                raise ValueError("API key is required")
+            interviewer = FinanceInterviewerAI.resume(api_key, args.resume)
+            start_metrics_server_from_env()
+            interviewer.start_interview()
+            return
 
-def main():
-    try:
         # Get interview parameters
         job_params = {
             'job_title': input("Enter the job title: "),
@@ -313,10 +352,8 @@ def main():
         # Optional resume input
         resume_path = input("Enter path to resume file (optional, press Enter to skip): ").strip()
         if resume_path and os.path.exists(resume_path):
-            if resume_path.lower().endswith('.pdf'):
-                job_params['resume_text'] = extract_text_from_pdf(resume_path)
-            elif resume_path.lower().endswith('.docx'):
-                job_params['resume_text'] = extract_text_from_docx(resume_path)
+            if resume_path.lower().endswith(SUPPORTED_EXTENSIONS):
+                job_params['resume_text'] = load_resume(resume_path)
             else:
                 print("Unsupported file format. Only PDF and DOCX are supported.")
 
@@ -327,6 +364,7 @@ def main():
 
         # Initialize and start interview
         interviewer = FinanceInterviewerAI(api_key, job_params)
+        start_metrics_server_from_env()
         interviewer.start_interview()
 
     except KeyboardInterrupt:
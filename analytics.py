@@ -0,0 +1,337 @@
+import os
+import json
+import time
+import logging
+import argparse
+
+import numpy as np
+
+from session_journal import DEFAULT_DIR as JOURNAL_DIR
+
+DEFAULT_ARCHIVE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "ai_interview_prep", "analytics")
+# One raw file per column; rows are appended as sessions are ingested and the files are memory-mapped to read
+COLUMNS = {
+    "session": np.int32,
+    "mode": np.int8,
+    "industry": np.int16,
+    "coverage": np.int16,
+    "vertical": np.int16,
+    "question": np.int16,
+    "score": np.float32,
+    "ts": np.float64
+}
+CATEGORIES = ("mode", "industry", "coverage", "vertical")
+GROUPINGS = ("industry", "coverage", "vertical", "question")
+PERCENTILES = (10, 25, 50, 75, 90)
+SECONDS_PER_WEEK = 7 * 86400
+# A slope fitted to turns from one sitting extrapolates seconds of noise to a month; trends need both
+TREND_MIN_DAYS = 7
+TREND_MIN_SESSIONS = 2
+
+
+class ScoreArchive:
+    """Columnar archive of every scored turn in the session journals.
+
+    Ingesting is incremental: journals are append-only, so only the bytes added since the last ingest are read.
+    The manifest holds the row count, category vocabularies and each journal's ingested offset, and is replaced
+    atomically after the columns are written, so an interrupted ingest is simply redone.
+    """
+
+    def __init__(self, directory=DEFAULT_ARCHIVE_DIR):
+        self.directory = directory
+        self.manifest_path = os.path.join(directory, "manifest.json")
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                self.manifest = json.load(f)
+        except (OSError, ValueError):
+            self.manifest = {"rows": 0, "categories": {name: [] for name in CATEGORIES}, "sessions": {}}
+
+    def _column_path(self, name):
+        return os.path.join(self.directory, f"{name}.col")
+
+    def _code(self, category, value):
+        values = self.manifest["categories"][category]
+        value = value or ""
+        try:
+            return values.index(value)
+        except ValueError:
+            values.append(value)
+            return len(values) - 1
+
+    def ingest(self, journal_dir=JOURNAL_DIR):
+        """Append the scored turns added to any journal since the last ingest; returns the number of new rows."""
+        try:
+            names = sorted(name for name in os.listdir(journal_dir) if name.endswith(".jsonl"))
+        except OSError:
+            names = []
+        rows = {name: [] for name in COLUMNS}
+        for name in names:
+            self._ingest_journal(os.path.join(journal_dir, name), name[:-len(".jsonl")], rows)
+
+        added = len(rows["score"])
+        os.makedirs(self.directory, exist_ok=True)
+        row_count = self.manifest["rows"]
+        for column, dtype in COLUMNS.items():
+            path = self._column_path(column)
+            with open(path, 'ab') as f:
+                # Drop anything an interrupted ingest wrote past the manifest's row count
+                f.truncate(row_count * np.dtype(dtype).itemsize)
+                np.asarray(rows[column], dtype=dtype).tofile(f)
+        self.manifest["rows"] = row_count + added
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f)
+        os.replace(tmp_path, self.manifest_path)
+        return added
+
+    def _ingest_journal(self, path, session_id, rows):
+        sessions = self.manifest["sessions"]
+        state = sessions.get(session_id)
+        offset = state["offset"] if state else 0
+        try:
+            with open(path, 'rb') as f:
+                f.seek(offset)
+                data = f.read()
+        except OSError as e:
+            logging.warning(f"Could not read journal {path}: {e}")
+            return
+        # A trailing line without a newline is still being written; it is read next time
+        complete = data[:data.rfind(b"\n") + 1]
+        for line in complete.splitlines():
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if state is None:
+                if record.get("type") != "setup":
+                    logging.warning(f"Journal {path} does not start with a setup record; skipping it")
+                    return
+                state = self._register(session_id, record)
+                continue
+            if record.get("type") == "evaluation":
+                question, score = record.get("question_number", 0), record.get("score")
+            elif record.get("type") == "response" and "score" in record:
+                # Realtime answers are numbered in the order they were transcribed
+                state["responses"] = state.get("responses", 0) + 1
+                question, score = state["responses"], record["score"]
+            else:
+                continue
+            rows["session"].append(state["index"])
+            for category in CATEGORIES:
+                rows[category].append(state[category])
+            rows["question"].append(question)
+            rows["score"].append(np.nan if score is None else score)
+            rows["ts"].append(record.get("ts", 0.0))
+        if state is not None:
+            state["offset"] = offset + len(complete)
+
+    def _register(self, session_id, setup):
+        state = {
+            "index": len(self.manifest["sessions"]),
+            "offset": 0,
+            "mode": self._code("mode", setup.get("mode", "chat")),
+            # Realtime sessions have a role rather than an industry
+            "industry": self._code("industry", setup.get("industry") or setup.get("role_type")),
+            "coverage": self._code("coverage", setup.get("industry_coverage") if setup.get("industry_coverage") != "None" else ""),
+            "vertical": self._code("vertical", setup.get("vertical"))
+        }
+        self.manifest["sessions"][session_id] = state
+        return state
+
+    def columns(self):
+        """Read-only memory-mapped view of every column."""
+        rows = self.manifest["rows"]
+        columns = {}
+        for name, dtype in COLUMNS.items():
+            columns[name] = (np.memmap(self._column_path(name), dtype=dtype, mode='r', shape=(rows,))
+                             if rows else np.empty(0, dtype=dtype))
+        return columns
+
+    def categories(self, name):
+        return self.manifest["categories"][name]
+
+
+def grouped_stats(codes, scores, group_count, percentiles=PERCENTILES, score_order=None):
+    """Count, mean, standard deviation and percentiles of scores for every group code at once.
+
+    Rows are ordered by (code, score) with a stable radix sort of the codes over score_order, the argsort of scores
+    (computed if not given, so several groupings can share it), and percentiles interpolate linearly between each
+    group's order statistics.
+    """
+    counts = np.bincount(codes, minlength=group_count)
+    sums = np.bincount(codes, weights=scores, minlength=group_count)
+    squares = np.bincount(codes, weights=scores * scores, minlength=group_count)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = sums / counts
+        stds = np.sqrt(np.maximum(squares / counts - means * means, 0.0))
+
+    if score_order is None:
+        score_order = np.argsort(scores, kind="stable")
+    order = score_order[np.argsort(codes[score_order].astype(np.int16), kind="stable")]
+    ordered = scores[order]
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    present = counts > 0
+    values = {}
+    for p in percentiles:
+        position = (p / 100.0) * np.maximum(counts - 1, 0)
+        low = np.floor(position).astype(np.int64)
+        high = np.minimum(low + 1, np.maximum(counts - 1, 0))
+        result = np.full(group_count, np.nan)
+        if ordered.size:
+            low_values = ordered[np.minimum(starts + low, ordered.size - 1)]
+            high_values = ordered[np.minimum(starts + high, ordered.size - 1)]
+            result[present] = (low_values + (high_values - low_values) * (position - low))[present]
+        values[f"p{p}"] = result
+    return counts, means, stds, values
+
+
+def grouped_histograms(codes, scores, group_count, bins=11):
+    """Per-group counts of scores rounded to 0..10."""
+    buckets = np.clip(np.rint(scores), 0, bins - 1).astype(np.int64)
+    return np.bincount(codes * bins + buckets, minlength=group_count * bins).reshape(group_count, bins)
+
+
+def grouped_trends(codes, scores, days, group_count, sessions=None, min_days=TREND_MIN_DAYS,
+                   min_sessions=TREND_MIN_SESSIONS):
+    """Per-group least-squares slope of score against time in days, in score points per 30 days.
+
+    A group's slope is NaN unless its turns span at least min_days and, when sessions is given, come from at least
+    min_sessions distinct sessions.
+    """
+    n = np.bincount(codes, minlength=group_count).astype(np.float64)
+    sx = np.bincount(codes, weights=days, minlength=group_count)
+    sy = np.bincount(codes, weights=scores, minlength=group_count)
+    sxx = np.bincount(codes, weights=days * days, minlength=group_count)
+    sxy = np.bincount(codes, weights=days * scores, minlength=group_count)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        slopes = (n * sxy - sx * sy) / (n * sxx - sx * sx)
+
+    first = np.full(group_count, np.inf)
+    last = np.full(group_count, -np.inf)
+    np.minimum.at(first, codes, days)
+    np.maximum.at(last, codes, days)
+    sparse = (last - first) < min_days
+    if sessions is not None:
+        pairs = np.unique(np.stack((codes, np.asarray(sessions, dtype=np.int64))), axis=1)
+        sparse |= np.bincount(pairs[0], minlength=group_count) < min_sessions
+    slopes[sparse] = np.nan
+    return slopes * 30.0
+
+
+def weekly_means(scores, ts):
+    """Mean score per calendar week since the first scored turn, as (week start timestamps, means, counts)."""
+    if not ts.size:
+        return np.empty(0), np.empty(0), np.empty(0, dtype=np.int64)
+    start = ts.min()
+    weeks = ((ts - start) // SECONDS_PER_WEEK).astype(np.int64)
+    counts = np.bincount(weeks)
+    sums = np.bincount(weeks, weights=scores)
+    present = counts > 0
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = sums / counts
+    return (start + np.arange(counts.size) * SECONDS_PER_WEEK)[present], means[present], counts[present]
+
+
+def build_report(archive, mode="chat", groupings=GROUPINGS, max_question=20):
+    """Aggregate scored turns of one mode by each grouping; everything is computed on whole columns."""
+    columns = archive.columns()
+    modes = archive.categories("mode")
+    if mode not in modes:
+        return {"mode": mode, "turns": 0, "sessions": 0, "groups": {}, "weekly": []}
+    mask = (columns["mode"] == modes.index(mode)) & ~np.isnan(columns["score"])
+    scores = np.asarray(columns["score"][mask], dtype=np.float64)
+    ts = np.asarray(columns["ts"][mask])
+    sessions = np.asarray(columns["session"][mask], dtype=np.int64)
+
+    report = {
+        "mode": mode,
+        "turns": int(scores.size),
+        "sessions": int(np.count_nonzero(np.bincount(sessions))) if scores.size else 0,
+        "groups": {}
+    }
+    if scores.size:
+        report["overall"] = {"mean": float(scores.mean()),
+                             **{f"p{p}": float(v) for p, v in zip(PERCENTILES, np.percentile(scores, PERCENTILES))}}
+
+    score_order = np.argsort(scores, kind="stable")
+    days = (ts - ts.min()) / 86400.0 if ts.size else ts
+    for grouping in groupings:
+        if grouping == "question":
+            codes = np.clip(np.asarray(columns["question"][mask], dtype=np.int64), 0, max_question)
+            labels = [str(number) if number < max_question else f"{max_question}+" for number in range(max_question + 1)]
+        else:
+            codes = np.asarray(columns[grouping][mask], dtype=np.int64)
+            labels = [label or "(none)" for label in archive.categories(grouping)]
+        group_count = len(labels)
+        counts, means, stds, percentiles = grouped_stats(codes, scores, group_count, score_order=score_order)
+        histograms = grouped_histograms(codes, scores, group_count)
+        slopes = grouped_trends(codes, scores, days, group_count, sessions)
+        report["groups"][grouping] = [
+            {
+                "group": labels[code],
+                "turns": int(counts[code]),
+                "mean": float(means[code]),
+                "std": float(stds[code]),
+                **{name: float(values[code]) for name, values in percentiles.items()},
+                "trend_per_30_days": None if np.isnan(slopes[code]) else float(slopes[code]),
+                "histogram": histograms[code].tolist()
+            }
+            for code in np.flatnonzero(counts)
+        ]
+
+    week_starts, week_means, week_counts = weekly_means(scores, ts)
+    report["weekly"] = [
+        {"week": time.strftime("%Y-%m-%d", time.localtime(start)), "mean": float(mean), "turns": int(count)}
+        for start, mean, count in zip(week_starts, week_means, week_counts)
+    ]
+    return report
+
+
+def print_report(report):
+    print(f"{report['turns']} scored turns from {report['sessions']} {report['mode']} sessions")
+    if "overall" in report:
+        overall = report["overall"]
+        print("Overall: mean {:.2f}, ".format(overall["mean"]) +
+              ", ".join(f"p{p} {overall[f'p{p}']:.2f}" for p in PERCENTILES))
+    for grouping, rows in report["groups"].items():
+        print(f"\nBy {grouping}:")
+        print(f"  {'group':<42}{'turns':>8}{'mean':>7}{'std':>6}" + "".join(f"{'p' + str(p):>6}" for p in PERCENTILES)
+              + f"{'trend/30d':>11}")
+        for row in sorted(rows, key=lambda row: -row["turns"]):
+            trend = f"{row['trend_per_30_days']:+.2f}" if row["trend_per_30_days"] is not None else "n/a"
+            print(f"  {row['group'][:41]:<42}{row['turns']:>8}{row['mean']:>7.2f}{row['std']:>6.2f}"
+                  + "".join(f"{row[f'p{p}']:>6.1f}" for p in PERCENTILES) + f"{trend:>11}")
+    if report["weekly"]:
+        print("\nWeekly mean score:")
+        for week in report["weekly"][-12:]:
+            print(f"  {week['week']}  {week['mean']:.2f}  ({week['turns']} turns)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score distributions, percentiles and trends across archived sessions.")
+    parser.add_argument("--journals", default=JOURNAL_DIR, help="session journal directory")
+    parser.add_argument("--archive", default=DEFAULT_ARCHIVE_DIR, help="columnar archive directory")
+    parser.add_argument("--mode", default="chat", choices=["chat", "realtime"],
+                        help="chat scores are 0-10 evaluations, realtime scores are sentiment compounds")
+    parser.add_argument("--by", action="append", choices=GROUPINGS, help="grouping to report (repeatable; default all)")
+    parser.add_argument("--no-ingest", action="store_true", help="report on the archive without reading new journal records")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+    archive = ScoreArchive(args.archive)
+    start_time = time.perf_counter()
+    added = 0 if args.no_ingest else archive.ingest(args.journals)
+    ingest_seconds = time.perf_counter() - start_time
+    report = build_report(archive, args.mode, args.by or GROUPINGS)
+    report_seconds = time.perf_counter() - start_time - ingest_seconds
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+        print(f"\nIngested {added} new turns in {ingest_seconds:.2f}s; report computed in {report_seconds:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
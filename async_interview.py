@@ -0,0 +1,346 @@
+import time
+import asyncio
+import logging
+
+import prompts
+from context_manager import AsyncConversationContext
+from cv_index import build_cv_index
+from question_index import QuestionIndex
+from question_bank import BANK_QUESTION_NUMBERS
+from tracing import Tracer
+from request_executor import AsyncRequestExecutor
+
+
+class InputPort:
+    """Source of the candidate's input for an async interview."""
+
+    async def read_answer(self, question):
+        """Return the answer to question, or 'quit' to end the interview."""
+        raise NotImplementedError
+
+    async def read_line(self, prompt):
+        raise NotImplementedError
+
+
+class OutputPort:
+    """Destination for an async interview's text and synthesized speech."""
+
+    async def show(self, role, text):
+        raise NotImplementedError
+
+    async def speak(self, audio):
+        """Deliver synthesized speech; text-only ports can ignore it."""
+        return None
+
+
+class ConsoleInputPort(InputPort):
+    """Reads from the terminal without blocking the event loop."""
+
+    async def read_answer(self, question):
+        print("Type your answer. Type 'done' on a new line when finished, or 'quit' to end the interview.")
+        lines = []
+        while True:
+            line = await asyncio.to_thread(input)
+            if line.lower() == 'done':
+                break
+            if line.lower() == 'quit':
+                return 'quit'
+            lines.append(line)
+        return '\n'.join(lines)
+
+    async def read_line(self, prompt):
+        return await asyncio.to_thread(input, prompt)
+
+
+class ConsoleOutputPort(OutputPort):
+    """Prints to the terminal and hands speech to an optional PlaybackEngine."""
+
+    def __init__(self, playback=None):
+        self.playback = playback
+
+    async def show(self, role, text):
+        if role == "system":
+            print(f"\n{text}")
+        else:
+            print(f"\n{role.capitalize()}: {text}")
+
+    async def speak(self, audio):
+        if self.playback is not None:
+            self.playback.play(audio)
+
+
+class AsyncAIInterviewPrep:
+    """Non-blocking counterpart of AIInterviewPrep's turn loop, built on AsyncOpenAI and injected I/O ports."""
+
+    def __init__(self, client, input_port, output_port, job_position, industry, job_description, candidate_cv,
+                 industry_coverage="", vertical="", cv_digest="", tts_cache=None, speech_enabled=True,
+                 max_questions=10, tracer=None, token_budget=None, executor=None, question_bank=None):
+        self.client = client
+        self.input = input_port
+        self.output = output_port
+        self.job_position = job_position
+        self.industry = industry
+        self.industry_coverage = industry_coverage
+        self.vertical = vertical
+        self.job_description = job_description
+        self.candidate_cv = candidate_cv
+        self.cv_digest = cv_digest
+        self.cv_index = build_cv_index(candidate_cv)
+        self.tts_cache = tts_cache
+        self.speech_enabled = speech_enabled
+        self.max_questions = max_questions
+        self.interview_history = []
+        self.scores = []
+        self.question_counter = 0
+        self.conversation_context = AsyncConversationContext(client)
+        self.prompt_cache_stats = prompts.PromptCacheStats()
+        self.token_budget = token_budget if token_budget is not None else prompts.TokenBudget()
+        self.evaluation_stats = prompts.EvaluationStats()
+        self.question_index = QuestionIndex()
+        self.max_question_regenerations = 2
+        self.question_bank = question_bank
+        self.executor = executor if executor is not None else AsyncRequestExecutor()
+        self.tracer = tracer if tracer is not None else Tracer()
+        self._speech_tasks = set()
+        self._last_speech = None
+
+    async def synthesize_speech(self, text, voice="alloy", model="tts-1"):
+        with self.tracer.span("tts", chars=len(text)) as span:
+            if self.tts_cache is not None:
+                audio = await asyncio.to_thread(self.tts_cache.get, text, voice, model)
+                if audio is not None:
+                    span.set(bytes=len(audio), cached=True)
+                    return audio
+            response = await self.executor.call("tts", self.client.audio.speech.create,
+                                                model=model, voice=voice, input=text.strip())
+            audio = response.content
+            span.set(bytes=len(audio), cached=False)
+        if self.tts_cache is not None:
+            await asyncio.to_thread(self.tts_cache.put, text, voice, model, audio)
+        return audio
+
+    async def text_to_speech(self, text):
+        """Speak text and wait until it has been delivered, after any speech already queued."""
+        await self.speak_in_background(text)
+
+    def speak_in_background(self, text):
+        """Synthesize and deliver speech concurrently with whatever the turn loop does next; returns the task.
+
+        Synthesis starts at once, but each utterance reaches output.speak only after the one queued before it, so
+        cached text (the start message, banked questions) cannot overtake a comment that is still being synthesized.
+        """
+        task = asyncio.create_task(self._speak_after(text, self._last_speech))
+        self._last_speech = task
+        self._speech_tasks.add(task)
+        task.add_done_callback(self._speech_tasks.discard)
+        return task
+
+    async def _speak_after(self, text, previous):
+        if not self.speech_enabled:
+            return
+        try:
+            audio = await self.synthesize_speech(text)
+        except Exception as e:
+            logging.error(f"Text-to-speech failed. Error: {e}")
+            audio = None
+        if previous is not None:
+            # Waits for the earlier utterance however it ended, without cancelling it
+            await asyncio.wait({previous})
+        if audio is None:
+            return
+        try:
+            with self.tracer.span("playback", bytes=len(audio)):
+                await self.output.speak(audio)
+        except Exception as e:
+            logging.error(f"Speech delivery failed. Error: {e}")
+
+    async def generate_question(self):
+        self.question_counter += 1
+        self.tracer.turn = self.question_counter
+
+        if self.question_counter == 1:
+            self.question_index.add(prompts.OPENING_QUESTION)
+            return prompts.OPENING_QUESTION
+
+        if self.question_bank is not None and self.question_counter in BANK_QUESTION_NUMBERS:
+            question = self.question_bank.pick(self.industry, self.industry_coverage, self.vertical, self.question_index)
+            if question is not None:
+                self.question_index.add(question)
+                self.interview_history.append({"role": "interviewer", "content": question})
+                return question
+
+        avoid = []
+        for _ in range(self.max_question_regenerations + 1):
+            question = await self._request_question(avoid)
+            if question is None:
+                break
+            repeated = self.question_index.duplicate_of(question)
+            if repeated is None:
+                self.question_index.add(question)
+                self.interview_history.append({"role": "interviewer", "content": question})
+                return question
+            logging.info(f"Regenerating question that repeats {repeated!r}")
+            avoid.append(repeated)
+
+        self.executor.record_fallback("generate_question")
+        self.question_index.add(prompts.FALLBACK_QUESTION)
+        return prompts.FALLBACK_QUESTION
+
+    async def _request_question(self, avoid):
+        messages, sections = self.token_budget.build_messages(
+            self,
+            lambda history: prompts.build_question_suffix(self.question_counter, history, avoid),
+            self.conversation_context,
+            query=prompts.recent_exchange(self)
+        )
+
+        try:
+            start_time = time.time()
+            with self.tracer.span("generate_question", question_number=self.question_counter) as span:
+                response = await self.executor.call(
+                    "generate_question",
+                    self.client.chat.completions.create,
+                    model="gpt-4o-mini",
+                    messages=messages
+                )
+                if response.usage:
+                    span.set(prompt_tokens=response.usage.prompt_tokens, completion_tokens=response.usage.completion_tokens)
+            self.prompt_cache_stats.record("generate_question", response, time.time() - start_time, sections=sections)
+            return response.choices[0].message.content.strip() or None
+        except Exception as e:
+            logging.exception(f"Error generating question: {e}")
+            return None
+
+    async def evaluate_response(self, response, on_response=None):
+        """Evaluate an answer from a streamed JSON reply; awaits on_response(text) with the interviewer's comment
+        as soon as it is complete, if the answer was judged relevant."""
+        last_question = self.interview_history[-1]['content'] if self.interview_history else prompts.OPENING_QUESTION
+
+        messages, sections = self.token_budget.build_messages(
+            self,
+            lambda history: prompts.build_evaluation_suffix(last_question, response, history),
+            self.conversation_context,
+            query=f"{last_question} {response}"
+        )
+
+        ready = []
+
+        def on_field(name, value):
+            comment = prompts.releasable_comment(name, value, parser.fields)
+            if comment:
+                ready.append(comment)
+
+        parser = prompts.StreamingEvaluationParser(on_field)
+
+        try:
+            start_time = time.time()
+            with self.tracer.span("evaluate_response", answer_chars=len(response)) as span:
+                stream = await self.executor.call(
+                    "evaluate_response",
+                    self.client.chat.completions.create,
+                    model="gpt-4o-mini",
+                    messages=messages,
+                    response_format=prompts.evaluation_response_format(),
+                    stream=True,
+                    stream_options={"include_usage": True}
+                )
+                first_token_seconds = None
+                usage_chunk = None
+                async for chunk in stream:
+                    if getattr(chunk, "usage", None):
+                        usage_chunk = chunk
+                    delta = chunk.choices[0].delta.content if chunk.choices else None
+                    if delta:
+                        if first_token_seconds is None:
+                            first_token_seconds = time.time() - start_time
+                        parser.feed(delta)
+                        if ready and on_response is not None:
+                            await on_response(ready.pop())
+                if usage_chunk is not None:
+                    span.set(prompt_tokens=usage_chunk.usage.prompt_tokens, completion_tokens=usage_chunk.usage.completion_tokens)
+            self.prompt_cache_stats.record("evaluate_response", usage_chunk, time.time() - start_time, first_token_seconds, sections)
+
+            try:
+                parsed, errors = parser.result()
+            except prompts.EvaluationFormatError as e:
+                parsed, errors = prompts.validate_evaluation(parser.fields)
+                errors.insert(0, str(e))
+            self.evaluation_stats.record(errors)
+            interviewer_response = parsed["interviewer_response"]
+            hidden_evaluation = parsed["hidden_evaluation"]
+
+            if parsed["score"] is not None:
+                self.scores.append(parsed["score"])
+            else:
+                logging.warning("Evaluation had no valid score; this answer is left unscored.")
+
+            self.interview_history.append({"role": "candidate", "content": response})
+            self.interview_history.append({"role": "interviewer", "content": interviewer_response})
+            self.interview_history.append({"role": "evaluator", "content": hidden_evaluation})
+
+            self.conversation_context.add_turn(last_question, response, interviewer_response)
+
+            return interviewer_response, hidden_evaluation, parsed["response_quality"]
+        except Exception as e:
+            logging.exception(f"Error in evaluating response: {e}")
+            self.executor.record_fallback("evaluate_response")
+            return prompts.FALLBACK_RESPONSE, "Error in evaluation", False
+
+    async def run_interview(self):
+        try:
+            await self.output.show("system", prompts.START_MESSAGE)
+            self.speak_in_background(prompts.START_MESSAGE)
+
+            question_count = 0
+            while True:
+                question = await self.generate_question()
+                await self.output.show("interviewer", question)
+                self.speak_in_background(question)
+
+                response = await self.input.read_answer(question)
+                if response is None or response.strip().lower() == 'quit':
+                    return await self.evaluate_interview()
+
+                released = []
+
+                async def release(text):
+                    released.append(text)
+                    await self.output.show("interviewer", text)
+                    self.speak_in_background(text)
+
+                interviewer_response, hidden_evaluation, response_quality = await self.evaluate_response(response, release)
+                if not response_quality:
+                    await self.output.show("system", "I'm sorry, but your response doesn't seem to address the question fully. Could you please provide a more detailed and relevant answer?")
+                    continue
+
+                if not released:
+                    await self.output.show("interviewer", interviewer_response)
+                    self.speak_in_background(interviewer_response)
+
+                question_count += 1
+                if self.max_questions and question_count >= self.max_questions:
+                    choice = await self.input.read_line("Enter 'continue' to keep going or 'quit' to end and evaluate: ")
+                    if choice is None or choice.strip().lower() == 'quit':
+                        return await self.evaluate_interview()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logging.exception(f"An unexpected error occurred during the interview: {e}")
+            await self.output.show("system", prompts.ERROR_MESSAGE)
+        finally:
+            for task in list(self._speech_tasks):
+                task.cancel()
+
+    async def evaluate_interview(self):
+        """Show the closing summary and return the average score (None if nothing was scored)."""
+        average_score = sum(self.scores) / len(self.scores) if self.scores else None
+        if average_score is not None:
+            final_message = f"Interview concluded. Your average score is: {average_score:.2f}/10"
+        else:
+            final_message = prompts.NO_SCORES_MESSAGE
+
+        await self.output.show("system", final_message)
+        await self.text_to_speech(final_message)
+        await self.output.show("system", prompts.GOODBYE_MESSAGE)
+        await self.text_to_speech(prompts.GOODBYE_MESSAGE)
+        return average_score
@@ -0,0 +1,106 @@
+import logging
+import threading
+import pyaudio
+import speech_recognition as sr
+
+
+class CaptureEngine:
+    """Keeps the microphone open across turns and records into a preallocated ring buffer."""
+
+    def __init__(self, rate=16000, chunk=1024, max_seconds=300):
+        self.rate = rate
+        self.chunk = chunk
+        self.sample_width = 2
+        self.capacity = rate * self.sample_width * max_seconds
+        self.buffer = bytearray(self.capacity)
+        self.write_pos = 0
+        self.recorded = 0
+        self.recording = False
+        self.overflowed = False
+        self.detector = None
+        self.endpoint_event = threading.Event()
+        self._lock = threading.Lock()
+
+        self._audio = pyaudio.PyAudio()
+        self._stream = self._audio.open(
+            format=pyaudio.paInt16,
+            channels=1,
+            rate=rate,
+            input=True,
+            frames_per_buffer=chunk,
+            stream_callback=self._callback
+        )
+        self._stream.start_stream()
+
+    def _callback(self, in_data, frame_count, time_info, status):
+        if self.recording:
+            self._write(in_data)
+            detector = self.detector
+            if detector is not None and detector.process(in_data):
+                self.endpoint_event.set()
+        return (None, pyaudio.paContinue)
+
+    def _write(self, data):
+        with self._lock:
+            view = memoryview(data)
+            if len(view) > self.capacity:
+                view = view[-self.capacity:]
+            end = self.write_pos + len(view)
+            if end <= self.capacity:
+                self.buffer[self.write_pos:end] = view
+            else:
+                split = self.capacity - self.write_pos
+                self.buffer[self.write_pos:] = view[:split]
+                self.buffer[:end - self.capacity] = view[split:]
+            self.write_pos = end % self.capacity
+            self.recorded += len(view)
+            if self.recorded > self.capacity and not self.overflowed:
+                self.overflowed = True
+                logging.warning("Answer exceeded the capture buffer; keeping only the most recent audio")
+
+    def start(self, detector=None):
+        """Begin a new recording; the device is already open so capture starts immediately.
+
+        If an EndpointDetector is given, it sees every captured chunk and sets endpoint_event
+        once the speaker has gone quiet.
+        """
+        with self._lock:
+            self.write_pos = 0
+            self.recorded = 0
+            self.overflowed = False
+            self.endpoint_event.clear()
+            if detector is not None:
+                detector.reset()
+            self.detector = detector
+            self.recording = True
+
+    def wait_for_endpoint(self, timeout=None):
+        """Block until the detector reports end of speech or the buffer is full; returns True on endpoint."""
+        if timeout is None:
+            timeout = self.capacity / (self.rate * self.sample_width)
+        return self.endpoint_event.wait(timeout)
+
+    def dropped_bytes(self):
+        """Bytes recorded at the start of the answer that the ring buffer has since overwritten."""
+        return max(self.recorded - self.capacity, 0)
+
+    def stop(self):
+        """Stop recording and return the captured 16-bit mono PCM, oldest sample first."""
+        self.recording = False
+        return self.pcm()
+
+    def pcm(self):
+        with self._lock:
+            if self.recorded <= self.capacity:
+                return bytes(self.buffer[:self.recorded])
+            return bytes(self.buffer[self.write_pos:]) + bytes(self.buffer[:self.write_pos])
+
+    def to_audio_data(self, pcm):
+        """Wrap PCM for the recognizer in memory, without writing or re-reading a WAV file."""
+        return sr.AudioData(pcm, self.rate, self.sample_width)
+
+    def close(self):
+        self.recording = False
+        self._stream.stop_stream()
+        self._stream.close()
+        self._audio.terminate()
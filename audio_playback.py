@@ -0,0 +1,85 @@
+import io
+import time
+import queue
+import logging
+import threading
+import pygame
+
+
+class PlaybackEngine:
+    """Plays in-memory audio clips in order on a background worker; the pygame mixer is initialized once."""
+
+    def __init__(self, tracer=None):
+        self.tracer = tracer
+        self.available = True
+        try:
+            pygame.mixer.init()
+        except Exception as e:
+            logging.error(f"Audio output unavailable: {e}")
+            self.available = False
+        self._queue = queue.Queue()
+        self._interrupt = threading.Event()
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def generation(self):
+        """Token for play(); a clip queued with it is dropped if cancel() was called after it was taken."""
+        with self._lock:
+            return self._generation
+
+    def play(self, audio, generation=None):
+        """Queue a clip for playback and return an Event that is set once it has finished or been cancelled."""
+        done = threading.Event()
+        if generation is None:
+            generation = self.generation()
+        self._queue.put((audio, done, generation))
+        return done
+
+    def cancel(self):
+        """Stop the clip that is playing and drop everything still queued."""
+        with self._lock:
+            self._generation += 1
+        self._interrupt.set()
+
+    def wait_idle(self):
+        """Block until every queued clip has finished or been cancelled."""
+        self._queue.join()
+
+    def close(self):
+        self.cancel()
+        self._queue.put(None)
+        self._worker.join()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                audio, done, generation = item
+                try:
+                    self._play_clip(audio, generation)
+                except Exception as e:
+                    logging.error(f"Audio playback failed: {e}")
+                finally:
+                    done.set()
+            finally:
+                self._queue.task_done()
+
+    def _play_clip(self, audio, generation):
+        with self._lock:
+            if generation != self._generation or not self.available:
+                return
+            self._interrupt.clear()
+        sound = pygame.mixer.Sound(file=io.BytesIO(audio))
+        start_time = time.perf_counter()
+        sound.play()
+        # Sleep for the clip's duration; cancel() wakes the worker early.
+        interrupted = self._interrupt.wait(sound.get_length())
+        if interrupted:
+            sound.stop()
+        if self.tracer is not None:
+            self.tracer.record("playback", time.perf_counter() - start_time, bytes=len(audio),
+                               clip_seconds=round(sound.get_length(), 3), interrupted=interrupted)
@@ -0,0 +1,378 @@
+import os
+import json
+import time
+import asyncio
+import logging
+import tempfile
+import argparse
+import importlib
+import threading
+import contextlib
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from async_interview import AsyncAIInterviewPrep, InputPort, OutputPort
+from request_executor import AsyncRequestExecutor
+from question_bank import load_question_bank
+
+
+def percentile(samples, p):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * p / 100), len(ordered) - 1)]
+
+
+def latency_summary(samples):
+    return {f"p{p}": percentile(samples, p) for p in (50, 90, 99)}
+
+
+class CountingClient:
+    """Proxy around an OpenAI client that counts every *.create call made through it, by endpoint."""
+
+    def __init__(self, target, counter=None, path=""):
+        self._target = target
+        self._path = path
+        self.calls = counter if counter is not None else Counter()
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        path = f"{self._path}.{name}" if self._path else name
+        if name != "create":
+            return CountingClient(attr, self.calls, path)
+
+        async def create(*args, **kwargs):
+            self.calls[self._path] += 1
+            return await attr(*args, **kwargs)
+        return create
+
+
+class ScriptedInputPort(InputPort):
+    """Feeds a fixed list of answers, then quits; records turn latency like the server does."""
+
+    def __init__(self, answers, think_seconds=0.0):
+        self.answers = list(answers)
+        self.think_seconds = think_seconds
+        self.answered_at = None
+        self.turn_latencies = []
+
+    async def read_answer(self, question):
+        if self.answered_at is not None:
+            self.turn_latencies.append(time.perf_counter() - self.answered_at)
+        if self.think_seconds:
+            await asyncio.sleep(self.think_seconds)
+        answer = self.answers.pop(0) if self.answers else "quit"
+        self.answered_at = time.perf_counter()
+        return answer
+
+    async def read_line(self, prompt):
+        return "continue" if self.answers else "quit"
+
+
+class NullOutputPort(OutputPort):
+    """Discards output but keeps counts so audio work is still exercised and visible."""
+
+    def __init__(self):
+        self.messages = 0
+        self.audio_bytes = 0
+
+    async def show(self, role, text):
+        self.messages += 1
+
+    async def speak(self, audio):
+        self.audio_bytes += len(audio)
+
+
+async def run_chat_benchmark(scenario, sessions, client, question_bank=None):
+    """Run `sessions` scripted AsyncAIInterviewPrep interviews concurrently on one shared client."""
+    runs = []
+    executor = AsyncRequestExecutor()
+    for _ in range(sessions):
+        counting = CountingClient(client)
+        input_port = ScriptedInputPort(scenario["answers"], scenario.get("think_seconds", 0.0))
+        interview = AsyncAIInterviewPrep(
+            counting, input_port, NullOutputPort(),
+            speech_enabled=scenario.get("speech", True),
+            max_questions=0,
+            executor=executor,
+            question_bank=question_bank,
+            **scenario["session"]
+        )
+        runs.append((interview, input_port, counting))
+
+    start_time = time.perf_counter()
+    await asyncio.gather(*(interview.run_interview() for interview, _, _ in runs))
+    elapsed = time.perf_counter() - start_time
+
+    turn_latencies = [latency for _, port, _ in runs for latency in port.turn_latencies]
+    turns = len(turn_latencies)
+    tokens = sum(call["prompt_tokens"] + call["completion_tokens"]
+                 for interview, _, _ in runs for call in interview.prompt_cache_stats.calls)
+    api_calls = Counter()
+    for _, _, counting in runs:
+        api_calls.update(counting.calls)
+    section_tokens = Counter()
+    for interview, _, _ in runs:
+        section_tokens.update(interview.prompt_cache_stats.token_report()["sections"])
+    return {
+        "mode": "chat",
+        "sessions": sessions,
+        "seconds": elapsed,
+        "turns": turns,
+        "turn_latency": latency_summary(turn_latencies),
+        "tokens_per_turn": tokens / turns if turns else None,
+        "prompt_tokens_per_turn_by_section": {name: count / turns for name, count in section_tokens.items()} if turns else None,
+        "api_calls_per_session": {endpoint: count / sessions for endpoint, count in api_calls.items()},
+        "requests": executor.stats(),
+        "malformed_evaluations": sum(interview.evaluation_stats.malformed for interview, _, _ in runs),
+        "rejected_questions": sum(interview.question_index.rejected for interview, _, _ in runs),
+        "question_bank": question_bank.stats() if question_bank is not None else None,
+        "turns_per_second": turns / elapsed if elapsed else None,
+        "sessions_per_second": sessions / elapsed if elapsed else None
+    }
+
+
+class ScriptedTerminal:
+    """Stands in for input() in main.AIInterviewPrep: types each scripted answer as text input, then quits."""
+
+    def __init__(self, answers, think_seconds=0.0):
+        self.think_seconds = think_seconds
+        self.lines = deque()
+        for answer in answers:
+            self.lines.extend(["1", *answer.splitlines(), "done"])
+        self.lines.extend(["1", "quit"])
+
+    def __call__(self, prompt=""):
+        if prompt.startswith("Enter 'continue'"):
+            return "continue"
+        if prompt.startswith("Enter your choice (1 or 2)") and self.think_seconds:
+            time.sleep(self.think_seconds)
+        return self.lines.popleft() if self.lines else "quit"
+
+
+def run_main_benchmark(scenario, sessions, api_key):
+    """Run `sessions` scripted main.AIInterviewPrep interviews in threads, exercising its own turn loop.
+
+    Unlike run_chat_benchmark this covers main.py's prompt building, STREAM_MODE, SINGLE_ROUND_TRIP and
+    PIPELINED_MODE paths, whichever are switched on in the environment. Sessions are journaled to a temporary
+    directory, and their terminal output is discarded.
+    """
+    import httpx
+    from openai import OpenAI
+    import main as chat_main
+    from request_executor import RequestExecutor
+    from session_journal import SessionJournal
+    from cv_index import build_cv_index
+
+    api_calls = Counter()
+    calls_lock = threading.Lock()
+
+    def count(request):
+        endpoint = request.url.path.split("/v1/", 1)[-1].strip("/").replace("/", ".")
+        with calls_lock:
+            api_calls[endpoint] += 1
+
+    executor = RequestExecutor()
+    journal_dir = tempfile.mkdtemp(prefix="bench-journals-")
+    apps = []
+    for _ in range(sessions):
+        client = OpenAI(api_key=api_key, http_client=httpx.Client(event_hooks={"request": [count]}))
+        app = chat_main.AIInterviewPrep(client=client, executor=executor)
+        app.input = ScriptedTerminal(scenario["answers"], scenario.get("think_seconds", 0.0))
+        for field, value in scenario["session"].items():
+            setattr(app, field, value)
+        app.cv_index = build_cv_index(app.candidate_cv)
+        app.use_voice_input = False
+        app.journal = SessionJournal(app.tracer.session_id, journal_dir)
+        apps.append(app)
+
+    start_time = time.perf_counter()
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        with ThreadPoolExecutor(max_workers=sessions) as pool:
+            list(pool.map(lambda app: app.run_interview(), apps))
+    elapsed = time.perf_counter() - start_time
+
+    turn_latencies = [latency for app in apps for latency in app.tracer.durations.get("turn", [])]
+    turns = len(turn_latencies)
+    tokens = sum(call["prompt_tokens"] + call["completion_tokens"]
+                 for app in apps for call in app.prompt_cache_stats.calls)
+    section_tokens = Counter()
+    for app in apps:
+        section_tokens.update(app.prompt_cache_stats.token_report()["sections"])
+    prefetch = [app.prefetcher.stats() for app in apps if app.prefetcher]
+    return {
+        "mode": "chat:main",
+        "sessions": sessions,
+        "stream_mode": apps[0].stream_mode if apps else None,
+        "single_round_trip": apps[0].single_round_trip if apps else None,
+        "pipelined": bool(prefetch),
+        "seconds": elapsed,
+        "turns": turns,
+        "turn_latency": latency_summary(turn_latencies),
+        "tokens_per_turn": tokens / turns if turns else None,
+        "prompt_tokens_per_turn_by_section": {name: count / turns for name, count in section_tokens.items()} if turns else None,
+        "api_calls_per_session": {endpoint: count / sessions for endpoint, count in api_calls.items()},
+        "requests": executor.stats(),
+        "malformed_evaluations": sum(app.evaluation_stats.malformed for app in apps),
+        "rejected_questions": sum(app.question_index.rejected for app in apps),
+        "prefetch_hits": sum(stats["hits"] for stats in prefetch) if prefetch else None,
+        "prefetch_misses": sum(stats["misses"] for stats in prefetch) if prefetch else None,
+        "turns_per_second": turns / elapsed if elapsed else None,
+        "sessions_per_second": sessions / elapsed if elapsed else None
+    }
+
+
+def synthetic_answer_pcm(rate=24000, speech_seconds=3.0, silence_seconds=1.0):
+    """16-bit mono PCM of a voiced, syllable-modulated tone followed by silence, for when no recording is given."""
+    t = np.arange(int(rate * speech_seconds)) / rate
+    envelope = 0.6 + 0.4 * np.sin(2 * np.pi * 4 * t)
+    voiced = 6000 * envelope * (np.sin(2 * np.pi * 140 * t) + 0.5 * np.sin(2 * np.pi * 280 * t))
+    silence = np.zeros(int(rate * silence_seconds))
+    return np.concatenate((voiced, silence)).astype("<i2").tobytes()
+
+
+def load_answer_pcm(paths, rate=24000):
+    """Concatenate the scenario's recorded answers; missing files are replaced by synthetic speech."""
+    if not paths:
+        return synthetic_answer_pcm(rate)
+    segments = []
+    for path in paths:
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                segments.append(f.read())
+        else:
+            logging.warning(f"{path} not found; streaming synthetic speech instead")
+            segments.append(synthetic_answer_pcm(rate))
+    return b"".join(segments)
+
+
+class CountingWebSocket:
+    """Wraps a websocket-client connection and counts outgoing messages and bytes."""
+
+    def __init__(self, ws):
+        self.ws = ws
+        self.messages_sent = 0
+        self.bytes_sent = 0
+        self._lock = threading.Lock()
+
+    def send(self, message):
+        with self._lock:
+            self.messages_sent += 1
+            self.bytes_sent += len(message)
+        return self.ws.send(message)
+
+    def recv(self):
+        return self.ws.recv()
+
+    def close(self):
+        return self.ws.close()
+
+
+def build_realtime_interviewer(module, api_key, scenario):
+    params = scenario["realtime"]
+    if module.__name__ == "ai_realtime_v2":
+        return module.FinanceInterviewerAI(api_key, params["job_params"])
+    return module.FinanceInterviewerAI(api_key, role_type=params.get("role_type"),
+                                       resume_text=scenario["session"].get("candidate_cv"))
+
+
+def run_realtime_session(module, api_key, scenario, pcm, pace=True, timeout=30.0):
+    """Stream recorded PCM through one FinanceInterviewerAI's sender/receiver threads without audio devices.
+
+    Returns (seconds from the last uploaded chunk to the first response audio, websocket messages sent,
+    mic uplink stats).
+    """
+    from websocket import create_connection
+
+    interviewer = build_realtime_interviewer(module, api_key, scenario)
+    ws = CountingWebSocket(create_connection(
+        interviewer.WS_URL,
+        header=[f'Authorization: Bearer {api_key}', 'OpenAI-Beta: realtime=v1']
+    ))
+    receive_thread = threading.Thread(target=interviewer.receive_audio, args=(ws,))
+    mic_thread = threading.Thread(target=interviewer.send_mic_audio, args=(ws,))
+    receive_thread.start()
+    mic_thread.start()
+
+    chunk_bytes = interviewer.CHUNK_SIZE * 2
+    chunk_seconds = interviewer.CHUNK_SIZE / interviewer.RATE
+    try:
+        for offset in range(0, len(pcm), chunk_bytes):
+            interviewer.mic_queue.put((time.perf_counter(), pcm[offset:offset + chunk_bytes]))
+            if pace:
+                time.sleep(chunk_seconds)
+        speech_end = time.perf_counter()
+        buffered = len(interviewer.audio_buffer)
+        while len(interviewer.audio_buffer) == buffered and time.perf_counter() - speech_end < timeout:
+            time.sleep(0.005)
+        first_audio = time.perf_counter() - speech_end if len(interviewer.audio_buffer) > buffered else None
+    finally:
+        interviewer.stop_event.set()
+        ws.close()
+        receive_thread.join()
+        mic_thread.join()
+    return first_audio, ws.messages_sent, interviewer.mic_uplink.stats()
+
+
+def run_realtime_benchmark(scenario, sessions, module_name, api_key, pace=True):
+    module = importlib.import_module(module_name)
+    pcm = load_answer_pcm(scenario["realtime"].get("pcm_files", []))
+
+    start_time = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions) as executor:
+        results = list(executor.map(
+            lambda _: run_realtime_session(module, api_key, scenario, pcm, pace), range(sessions)))
+    elapsed = time.perf_counter() - start_time
+
+    latencies = [latency for latency, _, _ in results if latency is not None]
+    uplinks = [uplink for _, _, uplink in results]
+    return {
+        "mode": f"realtime:{module_name}",
+        "sessions": sessions,
+        "seconds": elapsed,
+        "response_audio_latency": latency_summary(latencies),
+        "sessions_without_audio": len(results) - len(latencies),
+        "ws_messages_per_session": sum(sent for _, sent, _ in results) / sessions,
+        "mic_send_lag": latency_summary([uplink["send_lag_p99"] for uplink in uplinks if uplink["frames"]]),
+        "mic_queue_depth_max": max(uplink["queue_depth_max"] for uplink in uplinks),
+        "sessions_per_second": sessions / elapsed if elapsed else None
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Drive scripted interview sessions and report latency and throughput.")
+    parser.add_argument("scenario", help="scenario JSON file (see scenarios/basic.json)")
+    parser.add_argument("--sessions", type=int, default=10)
+    parser.add_argument("--mode", choices=["chat", "realtime"], default="chat")
+    parser.add_argument("--chat-engine", choices=["async", "main"], default="async",
+                        help="drive AsyncAIInterviewPrep sessions, or main.AIInterviewPrep's own turn loop in threads")
+    parser.add_argument("--realtime-module", choices=["ai_realtime", "ai_realtime_v2"], default="ai_realtime")
+    parser.add_argument("--no-pace", action="store_true", help="upload recorded PCM as fast as possible")
+    parser.add_argument("--output", help="also write the report as JSON to this file")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+    os.environ.setdefault('TRANSCRIPTION_BACKENDS', 'local')
+    with open(args.scenario, 'r', encoding='utf-8') as f:
+        scenario = json.load(f)
+
+    if args.mode == "chat" and args.chat_engine == "main":
+        report = run_main_benchmark(scenario, args.sessions, os.environ.get("OPENAI_API_KEY", ""))
+    elif args.mode == "chat":
+        from server import create_client
+        report = asyncio.run(run_chat_benchmark(scenario, args.sessions, create_client(args.sessions * 2),
+                                                load_question_bank()))
+    else:
+        report = run_realtime_benchmark(scenario, args.sessions, args.realtime_module,
+                                        os.environ.get("OPENAI_API_KEY", ""), pace=not args.no_pace)
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
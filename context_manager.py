@@ -0,0 +1,190 @@
+import asyncio
+import logging
+import threading
+
+
+def estimate_tokens(text):
+    """Rough token estimate for English prose (about four characters per token)."""
+    return (len(text) + 3) // 4 if text else 0
+
+
+class ConversationContext:
+    """Token-bounded interview context: the last few turns verbatim plus a rolling summary of older turns."""
+
+    def __init__(self, client, token_budget=1200, recent_turns=3, model="gpt-4o-mini"):
+        self.client = client
+        self.token_budget = token_budget
+        self.recent_turns = recent_turns
+        self.model = model
+        self.summary = ""
+        self.turns = []
+        self._pending = []
+        self._lock = threading.Lock()
+        self._worker = None
+        self._folding = False
+
+    def add_turn(self, question, answer, interviewer_response):
+        """Record a completed exchange and fold anything older than the recent window into the summary."""
+        turn = f"Interviewer: {question}\nCandidate: {answer}\nInterviewer: {interviewer_response}"
+        with self._lock:
+            self.turns.append(turn)
+            while len(self.turns) > self.recent_turns:
+                self._pending.append(self.turns.pop(0))
+        self._schedule_summary()
+
+    def render(self, token_budget=None):
+        """Return the context string to embed in a prompt, kept within token_budget (default self.token_budget).
+
+        A budget smaller than the recent turns compacts them to their newest part.
+        """
+        with self._lock:
+            summary = self.summary
+            pending = list(self._pending)
+            turns = list(self.turns)
+
+        if token_budget is None:
+            token_budget = self.token_budget
+        recent = "\n\n".join(turns)
+        if estimate_tokens(recent) > token_budget:
+            return "Most recent exchanges:\n" + self._truncate(recent, token_budget)
+        remaining = token_budget - estimate_tokens(recent)
+
+        # Turns still waiting for the background summarizer are included verbatim
+        # (newest first) while they fit, so nothing is lost between updates.
+        unfolded = []
+        for turn in reversed(pending):
+            cost = estimate_tokens(turn)
+            if cost > remaining - estimate_tokens(summary):
+                break
+            unfolded.insert(0, turn)
+            remaining -= cost
+
+        if estimate_tokens(summary) > remaining:
+            summary = self._truncate(summary, max(remaining, 0))
+
+        parts = []
+        if summary:
+            parts.append(f"Summary of earlier conversation:\n{summary}")
+        if unfolded or recent:
+            parts.append("Most recent exchanges:\n" + "\n\n".join(unfolded + ([recent] if recent else [])))
+        return "\n\n".join(parts)
+
+    def snapshot(self):
+        """Plain-data copy of the summary and turns, for the session journal."""
+        with self._lock:
+            return {"summary": self.summary, "turns": list(self.turns), "pending": list(self._pending)}
+
+    def restore(self, snapshot):
+        """Reinstate a snapshot without calling the API; pending turns are folded after the next add_turn."""
+        with self._lock:
+            self.summary = snapshot.get("summary", "")
+            self.turns = list(snapshot.get("turns", []))
+            self._pending = list(snapshot.get("pending", []))
+
+    def wait(self, timeout=None):
+        """Block until the background summarizer has folded all pending turns."""
+        worker = self._worker
+        if worker is not None:
+            worker.join(timeout)
+
+    def _schedule_summary(self):
+        with self._lock:
+            if not self._pending or self._folding:
+                return
+            self._folding = True
+            self._worker = threading.Thread(target=self._fold_pending, daemon=True)
+            self._worker.start()
+
+    def _fold_pending(self):
+        while True:
+            with self._lock:
+                if not self._pending:
+                    self._folding = False
+                    return
+                batch = list(self._pending)
+                summary = self.summary
+            new_summary = self._summarize(summary, batch)
+            with self._lock:
+                self.summary = new_summary
+                del self._pending[:len(batch)]
+
+    def _summary_messages(self, summary, turns):
+        prompt = f"""
+        Update the running summary of a job interview with the new exchanges below.
+        Keep the candidate's key claims, numbers, deals, named experiences and any weak areas,
+        and the topics that have already been covered. Stay under {self._summary_budget() * 3 // 4} words.
+
+        Current summary:
+        {summary if summary else "None yet."}
+
+        New exchanges:
+        {chr(10).join(turns)}
+        """
+        return [
+            {"role": "system", "content": "You maintain concise running summaries of interview conversations."},
+            {"role": "user", "content": prompt}
+        ]
+
+    def _summary_budget(self):
+        return max(self.token_budget // 3, 50)
+
+    def _fallback_summary(self, summary, turns, error):
+        logging.exception(f"Error summarizing conversation context: {error}")
+        return self._truncate("\n".join([summary] + turns if summary else turns), self._summary_budget())
+
+    def _summarize(self, summary, turns):
+        try:
+            response = self.client.chat.completions.create(
+                model=self.model,
+                messages=self._summary_messages(summary, turns)
+            )
+            return self._truncate(response.choices[0].message.content.strip(), self._summary_budget())
+        except Exception as e:
+            return self._fallback_summary(summary, turns, e)
+
+    @staticmethod
+    def _truncate(text, max_tokens):
+        """Keep the most recent part of text that fits in max_tokens."""
+        max_chars = max_tokens * 4
+        if len(text) <= max_chars:
+            return text
+        return text[-max_chars:].lstrip()
+
+
+class AsyncConversationContext(ConversationContext):
+    """ConversationContext for an AsyncOpenAI client; older turns are folded by an asyncio task."""
+
+    def _schedule_summary(self):
+        with self._lock:
+            if not self._pending or self._folding:
+                return
+            self._folding = True
+        self._worker = asyncio.get_running_loop().create_task(self._fold_pending_async())
+
+    async def wait(self):
+        """Wait until the summarizer task has folded all pending turns."""
+        if self._worker is not None:
+            await self._worker
+
+    async def _fold_pending_async(self):
+        while True:
+            with self._lock:
+                if not self._pending:
+                    self._folding = False
+                    return
+                batch = list(self._pending)
+                summary = self.summary
+            new_summary = await self._summarize_async(summary, batch)
+            with self._lock:
+                self.summary = new_summary
+                del self._pending[:len(batch)]
+
+    async def _summarize_async(self, summary, turns):
+        try:
+            response = await self.client.chat.completions.create(
+                model=self.model,
+                messages=self._summary_messages(summary, turns)
+            )
+            return self._truncate(response.choices[0].message.content.strip(), self._summary_budget())
+        except Exception as e:
+            return self._fallback_summary(summary, turns, e)
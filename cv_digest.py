@@ -0,0 +1,68 @@
+import os
+import json
+import hashlib
+import logging
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "ai_interview_prep", "cv_digests")
+
+
+def file_content_hash(file_path):
+    """SHA-256 of a file's bytes, read in blocks."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 16), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class CVDigestCache:
+    """On-disk cache of compressed CV digests keyed by the CV file's content hash."""
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, model="gpt-4o-mini"):
+        self.cache_dir = cache_dir
+        self.model = model
+
+    def _path(self, content_hash):
+        return os.path.join(self.cache_dir, f"{content_hash}.json")
+
+    def load(self, file_path):
+        """Return the cached digest for this file, or None if it has not been summarized yet."""
+        try:
+            with open(self._path(file_content_hash(file_path)), 'r', encoding='utf-8') as f:
+                return json.load(f)["digest"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def build(self, file_path, cv_text, client):
+        """Summarize cv_text once and store the digest; falls back to the full text if summarizing fails."""
+        prompt = f"""
+        Compress the following CV into a dense digest for an interviewer.
+        Keep every role, employer, date range, deal or project (with sizes and outcomes), education,
+        certifications and technical skills. Drop formatting, contact details and filler.
+
+        CV:
+        {cv_text}
+        """
+        try:
+            response = client.chat.completions.create(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": "You write compact, factual CV digests for interviewers."},
+                    {"role": "user", "content": prompt}
+                ]
+            )
+            digest = response.choices[0].message.content.strip()
+        except Exception as e:
+            logging.exception(f"Error building CV digest: {e}")
+            return cv_text
+
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            path = self._path(file_content_hash(file_path))
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({"digest": digest}, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logging.warning(f"Could not cache CV digest: {e}")
+        return digest
@@ -0,0 +1,206 @@
+import os
+import re
+import math
+from collections import Counter
+
+from context_manager import estimate_tokens
+from text_terms import tokenize
+
+# Headings recognised without a trailing colon, matched against the whole line (case and "&" folded)
+SECTION_NAMES = {
+    "deals": ("deal experience", "deals", "transaction experience", "transactions", "selected transactions",
+              "representative transactions", "investment experience", "projects"),
+    "education": ("education", "academic background", "academics", "qualifications", "certifications",
+                  "licenses", "education and certifications", "education and qualifications"),
+    "skills": ("skills", "technical skills", "skills and interests", "languages", "interests", "activities",
+               "additional information", "skills and additional information", "languages and skills"),
+    "experience": ("experience", "work experience", "professional experience", "relevant experience",
+                   "employment", "employment history", "work history", "career history", "leadership",
+                   "leadership experience")
+}
+# Keywords filing a colon-terminated heading; checked in order, so "Deal Experience:" is filed under deals
+SECTION_KEYWORDS = (
+    ("deals", ("deal", "transaction", "engagement", "investment", "project")),
+    ("education", ("education", "academic", "qualification", "certification", "licens", "degree")),
+    ("skills", ("skill", "language", "technical", "software", "tools", "interests", "activities", "additional")),
+    ("experience", ("experience", "employment", "work history", "career", "professional", "positions", "leadership"))
+)
+# Query words that point at a section without naming it
+SECTION_HINTS = {
+    "education": {"study", "studied", "school", "university", "college", "degree", "gpa", "major", "graduate", "course"},
+    "deals": {"deal", "transaction", "acquisition", "merger", "ipo", "buyout", "sale", "financing", "closed"},
+    "experience": {"role", "job", "position", "employer", "firm", "team", "responsibilitie", "internship", "worked"},
+    "skills": {"skill", "software", "excel", "programming", "tool", "language", "certification"}
+}
+BULLET_PATTERN = re.compile(r"^(?:[-*•▪●‣⁃∙·]|\d{1,2}[.)])\s+")
+MAX_HEADING_WORDS = 5
+MAX_SNIPPET_WORDS = 60
+
+
+def heading_section(line):
+    """Section name for a heading line, or None if the line is content.
+
+    A heading either is exactly a known section name, in any case and with or without a colon, or is a short line
+    ending in a colon; colon-terminated headings without a section keyword are filed under "other". Short or
+    capitalized lines such as an employer ("GOLDMAN SACHS") or a role ("Project Finance Intern") stay content.
+    """
+    name = " ".join(line.rstrip(":").replace("&", " and ").lower().split())
+    for section, names in SECTION_NAMES.items():
+        if name in names:
+            return section
+    words = name.split()
+    if (not line.endswith(":") or not words or len(words) > MAX_HEADING_WORDS or BULLET_PATTERN.match(line)
+            or re.search(r"\d", line)):
+        return None
+    for section, keywords in SECTION_KEYWORDS:
+        if any(keyword in name for keyword in keywords):
+            return section
+    return "other"
+
+
+def split_snippets(text):
+    """Split CV text into snippets of at most MAX_SNIPPET_WORDS words.
+
+    Returns a list of dicts with section, heading (the heading line the snippet falls under, as written),
+    title (the entry line a bullet belongs to, e.g. employer and dates) and text. Lines before the first heading
+    belong to the "summary" section.
+    """
+    snippets = []
+    section = "summary"
+    heading_text = None
+    title = None
+    paragraph = []
+
+    def add(body, entry_title):
+        words = body.split()
+        for start in range(0, len(words), MAX_SNIPPET_WORDS):
+            snippets.append({"section": section, "heading": heading_text, "title": entry_title,
+                             "text": " ".join(words[start:start + MAX_SNIPPET_WORDS])})
+
+    def flush():
+        nonlocal paragraph
+        if paragraph:
+            add(" ".join(paragraph), None)
+            paragraph = []
+
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            flush()
+            continue
+        heading = heading_section(line)
+        if heading is not None:
+            flush()
+            section, heading_text, title = heading, line.rstrip(":").strip(), None
+            continue
+        bullet = BULLET_PATTERN.match(line)
+        if bullet:
+            if paragraph:
+                # The lines above a run of bullets name the entry (employer, role, dates, deal)
+                title = " ".join(paragraph)
+                paragraph = []
+            add(line[bullet.end():], title)
+        elif snippets and snippets[-1]["title"] is not None and not paragraph and line[:1].islower():
+            # Wrapped continuation of the previous bullet
+            snippets[-1]["text"] += f" {line}"
+        else:
+            paragraph.append(line)
+    flush()
+    return snippets
+
+
+class CVIndex:
+    """BM25 index over a CV's snippets, used to put only the parts relevant to the current turn into a prompt."""
+
+    def __init__(self, text, k1=1.5, b=0.75):
+        self.snippets = split_snippets(text)
+        self.k1 = k1
+        self.b = b
+        self.term_counts = []
+        document_frequency = Counter()
+        for snippet in self.snippets:
+            # Section, heading and entry title are indexed too, so "education", "Selected Transactions" or an
+            # employer's name finds its bullets
+            terms = Counter(tokenize(f"{snippet['section']} {snippet['heading'] or ''} {snippet['title'] or ''} "
+                                     f"{snippet['text']}"))
+            self.term_counts.append(terms)
+            document_frequency.update(terms.keys())
+        count = len(self.snippets)
+        self.idf = {term: math.log(1 + (count - df + 0.5) / (df + 0.5)) for term, df in document_frequency.items()}
+        self.lengths = [sum(terms.values()) for terms in self.term_counts]
+        self.average_length = sum(self.lengths) / count if count else 0.0
+
+    def scores(self, query):
+        query_terms = set(tokenize(query))
+        query_terms.update(section for section, hints in SECTION_HINTS.items() if query_terms & hints)
+        scores = []
+        for terms, length in zip(self.term_counts, self.lengths):
+            score = 0.0
+            for term in query_terms:
+                frequency = terms.get(term)
+                if frequency:
+                    norm = self.k1 * (1 - self.b + self.b * length / self.average_length)
+                    score += self.idf[term] * frequency * (self.k1 + 1) / (frequency + norm)
+            scores.append(score)
+        return scores
+
+    def search(self, query, k):
+        """Indices of the top-k snippets for query; padded with the CV's earliest entries when fewer match."""
+        scores = self.scores(query)
+        ranked = [index for index in sorted(range(len(scores)), key=lambda i: -scores[i]) if scores[index] > 0][:k]
+        for index, snippet in enumerate(self.snippets):
+            if len(ranked) >= k:
+                break
+            # The summary's headline is already in the outline
+            if index not in ranked and snippet["section"] != "summary":
+                ranked.append(index)
+        return ranked
+
+    def render(self, query, k, max_tokens=None):
+        """Top-k snippets as text grouped by section and entry, in CV order, capped at max_tokens."""
+        chosen = []
+        used = 0
+        for index in self.search(query, k):
+            snippet = self.snippets[index]
+            tokens = estimate_tokens(snippet["text"]) + estimate_tokens(snippet["title"] or "")
+            if max_tokens is not None and chosen and used + tokens > max_tokens:
+                break
+            chosen.append(index)
+            used += tokens
+
+        lines = []
+        group = None
+        for index in sorted(chosen):
+            snippet = self.snippets[index]
+            if (snippet["section"], snippet["title"]) != group:
+                group = (snippet["section"], snippet["title"])
+                lines.append(f"[{snippet['section']}] {snippet['title']}" if snippet["title"] else f"[{snippet['section']}]")
+            lines.append(f"  - {snippet['text']}")
+        return "\n".join(lines)
+
+    def outline(self, digest=None):
+        """Short, fixed description of the CV for the cacheable prompt prefix: the headline, or a whole-CV digest if
+        given, and the sections."""
+        counts = Counter(snippet["section"] for snippet in self.snippets)
+        if digest is None:
+            headline = next((snippet["text"] for snippet in self.snippets if snippet["section"] == "summary"), "")
+            digest = " ".join(headline.split()[:30])
+        sections = ", ".join(f"{section} ({count} snippets)" for section, count in counts.items() if section != "summary")
+        return (f"{digest}\n"
+                f"        Sections: {sections}. The excerpts relevant to each request are given with the request.")
+
+
+def build_cv_index(text, min_tokens=None):
+    """A CVIndex for CVs longer than CV_INDEX_MIN_TOKENS (default 800), or None when the whole CV is small enough
+    to send as it is."""
+    if min_tokens is None:
+        min_tokens = int(os.environ.get('CV_INDEX_MIN_TOKENS', '800'))
+    if not text or estimate_tokens(text) < min_tokens:
+        return None
+    index = CVIndex(text)
+    return index if index.snippets else None
+
+
+def snippet_count():
+    """Number of CV snippets put into each prompt, from CV_SNIPPETS (default 6)."""
+    return int(os.environ.get('CV_SNIPPETS', '6'))
@@ -1,177 +1,171 @@
 import os
-import json
 import re
-import random
-from PyPDF2 import PdfReader
 from openai import OpenAI
-import pygame
-import speech_recognition as sr
-from gtts import gTTS
-import tempfile
-import speech_recognition as sr
 import time
-import threading
-import queue
 import logging
-import threading
-import pyaudio
-import wave
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from context_manager import ConversationContext
+from cv_digest import CVDigestCache
+from cv_index import build_cv_index
+import prompts
+from prefetch import QuestionPrefetcher
+from question_index import DuplicateQuestion, QuestionIndex
+from question_bank import BANK_QUESTION_NUMBERS, load_question_bank
+from streaming_tts import StreamingSpeaker
+from tts_cache import TTSCache
+from audio_playback import PlaybackEngine
+from audio_capture import CaptureEngine
+from vad import EndpointDetector
+from transcription import create_service
+from tracing import Tracer, start_metrics_server_from_env
+from request_executor import RequestExecutor
+from resume_ingest import ResumeCache, load_resume
+from session_journal import SessionJournal, journal_path, read_journal
 
 logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
 
 
 # Ensure you set your OpenAI API key as an environment variable for security
-OPENAI_API_KEY = api_key
+OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
 if not OPENAI_API_KEY:
     raise ValueError("No OpenAI API key found. Please set the OPENAI_API_KEY environment variable.")
 
 
+# Setup answers recorded at the start of a session journal; enough to resume without asking or parsing again
+JOURNALED_SETUP = ("job_position", "industry", "industry_coverage", "vertical", "job_description",
+                   "candidate_cv", "cv_digest", "use_voice_input")
+
+
 class AIInterviewPrep:
-    def __init__(self):
+    def __init__(self, client=None, executor=None):
         self.job_position = ""
         self.industry = ""
         self.industry_coverage = ""
         self.vertical = ""
         self.job_description = ""
         self.candidate_cv = ""
+        self.cv_digest = ""
+        self.cv_index = None
+        self.cv_digests = CVDigestCache()
+        self.resume_cache = ResumeCache()
+        self.prompt_cache_stats = prompts.PromptCacheStats()
+        self.token_budget = prompts.TokenBudget()
+        self.evaluation_stats = prompts.EvaluationStats()
         self.interview_history = []
         self.scores = []
-        self.client = OpenAI(api_key=OPENAI_API_KEY)
-        self.speech_file_path = "speech.mp3"
+        self.client = client if client is not None else OpenAI(api_key=OPENAI_API_KEY)
+        # Retries for chat and speech calls are owned by the executor, not the client
+        self.executor = executor if executor is not None else RequestExecutor()
+        self.executor_client = self.client.with_options(max_retries=0)
+        self.tracer = Tracer()
+        self.answered_at = None
+        self.playback = PlaybackEngine(self.tracer)
+        self.speech_worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="speech")
+        self.tts_cache = TTSCache()
         self.use_voice_input = True
-        self.conversation_context = ""
+        self.conversation_context = ConversationContext(self.client)
         self.question_counter = 0
-        self.microphone = sr.Microphone()
-        self.recognizer = sr.Recognizer()
-
-        self.industries = [
-            "Investment Banking", "Private Equity", "Real Estate Finance", "Venture Capital",
-            "Growth Equity", "Asset Management", "Sales & Trading", "Hedge Fund",
-            "Equity Research", "Debt Capital Markets", "Equity Capital Markets", "Consulting",
-            "Accounting", "Corporate Finance", "Wealth Management", "Commercial Banking",
-            "Insurance", "Structured Finance"
-        ]
-        self.blue_industries = [
-            "Investment Banking", "Private Equity", "Venture Capital", "Growth Equity",
-            "Equity Research", "Debt Capital Markets", "Equity Capital Markets"
-        ]
-        self.industry_coverage_options = [
-            "None", "Healthcare", "Real Estate, Gaming, & Lodging (REGAL)", 
-            "Technology, Media & Telecom (TMT)", "Financial Sponsors Group (FSG)",
-            "Financial Institutions Group (FIG)", "Technology", "Industrials",
-            "Public Finance", "Restructuring (Rx)", "Oil & Gas", "Consumer Retail",
-            "Infrastructure", "Renewable Energy", "Power & Utilities", 
-            "Business Services", "Food & Beverage"
-        ]
-        self.orange_options = [
-            "Healthcare", "Real Estate, Gaming, & Lodging (REGAL)", 
-            "Financial Sponsors Group (FSG)", "Technology", "Industrials",
-            "Oil & Gas", "Consumer Retail", "Food & Beverage"
-        ]
-        self.verticals = ["Depositories", "Insurance", "Specialty Finance", "Asset Management", "FinTech"]
-
-    def text_to_speech(self, text):
+        self.stream_mode = os.environ.get('STREAM_MODE') == 'TRUE'
+        self.single_round_trip = os.environ.get('SINGLE_ROUND_TRIP') == 'TRUE'
+        self.pending_question = None
+        self.journal = None
+        self.resumed_question = None
+        self.answered_questions = 0
+        self.question_index = QuestionIndex()
+        self.max_question_regenerations = 2
+        self.question_bank = load_question_bank()
+        self.prefetcher = QuestionPrefetcher(self._request_question) if os.environ.get('PIPELINED_MODE') == 'TRUE' else None
+        # Every terminal read goes through here, so the turn loop can be driven by a script (see bench.py)
+        self.input = input
+        self.capture = None
+        self.transcriber = create_service(tracer=self.tracer)
+        self.auto_endpoint = os.environ.get('AUTO_ENDPOINT') == 'TRUE'
+        self.endpoint_silence_ms = int(os.environ.get('ENDPOINT_SILENCE_MS', '800'))
+        self.endpoint_no_speech_ms = int(os.environ.get('ENDPOINT_NO_SPEECH_MS', '12000'))
+
+        self.industries = list(prompts.INDUSTRIES)
+        self.blue_industries = list(prompts.BLUE_INDUSTRIES)
+        self.industry_coverage_options = list(prompts.INDUSTRY_COVERAGE_OPTIONS)
+        self.orange_options = list(prompts.ORANGE_OPTIONS)
+        self.verticals = list(prompts.VERTICALS)
+
+    def text_to_speech(self, text, wait=True):
+        """Speak text from the speech worker; with wait=False the caller only enqueues it.
+
+        Synthesis never runs on the caller's thread, so a token stream loop is not held up by a TTS round trip, and
+        clips are spoken in the order they were requested, including sentences queued through ordered_player().
+        """
+        generation = self.playback.generation()
+        spoken = self.speech_worker.submit(self._speak, text, generation)
+        if wait:
+            done = spoken.result()
+            if done is not None:
+                done.wait()
+
+    def ordered_player(self):
+        """Play callback for a StreamingSpeaker that queues its clips on the speech worker.
+
+        The speaker synthesizes ahead on its own thread, but its clips reach playback only after any speech requested
+        before it, e.g. a comment released during evaluation that is still being synthesized.
+        """
+        generation = self.playback.generation()
+        return lambda audio: self.speech_worker.submit(self.playback.play, audio, generation)
+
+    def _speak(self, text, generation):
         try:
-            response = self.client.audio.speech.create(
-                model="tts-1",
-                voice="alloy",
-                input=text
-            )
-            with open(self.speech_file_path, "wb") as f:
-                f.write(response.content)
-
-            pygame.mixer.init()
-            pygame.mixer.music.load(self.speech_file_path)
-            pygame.mixer.music.play()
-            while pygame.mixer.music.get_busy():
-                pygame.time.Clock().tick(10)
+            # Speech requested before playback.cancel() is dropped even if its synthesis finishes afterwards
+            return self.playback.play(self.synthesize_speech(text), generation)
         except Exception as e:
             print(f"Text-to-speech failed. Error: {e}")
             print("Continuing without voice output.")
+            return None
+
+    def synthesize_speech(self, text):
+        with self.tracer.span("tts", chars=len(text)) as span:
+            audio = self.tts_cache.synthesize(self.executor_client, text, voice="alloy", model="tts-1", executor=self.executor)
+            span.set(bytes=len(audio))
+        return audio
 
 
 
     def speech_to_text(self):
         logging.debug("Entering speech_to_text method")
-        
-        # Set up PyAudio
-        CHUNK = 1024
-        FORMAT = pyaudio.paInt16
-        CHANNELS = 1
-        RATE = 44100
-        
-        p = pyaudio.PyAudio()
-        
-        stream = p.open(format=FORMAT,
-                        channels=CHANNELS,
-                        rate=RATE,
-                        input=True,
-                        frames_per_buffer=CHUNK)
-
-        print("Recording... Press Enter to stop.")
-        
-        frames = []
-        recording = True
-
-        def input_thread():
-            nonlocal recording
-            input()
-            recording = False
-
-        thread = threading.Thread(target=input_thread)
-        thread.start()
 
-        while recording:
-            data = stream.read(CHUNK)
-            frames.append(data)
+        if self.capture is None:
+            self.capture = CaptureEngine()
 
+        detector = EndpointDetector(self.capture.rate, trailing_silence_ms=self.endpoint_silence_ms,
+                                    no_speech_ms=self.endpoint_no_speech_ms) if self.auto_endpoint else None
+        with self.tracer.span("capture", auto_endpoint=detector is not None) as span:
+            self.capture.start(detector)
+            if detector:
+                print("Recording... Stop speaking to finish.")
+                self.capture.wait_for_endpoint()
+            else:
+                print("Recording... Press Enter to stop.")
+                self.input()
+            pcm = self.capture.stop()
+            span.set(bytes=len(pcm))
         print("Finished recording")
-
-        stream.stop_stream()
-        stream.close()
-        p.terminate()
-
-        # Save the recorded data as a WAV file
-        wf = wave.open("temp.wav", 'wb')
-        wf.setnchannels(CHANNELS)
-        wf.setsampwidth(p.get_sample_size(FORMAT))
-        wf.setframerate(RATE)
-        wf.writeframes(b''.join(frames))
-        wf.close()
-
-        # Perform speech recognition on the recorded file
-        recognizer = sr.Recognizer()
-        with sr.AudioFile("temp.wav") as source:
-            audio = recognizer.record(source)
-
-        try:
-            text = recognizer.recognize_google(audio)
-            logging.debug(f"Speech recognized: {text}")
-            return text
-        except sr.UnknownValueError:
-            print("Google Speech Recognition could not understand audio")
-            return None
-        except sr.RequestError as e:
-            print(f"Could not request results from Google Speech Recognition service; {e}")
+        if detector and detector.no_speech:
+            logging.debug(f"No speech within {self.endpoint_no_speech_ms} ms; recording abandoned")
             return None
+        if detector:
+            pcm = detector.trim(pcm, self.capture.dropped_bytes())
 
-    def extract_text_from_pdf(self, file_path):
-        try:
-            with open(file_path, 'rb') as file:
-                pdf = PdfReader(file)
-                text = ""
-                for page in pdf.pages:
-                    text += page.extract_text()
+        text = self.transcriber.transcribe(self.capture.to_audio_data(pcm))
+        if text:
+            logging.debug(f"Speech recognized: {text}")
             return text
-        except Exception as e:
-            print(f"Error reading PDF: {e}")
-            return ""
+        print("Speech recognition could not understand audio")
+        return None
 
     def setup_interview(self):
-        print("Welcome to the Enhanced AI Interview Prep App!")
-        self.text_to_speech("Welcome to the Enhanced AI Interview Prep App!")
+        print(prompts.WELCOME_MESSAGE)
+        self.text_to_speech(prompts.WELCOME_MESSAGE)
 
-        self.job_position = input("Enter the job position: ")
+        self.job_position = self.input("Enter the job position: ")
         
         print("Select the industry:")
         for i, industry in enumerate(self.industries, 1):
@@ -179,7 +173,7 @@ class AIInterviewPrep:
         
         while True:
             try:
-                industry_choice = int(input("Enter the number of your choice: "))
+                industry_choice = int(self.input("Enter the number of your choice: "))
                 if 1 <= industry_choice <= len(self.industries):
                     self.industry = self.industries[industry_choice - 1]
                     break
@@ -195,7 +189,7 @@ class AIInterviewPrep:
             
             while True:
                 try:
-                    coverage_choice = int(input("Enter the number of your choice: "))
+                    coverage_choice = int(self.input("Enter the number of your choice: "))
                     if 1 <= coverage_choice <= len(self.industry_coverage_options):
                         self.industry_coverage = self.industry_coverage_options[coverage_choice - 1]
                         break
@@ -211,7 +205,7 @@ class AIInterviewPrep:
                 
                 while True:
                     try:
-                        vertical_choice = int(input("Enter the number of your choice: "))
+                        vertical_choice = int(self.input("Enter the number of your choice: "))
                         if 1 <= vertical_choice <= len(self.verticals):
                             self.vertical = self.verticals[vertical_choice - 1]
                             break
@@ -223,12 +217,17 @@ class AIInterviewPrep:
         self.job_description = self.get_multiline_input("Enter the job description (press Enter twice when finished):")
 
         while True:
-            cv_path = input("Enter the full path to your CV (PDF file): ")
-            self.candidate_cv = self.extract_text_from_pdf(cv_path)
+            cv_path = self.input("Enter the full path to your CV (PDF or DOCX file): ")
+            self.candidate_cv = load_resume(cv_path, self.resume_cache)
             if self.candidate_cv:
+                # Short CVs are sent as they are. Long ones are indexed for per-request excerpts, and their cached
+                # digest heads the outline in the prompt prefix, so every request still sees the whole CV compressed
+                self.cv_index = build_cv_index(self.candidate_cv)
+                if self.cv_index is not None:
+                    self.cv_digest = self.cv_digests.load(cv_path) or self.cv_digests.build(cv_path, self.candidate_cv, self.client)
                 break
             else:
-                print("Failed to read the CV. Please ensure the file path is correct and the file is a valid PDF.")
+                print("Failed to read the CV. Please ensure the file path is correct and the file is a valid PDF or DOCX.")
 
         self.use_voice_input = self.get_yes_no_input("Would you like to use voice input for your responses?")
 
@@ -236,7 +235,7 @@ class AIInterviewPrep:
         print(prompt)
         lines = []
         while True:
-            line = input()
+            line = self.input()
             if line:
                 lines.append(line)
             else:
@@ -245,7 +244,7 @@ class AIInterviewPrep:
 
     def get_yes_no_input(self, question):
         while True:
-            response = input(f"{question} (yes/no): ").lower()
+            response = self.input(f"{question} (yes/no): ").lower()
             if response in ['yes', 'y']:
                 return True
             elif response in ['no', 'n']:
@@ -253,171 +252,358 @@ class AIInterviewPrep:
             else:
                 print("Please answer with 'yes' or 'no'.")
 
-    def generate_question(self):
+    def generate_question(self, on_text=None):
+        if self.resumed_question is not None:
+            # The question that was open when the session stopped is asked again
+            question, self.resumed_question = self.resumed_question, None
+            if on_text:
+                on_text(question)
+            return question
+
         self.question_counter += 1
-        
+        self.tracer.turn = self.question_counter
+
+        banked = self._bank_question(self.question_counter)
+        in_history = False
         if self.question_counter == 1:
-            return "Tell me about your background and why you're interested in this position."
+            question = prompts.OPENING_QUESTION
+        elif banked is not None:
+            question = banked
+            self.interview_history.append({"role": "interviewer", "content": question})
+            in_history = True
+        else:
+            question, self.pending_question = self.pending_question, None
+            if question is None and self.prefetcher:
+                question = self.prefetcher.take(self.question_counter)
+            avoid = []
+            if question is not None:
+                repeated = self.question_index.duplicate_of(question)
+                if repeated is not None:
+                    logging.info(f"Discarding precomputed question that repeats {repeated!r}")
+                    avoid.append(repeated)
+                    question = None
+            attempts = 0
+            while question is None and attempts <= self.max_question_regenerations:
+                attempts += 1
+                try:
+                    question = self._request_question(self.question_counter, self.conversation_context.render(),
+                                                      on_text, avoid)
+                except DuplicateQuestion as e:
+                    logging.info(f"Regenerating near-duplicate question: {e}")
+                    avoid.append(e.asked)
+                    if e.released:
+                        # The repeat has already been shown; the replacement starts on its own line
+                        on_text("\n")
+                    continue
+                if question is None:
+                    break
+                if on_text is not None:
+                    # Already checked in full and delivered token by token while streaming
+                    on_text = None
+                    break
+                repeated = self.question_index.duplicate_of(question)
+                if repeated is not None:
+                    logging.info(f"Regenerating question that repeats {repeated!r}")
+                    avoid.append(repeated)
+                    question = None
+            if question is None:
+                self.executor.record_fallback("generate_question")
+                question = prompts.FALLBACK_QUESTION
+            else:
+                self.interview_history.append({"role": "interviewer", "content": question})
+                in_history = True
 
-        prompt = f"""
-        You are an experienced interviewer conducting an interview for the position of {self.job_position} 
-        in the {self.industry} industry.
-        
-        Additional context:
-        Industry Coverage: {self.industry_coverage if self.industry_coverage else "Not specified"}
-        Vertical: {self.vertical if self.vertical else "Not specified"}
-        
-        Job Description: {self.job_description}
-        Candidate's CV: {self.candidate_cv}
-        Previous conversation context: {self.conversation_context}
-
-        This is question number {self.question_counter} in the interview.
-
-        Generate the next interview question based on this information and the conversation so far. 
-
-        The question should:
-        1. Be natural and conversational, as if coming from a human interviewer
-        2. Follow up on information provided in previous responses and the candidate's CV
-        3. Be highly relevant and specific to the chosen industry: {self.industry}
-        4. If applicable, focus on the selected Industry Coverage: {self.industry_coverage}
-        5. If a Vertical was selected, include aspects specific to: {self.vertical}
-        6. Avoid repeating questions that have already been asked
-        7. Gradually increase in difficulty and specificity as the interview progresses
-
-        Special instructions:
-        - For questions 2-4, focus on personal or behavioral questions related to the industry and role
-        - After question 4, ask more technical and role-specific questions directly related to {self.industry}
-        - If Industry Coverage was selected, ensure questions reflect knowledge specific to {self.industry_coverage}
-        - If a Vertical was chosen, include questions that test expertise in {self.vertical}
-        - Always maintain a friendly and engaging tone throughout the interview
-
-        Ensure the question flows naturally from the previous conversation and delves deeper into the candidate's experiences and qualifications,
-        while being highly relevant to the specific industry, coverage, and vertical selected.
+        self.question_index.add(question)
+        self.journal.append("question", number=self.question_counter, question=question, in_history=in_history)
+        if on_text:
+            on_text(question)
+        return question
+
+    def _bank_covers(self, question_number):
+        return self.question_bank is not None and question_number in BANK_QUESTION_NUMBERS
+
+    def _next_question_precomputed(self):
+        """Whether the next question will come from the bank or with the evaluation, so speculating would be wasted."""
+        return self.single_round_trip or self._bank_covers(self.question_counter + 1)
+
+    def _bank_question(self, question_number):
+        """An unasked precomputed question for this industry, coverage and vertical, or None."""
+        if not self._bank_covers(question_number):
+            return None
+        return self.question_bank.pick(self.industry, self.industry_coverage, self.vertical, self.question_index)
+
+    def _request_question(self, question_number, conversation_context, on_text=None, avoid=()):
+        """Generate a question, streaming it to on_text if given.
+
+        A streamed question is held back until its leading complete sentences are long enough to judge; if they
+        repeat an earlier question the stream is dropped and DuplicateQuestion is raised before anything is shown or
+        spoken. The whole question is checked again once the stream ends, and a repeat found only then raises
+        DuplicateQuestion with released set.
         """
+        messages, sections = self.token_budget.build_messages(
+            self,
+            lambda history: prompts.build_question_suffix(question_number, history, avoid),
+            conversation_context,
+            query=prompts.recent_exchange(self)
+        )
 
         try:
-            response = self.client.chat.completions.create(
+            start_time = time.time()
+            if on_text is None:
+                with self.tracer.span("generate_question", question_number=question_number) as span:
+                    response = self.executor.call(
+                        "generate_question",
+                        self.executor_client.chat.completions.create,
+                        model="gpt-4o-mini",
+                        messages=messages
+                    )
+                    if response.usage:
+                        span.set(prompt_tokens=response.usage.prompt_tokens, completion_tokens=response.usage.completion_tokens)
+                self.prompt_cache_stats.record("generate_question", response, time.time() - start_time, sections=sections)
+                return response.choices[0].message.content.strip()
+
+            stream = self.executor.call(
+                "generate_question",
+                self.executor_client.chat.completions.create,
                 model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": "You are an AI-powered interview assistant generating natural, context-aware, and highly specific interview questions."},
-                    {"role": "user", "content": prompt}
-                ]
+                messages=messages,
+                stream=True,
+                stream_options={"include_usage": True}
             )
-
-            question = response.choices[0].message.content.strip()
-            self.interview_history.append({"role": "interviewer", "content": question})
-            return question
+            first_token_seconds = None
+            usage_chunk = None
+            parts = []
+            checked = False
+            for chunk in stream:
+                if getattr(chunk, "usage", None):
+                    # With include_usage the last chunk carries the token counts and no choices
+                    usage_chunk = chunk
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    if first_token_seconds is None:
+                        first_token_seconds = time.time() - start_time
+                    parts.append(delta)
+                    if checked:
+                        on_text(delta)
+                        continue
+                    text = "".join(parts).lstrip()
+                    # A short opener such as "Great answer." says nothing about the topic, so wait for more
+                    for sentence_end in re.finditer(r"[.?!](\s|$)", text):
+                        prefix = text[:sentence_end.end()]
+                        if sentence_end.end() < len(text) and self.question_index.judgeable(prefix):
+                            self._check_streamed_question(stream, prefix, partial=True)
+                            checked = True
+                            on_text("".join(parts))
+                            break
+            if parts:
+                self._check_streamed_question(stream, "".join(parts), partial=False, released=checked)
+                if not checked:
+                    on_text("".join(parts))
+            self.prompt_cache_stats.record("generate_question", usage_chunk, time.time() - start_time, first_token_seconds, sections)
+            self.tracer.record("generate_question", time.time() - start_time, question_number=question_number,
+                               streamed=True, first_token_seconds=first_token_seconds, chars=sum(map(len, parts)))
+            return "".join(parts).strip() or None
+        except DuplicateQuestion:
+            raise
         except Exception as e:
             logging.exception(f"Error generating question: {e}")
-            return "Could you tell me more about your experience in this field?"
+            return None
+
+    def _check_streamed_question(self, stream, text, partial, released=False):
+        repeated = self.question_index.duplicate_of(text.strip(), partial)
+        if repeated is not None:
+            stream.close()
+            raise DuplicateQuestion(text.strip(), repeated, released)
+
+    def _stream_text(self, text, speaker):
+        print(text, end="", flush=True)
+        speaker.feed(text)
 
-    def evaluate_response(self, response):
+    def evaluate_response(self, response, on_response=None):
+        """Evaluate an answer from a streamed JSON reply.
+
+        on_response(text) receives the interviewer's comment as soon as it has streamed in, provided the answer
+        was judged relevant, so it can be shown and spoken while the hidden evaluation is still generating.
+        """
         if response.lower() == 'quit':
             return None, None
 
-        last_question = self.interview_history[-1]['content'] if self.interview_history else "Tell me about your background and why you're interested in this position."
-
-        prompt = f"""
-        Evaluate the following candidate response to the last interview question:
-        Job Position: {self.job_position}
-        Industry: {self.industry}
-        Industry Coverage: {self.industry_coverage if self.industry_coverage else "Not specified"}
-        Vertical: {self.vertical if self.vertical else "Not specified"}
-        Job Description: {self.job_description}
-        Last Question: {last_question}
-        Candidate Response: {response}
-        Candidate's CV: {self.candidate_cv}
-        Interview History: {self.interview_history}
-
-        Provide three separate outputs:
-        1. A natural follow-up comment based on the candidate's response. 
-        This should sound like a human interviewer's reaction and may include:
-        - Acknowledgment of the candidate's response
-        - A brief comment or insight related to their answer
-        - A smooth transition to the next topic or question
-        2. A hidden evaluation for internal use.
-        3. A boolean indicating if the response was substantive and relevant (True) or not (False).
-
-        Format your response as follows:
-        <interviewer_response>
-        [Natural follow-up comment]
-        </interviewer_response>
-
-        <hidden_evaluation>
-        Score: [score from 0 to 10]
-        Strengths: [brief notes on strengths]
-        Improvement Areas: [brief notes on areas for improvement]
-        </hidden_evaluation>
-
-        <response_quality>
-        [True/False]
-        </response_quality>
-        """
+        last_question = self.interview_history[-1]['content'] if self.interview_history else prompts.OPENING_QUESTION
 
-        try:
-            evaluation = self.client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": "You are an AI-powered interview evaluator providing natural feedback and hidden evaluations."},
-                    {"role": "user", "content": prompt}
-                ]
-            )
-
-            eval_result = evaluation.choices[0].message.content.strip()
+        # The next question comes with the evaluation unless the question bank can serve it instantly
+        ask_next = self.single_round_trip and not self._bank_covers(self.question_counter + 1)
+        if ask_next:
+            # One call returns the evaluation and the next question together
+            build_suffix = lambda history: prompts.build_turn_suffix(last_question, response, history, self.question_counter + 1)
+        else:
+            build_suffix = lambda history: prompts.build_evaluation_suffix(last_question, response, history)
+        messages, sections = self.token_budget.build_messages(self, build_suffix, self.conversation_context,
+                                                              query=f"{last_question} {response}")
 
-            interviewer_response_match = re.search(r'<interviewer_response>(.*?)</interviewer_response>', eval_result, re.DOTALL)
-            interviewer_response = interviewer_response_match.group(1).strip() if interviewer_response_match else "Thank you for your response."
+        def on_field(name, value):
+            comment = prompts.releasable_comment(name, value, parser.fields)
+            if comment and on_response:
+                on_response(comment)
 
-            hidden_eval_match = re.search(r'<hidden_evaluation>(.*?)</hidden_evaluation>', eval_result, re.DOTALL)
-            hidden_evaluation = hidden_eval_match.group(1).strip() if hidden_eval_match else "No hidden evaluation available."
+        parser = prompts.StreamingEvaluationParser(on_field)
 
-            response_quality_match = re.search(r'<response_quality>(.*?)</response_quality>', eval_result, re.DOTALL)
-            response_quality = response_quality_match.group(1).strip().lower() == 'true' if response_quality_match else False
+        try:
+            start_time = time.time()
+            stage = "evaluate_and_ask" if ask_next else "evaluate_response"
+            with self.tracer.span(stage, answer_chars=len(response)) as span:
+                stream = self.executor.call(
+                    stage,
+                    self.executor_client.chat.completions.create,
+                    model="gpt-4o-mini",
+                    messages=messages,
+                    response_format=prompts.evaluation_response_format(ask_next),
+                    stream=True,
+                    stream_options={"include_usage": True}
+                )
+                first_token_seconds = None
+                usage_chunk = None
+                for chunk in stream:
+                    if getattr(chunk, "usage", None):
+                        usage_chunk = chunk
+                    delta = chunk.choices[0].delta.content if chunk.choices else None
+                    if delta:
+                        if first_token_seconds is None:
+                            first_token_seconds = time.time() - start_time
+                        parser.feed(delta)
+                if usage_chunk is not None:
+                    span.set(prompt_tokens=usage_chunk.usage.prompt_tokens, completion_tokens=usage_chunk.usage.completion_tokens)
+            self.prompt_cache_stats.record(stage, usage_chunk, time.time() - start_time, first_token_seconds, sections)
 
-            score_match = re.search(r'Score:\s*(\d+(?:\.\d+)?)', hidden_evaluation)
-            if score_match:
-                score = float(score_match.group(1))
-                self.scores.append(score)
+            try:
+                parsed, errors = parser.result(ask_next)
+            except prompts.EvaluationFormatError as e:
+                # Keep whatever fields did stream in before the reply broke down
+                parsed, errors = prompts.validate_evaluation(parser.fields, ask_next)
+                errors.insert(0, str(e))
+            self.evaluation_stats.record(errors)
+            interviewer_response = parsed["interviewer_response"]
+            hidden_evaluation = parsed["hidden_evaluation"]
+            response_quality = parsed["response_quality"]
+
+            if parsed["score"] is not None:
+                self.scores.append(parsed["score"])
             else:
-                logging.warning("Could not extract score from evaluation. Using default score of 5.")
-                self.scores.append(5)
+                logging.warning("Evaluation had no valid score; this answer is left unscored.")
+
+            if ask_next:
+                self.pending_question = parsed["next_question"]
 
             self.interview_history.append({"role": "candidate", "content": response})
             self.interview_history.append({"role": "interviewer", "content": interviewer_response})
             self.interview_history.append({"role": "evaluator", "content": hidden_evaluation})
             
-            self.conversation_context += f"\nInterviewer: {last_question}\nCandidate: {response}\nInterviewer: {interviewer_response}\n"
+            self.conversation_context.add_turn(last_question, response, interviewer_response)
+            self.journal.append("evaluation", question_number=self.question_counter, answer=response,
+                                interviewer_response=interviewer_response, hidden_evaluation=hidden_evaluation,
+                                score=parsed["score"], response_quality=response_quality,
+                                pending_question=self.pending_question, context=self.conversation_context.snapshot())
 
             return interviewer_response, hidden_evaluation, response_quality
         except Exception as e:
             logging.exception(f"Error in evaluating response: {e}")
-            return "Thank you for your response. Let's move on to the next question.", "Error in evaluation", False
+            self.executor.record_fallback("evaluate_and_ask" if ask_next else "evaluate_response")
+            return prompts.FALLBACK_RESPONSE, "Error in evaluation", False
+
+    def start_journal(self):
+        self.journal = SessionJournal(self.tracer.session_id)
+        self.journal.append("setup", mode="chat", session=self.tracer.session_id,
+                            **{name: getattr(self, name) for name in JOURNALED_SETUP})
+
+    def resume_session(self, session):
+        """Rebuild a journaled session (id or journal path) so run_interview continues where it stopped.
+
+        State comes entirely from the journal: the CV is not parsed again and no API calls are replayed.
+        """
+        start_time = time.perf_counter()
+        path = journal_path(session)
+        records = read_journal(path)
+        if not records or records[0].get("type") != "setup":
+            raise ValueError(f"{path} is not a chat session journal")
+
+        setup = records[0]
+        for name in JOURNALED_SETUP:
+            setattr(self, name, setup[name])
+        self.tracer.session_id = setup["session"]
+        self.cv_index = build_cv_index(self.candidate_cv)
+        open_question = None
+        for record in records[1:]:
+            if record["type"] == "question":
+                self.question_counter = record["number"]
+                self.question_index.add(record["question"])
+                if record["in_history"]:
+                    self.interview_history.append({"role": "interviewer", "content": record["question"]})
+                open_question = record["question"]
+            elif record["type"] == "evaluation":
+                self.interview_history.append({"role": "candidate", "content": record["answer"]})
+                self.interview_history.append({"role": "interviewer", "content": record["interviewer_response"]})
+                self.interview_history.append({"role": "evaluator", "content": record["hidden_evaluation"]})
+                if record["score"] is not None:
+                    self.scores.append(record["score"])
+                if record["response_quality"]:
+                    self.answered_questions += 1
+                # Either way the turn loop moves on to a new question after an evaluation
+                open_question = None
+                self.pending_question = record["pending_question"]
+                self.conversation_context.restore(record["context"])
+        self.resumed_question = open_question
+        self.tracer.turn = self.question_counter
+
+        self.journal = SessionJournal(self.tracer.session_id, os.path.dirname(os.path.abspath(path)))
+        self.journal.append("resume")
+        print(f"Resumed session {self.tracer.session_id}: {self.answered_questions} answers and {len(self.scores)} scores "
+              f"restored in {(time.perf_counter() - start_time) * 1000:.1f} ms")
 
     def run_interview(self):
         logging.debug("Starting run_interview method")
         try:
-            self.setup_interview()
+            if self.journal is None:
+                self.setup_interview()
+                self.start_journal()
             
-            print("\nGreat! Let's start the interview. Type 'quit' at any time to end the session and evaluate.\n")
-            self.text_to_speech("Great! Let's start the interview. Type 'quit' at any time to end the session and evaluate.")
+            print(f"\n{prompts.START_MESSAGE}\n")
+            self.text_to_speech(prompts.START_MESSAGE)
 
-            question_count = 0
+            question_count = self.answered_questions
             while True:
-                question = self.generate_question()
-                print(f"\nInterviewer: {question}")
-                self.text_to_speech(question)
+                if self.stream_mode:
+                    # Print and speak the question sentence by sentence as it is generated
+                    print("\nInterviewer: ", end="", flush=True)
+                    speaker = StreamingSpeaker(self.synthesize_speech, self.ordered_player())
+                    question = self.generate_question(on_text=lambda text: self._stream_text(text, speaker))
+                    print()
+                else:
+                    question = self.generate_question()
+                if self.answered_at is not None:
+                    # From the candidate finishing an answer until the next question is on screen
+                    self.tracer.record("turn", time.perf_counter() - self.answered_at)
+                    self.answered_at = None
+                if self.prefetcher and not self._next_question_precomputed():
+                    # Any answer to the opening question is on topic
+                    anchor = None if self.question_counter == 1 else question
+                    self.prefetcher.speculate(self.question_counter + 1, self.conversation_context.render(), anchor)
+                if self.stream_mode:
+                    speaker.close()
+                else:
+                    print(f"\nInterviewer: {question}")
+                    # Keep speaking in the background so the candidate can start answering
+                    self.text_to_speech(question, wait=False)
 
                 while True:
                     print("\nHow would you like to provide your answer?")
                     print("1. Text input")
                     print("2. Voice input")
-                    choice = input("Enter your choice (1 or 2): ")
+                    choice = self.input("Enter your choice (1 or 2): ")
 
                     if choice == '1':
                         print("Type your answer. Type 'done' on a new line when finished, or 'quit' to end the interview.")
                         response_lines = []
                         while True:
-                            line = input()
+                            line = self.input()
                             if line.lower() == 'done':
                                 break
                             if line.lower() == 'quit':
@@ -426,13 +612,17 @@ class AIInterviewPrep:
                         response = '\n'.join(response_lines)
                         break
                     elif choice == '2':
-                        print("Please speak your answer. Press Enter to start speaking, and press Enter again when you're finished.")
-                        input("Press Enter to start speaking...")
+                        if self.auto_endpoint:
+                            print("Please speak your answer. Press Enter to start speaking; recording stops when you finish speaking.")
+                        else:
+                            print("Please speak your answer. Press Enter to start speaking, and press Enter again when you're finished.")
+                        self.input("Press Enter to start speaking...")
+                        self.playback.cancel()
                         try:
                             response = self.speech_to_text()
                             if response:
                                 print(f"\nRecognized speech:\n{response}")
-                                confirm = input("Is this correct? (yes/no): ").lower()
+                                confirm = self.input("Is this correct? (yes/no): ").lower()
                                 if confirm == 'yes':
                                     break
                                 elif confirm == 'quit':
@@ -449,21 +639,33 @@ class AIInterviewPrep:
 
                 print("\nYour answer:")
                 print(response)
+                self.answered_at = time.perf_counter()
 
                 logging.debug("Evaluating response")
+                released = []
+
+                def release(text):
+                    released.append(text)
+                    print(f"\nInterviewer: {text}")
+                    self.text_to_speech(text, wait=False)
+
                 try:
-                    interviewer_response, hidden_evaluation, response_quality = self.evaluate_response(response)
+                    interviewer_response, hidden_evaluation, response_quality = self.evaluate_response(response, on_response=release)
                 except Exception as e:
                     logging.exception(f"Error in evaluating response: {e}")
                     print("An error occurred while evaluating your response. Let's try this question again.")
                     continue
 
+                if self.prefetcher:
+                    self.prefetcher.resolve(response, response_quality, f"{self.candidate_cv}\n{self.conversation_context.render()}")
+
                 if not response_quality:
                     print("I'm sorry, but your response doesn't seem to address the question fully. Could you please provide a more detailed and relevant answer?")
                     continue
 
-                print(f"\nInterviewer: {interviewer_response}")
-                self.text_to_speech(interviewer_response)
+                if not released:
+                    print(f"\nInterviewer: {interviewer_response}")
+                    self.text_to_speech(interviewer_response, wait=False)
 
                 if os.environ.get('DEBUG_MODE') == 'TRUE':
                     print(f"\nHidden Evaluation:\n{hidden_evaluation}\n")
@@ -472,7 +674,7 @@ class AIInterviewPrep:
                 
                 if question_count >= 10:
                     print("\nWe've reached the end of the planned questions. Would you like to continue or end the interview?")
-                    choice = input("Enter 'continue' to keep going or 'quit' to end and evaluate: ").lower()
+                    choice = self.input("Enter 'continue' to keep going or 'quit' to end and evaluate: ").lower()
                     if choice == 'quit':
                         return self.evaluate_interview()
 
@@ -480,7 +682,10 @@ class AIInterviewPrep:
             logging.exception(f"An unexpected error occurred during the interview: {e}")
             print(f"An unexpected error occurred: {e}")
             print("We apologize for the inconvenience. The application will now exit.")
-            self.text_to_speech("An unexpected error occurred. The application will now exit.")
+            if self.journal is not None:
+                self.journal.close()
+                print(f"Your progress is saved. Continue with: python main.py --resume {self.tracer.session_id}")
+            self.text_to_speech(prompts.ERROR_MESSAGE)
 
     def evaluate_interview(self):
         logging.debug("Evaluating entire interview")
@@ -488,17 +693,45 @@ class AIInterviewPrep:
             average_score = sum(self.scores) / len(self.scores)
             final_message = f"\nInterview concluded. Your average score is: {average_score:.2f}/10"
         else:
-            final_message = "\nInterview concluded. No scores were recorded."
+            final_message = f"\n{prompts.NO_SCORES_MESSAGE}"
 
         print(final_message)
         self.text_to_speech(final_message)
-        print("Thank you for using the Enhanced AI Interview Prep App!")
-        self.text_to_speech("Thank you for using the Enhanced AI Interview Prep App!")
+        if self.journal is not None:
+            self.journal.append("end", average_score=sum(self.scores) / len(self.scores) if self.scores else None)
+            self.journal.close()
+        if os.environ.get('DEBUG_MODE') == 'TRUE':
+            print(f"Prompt cache: {self.prompt_cache_stats.summary()}")
+            print(f"Tokens: {self.prompt_cache_stats.token_report()}")
+            print(f"Token budget: {self.token_budget.stats()}")
+            if self.prefetcher:
+                print(f"Question prefetch: {self.prefetcher.stats()}")
+            print(f"TTS cache: {self.tts_cache.stats()}")
+            print(f"Transcription: {self.transcriber.stats()}")
+            print(f"Stage latency: {self.tracer.summary()}")
+            print(f"Requests: {self.executor.stats()}")
+            print(f"Evaluations: {self.evaluation_stats.stats()}")
+            print(f"Repeated questions: {self.question_index.stats()}")
+            if self.question_bank is not None:
+                print(f"Question bank: {self.question_bank.stats()}")
+        if self.prefetcher:
+            self.prefetcher.close()
+        print(prompts.GOODBYE_MESSAGE)
+        self.text_to_speech(prompts.GOODBYE_MESSAGE)
         
         # Here you could add more detailed evaluation if desired
         
         return
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="AI interview practice.")
+    parser.add_argument("--resume", metavar="SESSION",
+                        help="continue an interrupted session from its journal (session id or path)")
+    args = parser.parse_args()
+
+    prompts.check_openai_version()
     interview_app = AIInterviewPrep()
+    if args.resume:
+        interview_app.resume_session(args.resume)
+    start_metrics_server_from_env()
     interview_app.run_interview()
@@ -0,0 +1,100 @@
+import os
+import json
+import time
+import queue
+import base64
+import logging
+import threading
+from collections import deque
+
+MIN_FRAME_MS = 50
+MAX_FRAME_MS = 200
+
+
+class MicUplink:
+    """Sends microphone audio over the realtime websocket in coalesced frames.
+
+    The audio callback puts (time.perf_counter(), chunk) on the queue. The sender blocks on the queue and joins
+    chunks into frames of MIC_FRAME_MS (default 100, kept within 50-200) milliseconds of audio. Each frame is one
+    input_audio_buffer.append. A partial frame is sent once its oldest chunk has waited a full frame, so coalescing
+    adds at most one frame of latency. A backlog drains in full frames as fast as the socket allows.
+    """
+
+    def __init__(self, mic_queue, rate, frame_ms=None, sample_width=2, lag_samples=2048):
+        if frame_ms is None:
+            frame_ms = int(os.environ.get('MIC_FRAME_MS', '100'))
+        self.mic_queue = mic_queue
+        self.frame_ms = min(max(frame_ms, MIN_FRAME_MS), MAX_FRAME_MS)
+        self.frame_seconds = self.frame_ms / 1000
+        self.frame_bytes = rate * sample_width * self.frame_ms // 1000
+        self.frames = 0
+        self.chunks = 0
+        self.bytes = 0
+        self.max_queue_depth = 0
+        self.queue_depth_total = 0
+        self.lags = deque(maxlen=lag_samples)
+        self._lock = threading.Lock()
+
+    def _next_frame(self, stop_event):
+        """(enqueue time of the oldest chunk, chunks) for the next frame, or None once stop_event is set."""
+        while True:
+            try:
+                first_at, chunk = self.mic_queue.get(timeout=0.1)
+                break
+            except queue.Empty:
+                if stop_event.is_set():
+                    return None
+        chunks = [chunk]
+        size = len(chunk)
+        deadline = first_at + self.frame_seconds
+        while size < self.frame_bytes and not stop_event.is_set():
+            remaining = deadline - time.perf_counter()
+            try:
+                _, chunk = self.mic_queue.get(timeout=remaining) if remaining > 0 else self.mic_queue.get_nowait()
+            except queue.Empty:
+                break
+            chunks.append(chunk)
+            size += len(chunk)
+        return first_at, chunks
+
+    def run(self, ws, stop_event, on_audio=None):
+        """Send frames until stop_event is set; on_audio receives each frame's PCM after it is sent."""
+        while True:
+            frame = self._next_frame(stop_event)
+            if frame is None:
+                return
+            first_at, chunks = frame
+            audio = b"".join(chunks)
+            depth = self.mic_queue.qsize()
+            ws.send(json.dumps({
+                'type': 'input_audio_buffer.append',
+                'audio': base64.b64encode(audio).decode('utf-8')
+            }))
+            lag = time.perf_counter() - first_at
+            with self._lock:
+                self.frames += 1
+                self.chunks += len(chunks)
+                self.bytes += len(audio)
+                self.queue_depth_total += depth
+                self.max_queue_depth = max(self.max_queue_depth, depth)
+                self.lags.append(lag)
+            logging.debug(f'🎤 Sent {len(audio)} bytes in {len(chunks)} chunks, lag {lag * 1000:.0f} ms, queue {depth}')
+            if on_audio is not None:
+                on_audio(audio)
+
+    def stats(self):
+        """Frames sent, chunks per frame, queue depth at each send and lag from the oldest chunk's capture to its send."""
+        with self._lock:
+            lags = sorted(self.lags)
+            frames = self.frames
+            return {
+                "frame_ms": self.frame_ms,
+                "frames": frames,
+                "chunks_per_frame": self.chunks / frames if frames else 0.0,
+                "bytes": self.bytes,
+                "queue_depth_mean": self.queue_depth_total / frames if frames else 0.0,
+                "queue_depth_max": self.max_queue_depth,
+                "send_lag_p50": lags[len(lags) // 2] if lags else None,
+                "send_lag_p99": lags[min(int(len(lags) * 0.99), len(lags) - 1)] if lags else None,
+                "send_lag_max": lags[-1] if lags else None
+            }
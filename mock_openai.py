@@ -0,0 +1,312 @@
+import io
+import json
+import math
+import re
+import time
+import wave
+import base64
+import random
+import asyncio
+import hashlib
+import logging
+import argparse
+
+import numpy as np
+from aiohttp import web, WSMsgType
+
+
+class LatencyModel:
+    """Samples delays from a spec such as 'fixed:0.2', 'uniform:0.1:0.5', 'normal:0.3:0.05' or 'lognormal:0.3:0.4'.
+
+    For lognormal the parameters are the median in seconds and the shape (sigma).
+    """
+
+    def __init__(self, spec, rng):
+        parts = spec.split(":")
+        self.kind = parts[0]
+        self.params = [float(value) for value in parts[1:]]
+        self.rng = rng
+        expected = {"fixed": 1, "uniform": 2, "normal": 2, "lognormal": 2}
+        if expected.get(self.kind) != len(self.params):
+            raise ValueError(f"Invalid latency spec: {spec}")
+
+    def sample(self):
+        if self.kind == "fixed":
+            delay = self.params[0]
+        elif self.kind == "uniform":
+            delay = self.rng.uniform(*self.params)
+        elif self.kind == "normal":
+            delay = self.rng.gauss(*self.params)
+        else:
+            delay = self.rng.lognormvariate(math.log(self.params[0]), self.params[1])
+        return max(delay, 0.0)
+
+
+def estimate_tokens(text):
+    return (len(text) + 3) // 4
+
+
+QUESTIONS = (
+    "Can you tell me about a transaction you worked on and the role you played in it?",
+    "Walk me through how you would value a fast-growing software company.",
+    "How would you explain the difference between enterprise value and equity value to a client?",
+    "Describe a time you had to deliver a model under a tight deadline. What did you prioritize?",
+    "What makes a company a good candidate for a leveraged buyout?",
+    "Tell me about a time you disagreed with a senior colleague and how you handled it.",
+    "How do the three financial statements link together?",
+    "Which recent deal in the sector caught your attention, and why?",
+    "How would you pitch a dividend recapitalization to a sponsor?",
+    "What drives working capital needs in a retail business?",
+    "Where do you see the biggest risks in today's credit markets?",
+    "How do you make sure your models are free of errors before they go to a client?"
+)
+
+
+def next_question(prompt):
+    """Cycle through QUESTIONS by question number, skipping any the prompt lists as already asked."""
+    match = re.search(r"question number (\d+)", prompt)
+    start = int(match.group(1)) if match else 0
+    rejected = prompt.split("already been asked", 1)[1] if "already been asked" in prompt else ""
+    for offset in range(len(QUESTIONS)):
+        question = QUESTIONS[(start + offset) % len(QUESTIONS)]
+        if question not in rejected:
+            return question
+    return QUESTIONS[start % len(QUESTIONS)]
+
+
+def chat_reply(messages):
+    """Canned but well-formed content for each prompt the app sends."""
+    system = messages[0]["content"] if messages else ""
+    last = messages[-1]["content"] if messages else ""
+    if "running summaries" in system:
+        return "The candidate described their background and recent deal experience; valuation topics were covered."
+    if "question banks" in system:
+        match = re.search(r"Write (\d+) distinct", last)
+        count = int(match.group(1)) if match else 5
+        start = int(hashlib.sha256(last.encode("utf-8")).hexdigest(), 16) % len(QUESTIONS)
+        return json.dumps({"questions": [QUESTIONS[(start + offset) % len(QUESTIONS)] for offset in range(count)]})
+    if "CV digests" in system:
+        return "Analyst with M&A internship experience; built DCF and comps; strong Excel and PowerPoint."
+    if "TASK evaluate" in last:
+        reply = {
+            "response_quality": True,
+            "interviewer_response": "Thanks, that's a clear answer. Let's build on it.",
+            "score": 7,
+            "strengths": "Structured and specific.",
+            "improvement_areas": "Quantify the impact."
+        }
+        if "TASK evaluate_and_ask" in last:
+            reply["next_question"] = next_question(last)
+        return json.dumps(reply)
+    return next_question(last)
+
+
+class MockOpenAI:
+    """Local stand-in for the chat completions, speech and realtime endpoints, with injectable latency and errors."""
+
+    def __init__(self, latency="lognormal:0.3:0.3", first_token_latency="lognormal:0.25:0.3",
+                 tokens_per_second=80.0, tts_latency="lognormal:0.4:0.3", error_rate=0.0,
+                 audio_delta_ms=50, realtime_latency="lognormal:0.5:0.3", vad_silence_ms=500,
+                 vad_energy=300.0, malformed_rate=0.0, seed=None):
+        self.rng = random.Random(seed)
+        self.latency = LatencyModel(latency, self.rng)
+        self.first_token_latency = LatencyModel(first_token_latency, self.rng)
+        self.tts_latency = LatencyModel(tts_latency, self.rng)
+        self.realtime_latency = LatencyModel(realtime_latency, self.rng)
+        self.tokens_per_second = tokens_per_second
+        self.error_rate = error_rate
+        self.malformed_rate = malformed_rate
+        self.audio_delta_ms = audio_delta_ms
+        self.vad_silence_ms = vad_silence_ms
+        self.vad_energy = vad_energy
+        self.seen_prefixes = set()
+        self.requests = {"chat": 0, "speech": 0, "realtime": 0, "errors": 0}
+
+    def build_app(self):
+        app = web.Application()
+        app.add_routes([
+            web.post("/v1/chat/completions", self.chat_completions),
+            web.post("/v1/audio/speech", self.speech),
+            web.get("/v1/realtime", self.realtime),
+            web.get("/stats", self.stats)
+        ])
+        return app
+
+    def _maybe_fail(self):
+        if self.error_rate and self.rng.random() < self.error_rate:
+            self.requests["errors"] += 1
+            status = self.rng.choice([429, 500, 503])
+            body = json.dumps({"error": {"message": "Injected failure", "type": "mock_error", "code": status}})
+            return web.Response(status=status, text=body, content_type="application/json")
+        return None
+
+    def _cached_tokens(self, messages):
+        """Simulate provider prefix caching: a repeated system + first user message prefix is cached in 128-token blocks."""
+        prefix = "".join(message.get("content", "") for message in messages[:2])
+        key = hashlib.sha256(prefix.encode("utf-8")).hexdigest()
+        cached = 0
+        if key in self.seen_prefixes and estimate_tokens(prefix) >= 1024:
+            cached = estimate_tokens(prefix) // 128 * 128
+        self.seen_prefixes.add(key)
+        return cached
+
+    async def chat_completions(self, request):
+        self.requests["chat"] += 1
+        failure = self._maybe_fail()
+        if failure is not None:
+            return failure
+        body = await request.json()
+        messages = body.get("messages", [])
+        content = chat_reply(messages)
+        if content.startswith("{") and self.malformed_rate and self.rng.random() < self.malformed_rate:
+            # Cut the evaluation JSON off mid-object, as a truncated or derailed reply would be
+            content = content[:len(content) // 2]
+        prompt_tokens = sum(estimate_tokens(message.get("content", "")) for message in messages)
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": estimate_tokens(content),
+            "total_tokens": prompt_tokens + estimate_tokens(content),
+            "prompt_tokens_details": {"cached_tokens": self._cached_tokens(messages)}
+        }
+        completion_id = f"chatcmpl-mock{self.requests['chat']}"
+        model = body.get("model", "gpt-4o-mini")
+
+        if not body.get("stream"):
+            await asyncio.sleep(self.latency.sample() + usage["completion_tokens"] / self.tokens_per_second)
+            return web.json_response({
+                "id": completion_id, "object": "chat.completion", "created": int(time.time()), "model": model,
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": content}}],
+                "usage": usage
+            })
+
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream", "Cache-Control": "no-cache"})
+        await response.prepare(request)
+        await asyncio.sleep(self.first_token_latency.sample())
+        pieces = [word + " " for word in content.split(" ")]
+        for index, piece in enumerate(pieces):
+            chunk = {
+                "id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()), "model": model,
+                "choices": [{"index": 0, "delta": {"content": piece} if index else {"role": "assistant", "content": piece},
+                             "finish_reason": None}]
+            }
+            await response.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            await asyncio.sleep(estimate_tokens(piece) / self.tokens_per_second)
+        final = {"id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()), "model": model,
+                 "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]}
+        await response.write(f"data: {json.dumps(final)}\n\n".encode("utf-8"))
+        if (body.get("stream_options") or {}).get("include_usage"):
+            usage_chunk = {"id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()),
+                           "model": model, "choices": [], "usage": usage}
+            await response.write(f"data: {json.dumps(usage_chunk)}\n\n".encode("utf-8"))
+        await response.write(b"data: [DONE]\n\n")
+        await response.write_eof()
+        return response
+
+    async def speech(self, request):
+        """Returns silent WAV audio lasting roughly as long as the text would take to say (about 150 words/min)."""
+        self.requests["speech"] += 1
+        failure = self._maybe_fail()
+        if failure is not None:
+            return failure
+        body = await request.json()
+        seconds = max(len(body.get("input", "").split()) / 2.5, 0.5)
+        await asyncio.sleep(self.tts_latency.sample())
+        rate = 24000
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(rate)
+            wav.writeframes(b"\x00\x00" * int(rate * seconds))
+        return web.Response(body=buffer.getvalue(), content_type="audio/wav")
+
+    async def realtime(self, request):
+        """Minimal realtime protocol: energy-based server VAD on appended audio, then paced audio deltas."""
+        self.requests["realtime"] += 1
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        state = {"speaking": False, "last_voice": 0.0, "responding": None}
+
+        async def respond():
+            await asyncio.sleep(self.realtime_latency.sample())
+            await ws.send_json({"type": "response.created"})
+            rate = 24000
+            samples_per_delta = rate * self.audio_delta_ms // 1000
+            tone = (1000 * np.sin(2 * np.pi * 220 * np.arange(samples_per_delta) / rate)).astype(np.int16).tobytes()
+            for _ in range(int(2000 / self.audio_delta_ms)):
+                await ws.send_json({"type": "response.audio.delta", "delta": base64.b64encode(tone).decode("ascii")})
+                await asyncio.sleep(self.audio_delta_ms / 1000)
+            await ws.send_json({"type": "response.audio.done"})
+            await ws.send_json({"type": "response.done"})
+
+        def start_response():
+            if state["responding"] is None or state["responding"].done():
+                state["responding"] = asyncio.create_task(respond())
+
+        async def watch_silence():
+            while not ws.closed:
+                await asyncio.sleep(self.audio_delta_ms / 1000)
+                if state["speaking"] and time.perf_counter() - state["last_voice"] > self.vad_silence_ms / 1000:
+                    state["speaking"] = False
+                    await ws.send_json({"type": "input_audio_buffer.speech_stopped"})
+                    await ws.send_json({"type": "input_audio_buffer.committed"})
+                    start_response()
+
+        watcher = asyncio.create_task(watch_silence())
+        await ws.send_json({"type": "session.created"})
+        try:
+            async for message in ws:
+                if message.type != WSMsgType.TEXT:
+                    continue
+                event = json.loads(message.data)
+                if event.get("type") == "input_audio_buffer.append":
+                    pcm = np.frombuffer(base64.b64decode(event.get("audio", "")), dtype=np.int16).astype(np.float32)
+                    if len(pcm) and np.sqrt(np.mean(pcm * pcm)) > self.vad_energy:
+                        if not state["speaking"]:
+                            state["speaking"] = True
+                            await ws.send_json({"type": "input_audio_buffer.speech_started"})
+                        state["last_voice"] = time.perf_counter()
+                elif event.get("type") == "response.create":
+                    if self.error_rate and self.rng.random() < self.error_rate:
+                        self.requests["errors"] += 1
+                        await ws.send_json({"type": "error", "error": {"message": "Injected failure"}})
+                        continue
+                    start_response()
+        finally:
+            watcher.cancel()
+            if state["responding"] is not None:
+                state["responding"].cancel()
+        return ws
+
+    async def stats(self, request):
+        return web.json_response(self.requests)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local mock of the OpenAI chat, speech and realtime endpoints.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", default="lognormal:0.3:0.3", help="chat latency before the full reply")
+    parser.add_argument("--first-token-latency", default="lognormal:0.25:0.3", help="streamed chat time to first token")
+    parser.add_argument("--tokens-per-second", type=float, default=80.0)
+    parser.add_argument("--tts-latency", default="lognormal:0.4:0.3")
+    parser.add_argument("--realtime-latency", default="lognormal:0.5:0.3", help="end of speech to first audio delta")
+    parser.add_argument("--audio-delta-ms", type=int, default=50)
+    parser.add_argument("--vad-silence-ms", type=int, default=500)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--malformed-rate", type=float, default=0.0, help="share of evaluation replies cut short")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    mock = MockOpenAI(args.latency, args.first_token_latency, args.tokens_per_second, args.tts_latency,
+                      args.error_rate, args.audio_delta_ms, args.realtime_latency, args.vad_silence_ms,
+                      malformed_rate=args.malformed_rate, seed=args.seed)
+    print(f"Point clients at it with OPENAI_BASE_URL=http://{args.host}:{args.port}/v1 "
+          f"and OPENAI_REALTIME_URL=ws://{args.host}:{args.port}/v1/realtime")
+    web.run_app(mock.build_app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+import re
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from text_terms import tokenize
+
+SALIENT_PATTERN = re.compile(r"\b(?:[A-Z][A-Za-z&-]+|[A-Z]{2,}|\$?\d+(?:\.\d+)?(?:%|[mMbBkK]n?)?)\b")
+
+
+def direction_changed(question, answer, known_text, min_overlap=0.05, new_topic_terms=3):
+    """Heuristic check for whether an answer steers the interview away from a speculated follow-up.
+
+    The answer changes direction if it barely touches the question's topic, or if it introduces several
+    names or figures (employers, deals, amounts) that appear nowhere in the CV or the conversation so far,
+    which a human interviewer would follow up on. An open-ended question (None, e.g. the opening "tell me about
+    your background") has no topic to stay on, so only the second test applies.
+    """
+    question_words = set(tokenize(question)) if question else set()
+    answer_words = set(tokenize(answer))
+    if not answer_words:
+        return True
+    if question_words and len(question_words & answer_words) / len(question_words) < min_overlap:
+        return True
+
+    known = known_text.lower()
+    novel_terms = {term for term in SALIENT_PATTERN.findall(answer) if term.lower() not in known}
+    return len(novel_terms) >= new_topic_terms
+
+
+class QuestionPrefetcher:
+    """Generates the next question in the background while the candidate is still answering."""
+
+    def __init__(self, generate, min_overlap=0.05, new_topic_terms=3):
+        self.generate = generate
+        self.min_overlap = min_overlap
+        self.new_topic_terms = new_topic_terms
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="question-prefetch")
+        self.future = None
+        self.question_number = None
+        self.anchor_question = ""
+        self.kept = False
+        self.hits = 0
+        self.misses = 0
+
+    def speculate(self, question_number, conversation_context, current_question):
+        """Start generating question_number from the context as it stands before the answer arrives.
+
+        current_question is None when it is open-ended, so its answer is not held to its topic.
+        """
+        self._discard()
+        self.question_number = question_number
+        self.anchor_question = current_question
+        self.kept = False
+        self.future = self.executor.submit(self.generate, question_number, conversation_context)
+
+    def resolve(self, answer, response_quality, known_text):
+        """Keep the speculative question if the answer stayed on course, otherwise cancel it."""
+        if self.future is None:
+            return
+        if response_quality and not direction_changed(
+                self.anchor_question, answer, known_text, self.min_overlap, self.new_topic_terms):
+            self.kept = True
+            return
+        logging.debug("Answer changed the interview direction; discarding prefetched question")
+        self._discard()
+        self.misses += 1
+
+    def take(self, question_number):
+        """Return the prefetched question for question_number, or None if it must be generated live."""
+        future, kept = self.future, self.kept
+        if future is None or not kept or question_number != self.question_number:
+            if future is not None:
+                self._discard()
+                self.misses += 1
+            return None
+        self.future = None
+        try:
+            question = future.result()
+        except Exception as e:
+            logging.exception(f"Prefetched question failed: {e}")
+            self.misses += 1
+            return None
+        if not question:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return question
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_ratio": self.hits / total if total else 0.0}
+
+    def close(self):
+        self._discard()
+        self.executor.shutdown(wait=False)
+
+    def _discard(self):
+        if self.future is not None:
+            self.future.cancel()
+        self.future = None
+        self.kept = False
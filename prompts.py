@@ -0,0 +1,557 @@
+import os
+import re
+import json
+import logging
+
+from context_manager import ConversationContext, estimate_tokens
+from cv_index import snippet_count
+
+# Fixed utterances spoken in every session; listed in FIXED_PHRASES so their audio can be pre-cached.
+WELCOME_MESSAGE = "Welcome to the Enhanced AI Interview Prep App!"
+START_MESSAGE = "Great! Let's start the interview. Type 'quit' at any time to end the session and evaluate."
+OPENING_QUESTION = "Tell me about your background and why you're interested in this position."
+FALLBACK_QUESTION = "Could you tell me more about your experience in this field?"
+FALLBACK_RESPONSE = "Thank you for your response. Let's move on to the next question."
+ERROR_MESSAGE = "An unexpected error occurred. The application will now exit."
+NO_SCORES_MESSAGE = "Interview concluded. No scores were recorded."
+GOODBYE_MESSAGE = "Thank you for using the Enhanced AI Interview Prep App!"
+
+FIXED_PHRASES = (
+    WELCOME_MESSAGE, START_MESSAGE, OPENING_QUESTION, FALLBACK_QUESTION,
+    FALLBACK_RESPONSE, ERROR_MESSAGE, NO_SCORES_MESSAGE, GOODBYE_MESSAGE
+)
+
+# Interview taxonomy offered during setup: coverage is asked for BLUE_INDUSTRIES, and a vertical for ORANGE_OPTIONS
+INDUSTRIES = (
+    "Investment Banking", "Private Equity", "Real Estate Finance", "Venture Capital",
+    "Growth Equity", "Asset Management", "Sales & Trading", "Hedge Fund",
+    "Equity Research", "Debt Capital Markets", "Equity Capital Markets", "Consulting",
+    "Accounting", "Corporate Finance", "Wealth Management", "Commercial Banking",
+    "Insurance", "Structured Finance"
+)
+BLUE_INDUSTRIES = (
+    "Investment Banking", "Private Equity", "Venture Capital", "Growth Equity",
+    "Equity Research", "Debt Capital Markets", "Equity Capital Markets"
+)
+INDUSTRY_COVERAGE_OPTIONS = (
+    "None", "Healthcare", "Real Estate, Gaming, & Lodging (REGAL)",
+    "Technology, Media & Telecom (TMT)", "Financial Sponsors Group (FSG)",
+    "Financial Institutions Group (FIG)", "Technology", "Industrials",
+    "Public Finance", "Restructuring (Rx)", "Oil & Gas", "Consumer Retail",
+    "Infrastructure", "Renewable Energy", "Power & Utilities",
+    "Business Services", "Food & Beverage"
+)
+ORANGE_OPTIONS = (
+    "Healthcare", "Real Estate, Gaming, & Lodging (REGAL)",
+    "Financial Sponsors Group (FSG)", "Technology", "Industrials",
+    "Oil & Gas", "Consumer Retail", "Food & Beverage"
+)
+VERTICALS = ("Depositories", "Insurance", "Specialty Finance", "Asset Management", "FinTech")
+
+
+def build_system_message(session):
+    """System message shared by every chat call in a session; identical from turn to turn."""
+    industry_coverage = session.industry_coverage if session.industry_coverage else "Not specified"
+    vertical = session.vertical if session.vertical else "Not specified"
+    return f"""
+        You are an AI-powered interview assistant and an experienced interviewer conducting an interview
+        for the position of {session.job_position} in the {session.industry} industry.
+        Industry Coverage: {industry_coverage}
+        Vertical: {vertical}
+
+        You perform the tasks below; the task to perform is named in the final message of each request.
+
+        TASK next_question: generate the next interview question. The question should:
+        1. Be natural and conversational, as if coming from a human interviewer
+        2. Follow up on information provided in previous responses and the candidate's CV
+        3. Be highly relevant and specific to the chosen industry: {session.industry}
+        4. If applicable, focus on the selected Industry Coverage: {industry_coverage}
+        5. If a Vertical was selected, include aspects specific to: {vertical}
+        6. Avoid repeating questions that have already been asked
+        7. Gradually increase in difficulty and specificity as the interview progresses
+
+        Special instructions:
+        - For questions 2-4, focus on personal or behavioral questions related to the industry and role
+        - After question 4, ask more technical and role-specific questions directly related to {session.industry}
+        - If Industry Coverage was selected, ensure questions reflect knowledge specific to {industry_coverage}
+        - If a Vertical was chosen, include questions that test expertise in {vertical}
+        - Always maintain a friendly and engaging tone throughout the interview
+
+        Ensure the question flows naturally from the previous conversation and delves deeper into the candidate's
+        experiences and qualifications, while being highly relevant to the specific industry, coverage, and vertical selected.
+        Reply with the question only.
+
+        TASK evaluate_response: evaluate the candidate's response to the last interview question.
+        Reply with a single JSON object with these fields, in this order:
+        - "response_quality": true if the response was substantive and relevant, otherwise false
+        - "interviewer_response": a natural follow-up comment that sounds like a human interviewer's reaction and may
+          acknowledge the response, add a brief comment or insight related to it, and transition smoothly to the next topic
+        - "score": the hidden evaluation score, a number from 0 to 10
+        - "strengths": brief notes on strengths (hidden, for internal use)
+        - "improvement_areas": brief notes on areas for improvement (hidden, for internal use)
+
+        TASK evaluate_and_ask: perform evaluate_response, then perform next_question for the given question number,
+        taking the candidate's latest response into account. Reply with the evaluate_response JSON object plus a final
+        "next_question" field holding the next interview question.
+        """
+
+
+def session_cv(session):
+    """CV text for the profile message: the index outline (headed by the digest, if any) for indexed CVs, else the
+    digest or the full text."""
+    cv_index = getattr(session, "cv_index", None)
+    if cv_index is not None:
+        return cv_index.outline(session.cv_digest or None)
+    return session.cv_digest if session.cv_digest else session.candidate_cv
+
+
+def build_profile_message(session, cv=None):
+    """Fixed job description and CV block that follows the system message in every request."""
+    if cv is None:
+        cv = session_cv(session)
+    return f"""
+        Job Description: {session.job_description}
+        Candidate's CV: {cv}
+        """
+
+
+def build_messages(session, suffix, cv=None):
+    """Stable, cacheable prefix (system + profile) followed by the small per-turn suffix."""
+    return [
+        {"role": "system", "content": build_system_message(session)},
+        {"role": "user", "content": build_profile_message(session, cv)},
+        {"role": "user", "content": suffix}
+    ]
+
+
+def recent_exchange(session, entries=3):
+    """The last few questions and answers, which select the CV excerpts for the next question."""
+    spoken = [entry["content"] for entry in session.interview_history if entry["role"] != "evaluator"]
+    return " ".join(spoken[-entries:])
+
+
+class TokenBudget:
+    """Keeps every chat prompt under max_prompt_tokens: history is compacted first, then the CV is truncated.
+
+    A CV truncation is sticky, so later prompts keep the same (cacheable) profile message. Indexed CVs are never
+    truncated; instead the top cv_snippets excerpts relevant to the request's query, up to max_excerpt_tokens,
+    are appended to the per-turn suffix.
+    """
+
+    def __init__(self, max_prompt_tokens=None, min_history_tokens=150, min_cv_tokens=300, cv_snippets=None,
+                 max_excerpt_tokens=600):
+        if max_prompt_tokens is None:
+            max_prompt_tokens = int(os.environ.get('PROMPT_TOKEN_BUDGET', '4000'))
+        self.max_prompt_tokens = max_prompt_tokens
+        self.min_history_tokens = min_history_tokens
+        self.min_cv_tokens = min_cv_tokens
+        self.cv_snippets = cv_snippets if cv_snippets is not None else snippet_count()
+        self.max_excerpt_tokens = max_excerpt_tokens
+        self.cv_limit = None
+        self.compactions = 0
+        self.cv_truncations = 0
+        self.over_budget = 0
+
+    def build_messages(self, session, build_suffix, context, query=None):
+        """Return (messages, sections) for build_suffix(history) within the budget.
+
+        context is a ConversationContext or an already rendered history string; sections holds the
+        estimated prompt tokens spent on instructions, job_description, cv and history. query selects the CV
+        excerpts for indexed CVs and defaults to the rendered history.
+        """
+        system = build_system_message(session)
+        cv = session_cv(session)
+        cv_index = getattr(session, "cv_index", None)
+        history = self._render(context, None)
+        excerpts = ""
+        if cv_index is not None:
+            excerpts = cv_index.render(query if query is not None else history, self.cv_snippets, self.max_excerpt_tokens)
+            suffix_without_excerpts = build_suffix
+            build_suffix = lambda history: suffix_without_excerpts(history) + f"""
+        Relevant CV excerpts:
+{excerpts}
+        """
+        elif self.cv_limit is not None:
+            cv = self._truncate_cv(cv, self.cv_limit)
+        suffix = build_suffix(history)
+        sections = self._sections(system, session.job_description, cv, history, suffix, excerpts)
+
+        over = sum(sections.values()) - self.max_prompt_tokens
+        if over > 0 and sections["history"] > self.min_history_tokens:
+            self.compactions += 1
+            # Rendering adds headings, so a second pass may be needed to land under the budget
+            target = sections["history"]
+            for _ in range(3):
+                if over <= 0 or target <= self.min_history_tokens:
+                    break
+                target = max(target - over, self.min_history_tokens)
+                history = self._render(context, target)
+                suffix = build_suffix(history)
+                sections = self._sections(system, session.job_description, cv, history, suffix, excerpts)
+                over = sum(sections.values()) - self.max_prompt_tokens
+        if over > 0 and cv_index is None and sections["cv"] > self.min_cv_tokens:
+            # Round down to whole blocks so small fluctuations don't change the cached prefix every turn
+            self.cv_limit = max((sections["cv"] - over) // 256 * 256, self.min_cv_tokens)
+            cv = self._truncate_cv(cv, self.cv_limit)
+            sections = self._sections(system, session.job_description, cv, history, suffix, excerpts)
+            over = sum(sections.values()) - self.max_prompt_tokens
+            self.cv_truncations += 1
+            logging.info(f"CV truncated to {self.cv_limit} tokens to fit the prompt token budget")
+        if over > 0:
+            self.over_budget += 1
+            logging.warning(f"Prompt exceeds the token budget by {over} tokens after compaction")
+
+        return build_messages(session, suffix, cv), sections
+
+    def stats(self):
+        return {
+            "max_prompt_tokens": self.max_prompt_tokens,
+            "history_compactions": self.compactions,
+            "cv_truncations": self.cv_truncations,
+            "cv_limit": self.cv_limit,
+            "over_budget": self.over_budget
+        }
+
+    @staticmethod
+    def _render(context, token_budget):
+        if isinstance(context, str):
+            return context if token_budget is None else ConversationContext._truncate(context, token_budget)
+        return context.render(token_budget)
+
+    @staticmethod
+    def _sections(system, job_description, cv, history, suffix, excerpts=""):
+        return {
+            "instructions": (estimate_tokens(system) + estimate_tokens(suffix) - estimate_tokens(history)
+                             - estimate_tokens(excerpts)),
+            "job_description": estimate_tokens(job_description),
+            "cv": estimate_tokens(cv) + estimate_tokens(excerpts),
+            "history": estimate_tokens(history)
+        }
+
+    @staticmethod
+    def _truncate_cv(cv, max_tokens):
+        """Keep the start of the CV, where the most recent roles are, cut at a word boundary."""
+        max_chars = max_tokens * 4
+        if len(cv) <= max_chars:
+            return cv
+        return cv[:max_chars].rsplit(None, 1)[0] + " [...]"
+
+
+def build_question_suffix(question_number, conversation_context, avoid=()):
+    suffix = f"""
+        TASK next_question
+        Previous conversation context: {conversation_context}
+        This is question number {question_number} in the interview.
+        """
+    if avoid:
+        rejected = "\n".join(f"        - {question}" for question in avoid)
+        suffix += f"""These questions have already been asked; ask about something different:
+{rejected}
+        """
+    return suffix
+
+
+def build_evaluation_suffix(last_question, response, conversation_context):
+    return f"""
+        TASK evaluate_response
+        Previous conversation context: {conversation_context}
+        Last Question: {last_question}
+        Candidate Response: {response}
+        """
+
+
+def build_turn_suffix(last_question, response, conversation_context, next_question_number):
+    return f"""
+        TASK evaluate_and_ask
+        Previous conversation context: {conversation_context}
+        Last Question: {last_question}
+        Candidate Response: {response}
+        The next question will be question number {next_question_number} in the interview.
+        """
+
+
+EVALUATION_FIELDS = ("response_quality", "interviewer_response", "score", "strengths", "improvement_areas")
+
+
+# json_schema response formats and stream_options need at least this openai release
+MIN_OPENAI_VERSION = (1, 40)
+
+
+class EvaluationFormatError(ValueError):
+    """An evaluation reply that is not the JSON object the evaluate tasks ask for."""
+
+
+def check_openai_version(version=None):
+    """Whether the installed openai client supports json_schema response formats and stream_options.
+
+    Logs an error when it does not: an older client rejects every evaluation request, which would otherwise only
+    show up as fallback replies and unscored answers.
+    """
+    if version is None:
+        import openai
+        version = openai.__version__
+    parts = tuple(int(part) for part in re.findall(r"\d+", version)[:2])
+    if parts >= MIN_OPENAI_VERSION:
+        return True
+    logging.error(f"openai {version} does not support json_schema response formats; install openai>="
+                  f"{'.'.join(map(str, MIN_OPENAI_VERSION))} (pip install -r requirements.txt)")
+    return False
+
+
+def evaluation_response_format(with_next_question=False):
+    """Strict JSON schema for evaluation replies; field order matches the order they are streamed and released in."""
+    properties = {
+        "response_quality": {"type": "boolean"},
+        "interviewer_response": {"type": "string"},
+        "score": {"type": "number"},
+        "strengths": {"type": "string"},
+        "improvement_areas": {"type": "string"}
+    }
+    if with_next_question:
+        properties["next_question"] = {"type": "string"}
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": "turn_evaluation" if with_next_question else "evaluation",
+            "strict": True,
+            "schema": {
+                "type": "object",
+                "properties": properties,
+                "required": list(properties),
+                "additionalProperties": False
+            }
+        }
+    }
+
+
+def validate_evaluation(data, with_next_question=False):
+    """Check a decoded evaluation field by field; returns (parsed, errors) and keeps every field that is valid.
+
+    Invalid or missing fields come back as None (score, next_question) or a neutral default, and are listed in errors.
+    """
+    errors = []
+    if not isinstance(data, dict):
+        data, errors = {}, ["not a JSON object"]
+
+    def field(name, valid):
+        value = data.get(name)
+        if valid(value):
+            return value
+        errors.append(f"{name} missing or invalid")
+        return None
+
+    interviewer_response = field("interviewer_response", lambda v: isinstance(v, str) and v.strip())
+    response_quality = field("response_quality", lambda v: isinstance(v, bool))
+    score = field("score", lambda v: isinstance(v, (int, float)) and not isinstance(v, bool) and 0 <= v <= 10)
+    strengths = field("strengths", lambda v: isinstance(v, str))
+    improvement_areas = field("improvement_areas", lambda v: isinstance(v, str))
+    next_question = field("next_question", lambda v: isinstance(v, str) and v.strip()) if with_next_question else None
+
+    hidden_evaluation = (f"Score: {score if score is not None else 'n/a'}\n"
+                         f"Strengths: {strengths or 'n/a'}\n"
+                         f"Improvement Areas: {improvement_areas or 'n/a'}")
+    return {
+        "interviewer_response": interviewer_response.strip() if interviewer_response else FALLBACK_RESPONSE,
+        "hidden_evaluation": hidden_evaluation,
+        # A broken reply is the model's fault, so it never sends the candidate back to re-answer
+        "response_quality": response_quality if response_quality is not None else True,
+        "score": float(score) if score is not None else None,
+        "next_question": next_question.strip() if next_question else None
+    }, errors
+
+
+def parse_evaluation(eval_result, with_next_question=False):
+    """Decode and validate a JSON evaluation reply; raises EvaluationFormatError if it is not JSON at all."""
+    text = eval_result.strip()
+    start, end = text.find("{"), text.rfind("}")
+    if start == -1 or end < start:
+        raise EvaluationFormatError("no JSON object in evaluation reply")
+    try:
+        data = json.loads(text[start:end + 1])
+    except json.JSONDecodeError as e:
+        raise EvaluationFormatError(f"invalid JSON in evaluation reply: {e}")
+    return validate_evaluation(data, with_next_question)
+
+
+def releasable_comment(name, value, fields):
+    """The interviewer's comment to deliver before the evaluation has finished streaming, or None.
+
+    It is released only when response_quality has already streamed in as true; otherwise the engine waits for the
+    whole reply, so an answer judged irrelevant never hears a comment meant for a relevant one.
+    """
+    if (name == "interviewer_response" and isinstance(value, str) and value.strip()
+            and fields.get("response_quality") is True):
+        return value.strip()
+    return None
+
+
+class StreamingEvaluationParser:
+    """Incremental scanner for a streamed JSON evaluation that reports each top-level field as soon as it is complete.
+
+    on_field(name, value) is called in stream order, so the interviewer response can be shown and spoken while the
+    hidden evaluation is still being generated.
+    """
+
+    def __init__(self, on_field=None):
+        self.on_field = on_field
+        self.buffer = ""
+        self.fields = {}
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._expecting = "key"
+        self._key = None
+        self._start = None
+
+    def feed(self, text):
+        self.buffer += text
+        buffer = self.buffer
+        for index in range(self._pos, len(buffer)):
+            char = buffer[index]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        self._string_closed(buffer, index)
+                continue
+            if self._depth == 0:
+                # Skip anything before the object, e.g. a code fence
+                if char == "{":
+                    self._depth = 1
+                    self._expecting = "key"
+                continue
+            if char == '"':
+                self._in_string = True
+                if self._depth == 1:
+                    self._start = index
+            elif char in "{[":
+                if self._depth == 1 and self._expecting == "value":
+                    self._start = index
+                    self._expecting = "nested"
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 1 and self._expecting == "nested":
+                    self._emit(buffer[self._start:index + 1])
+                elif self._depth == 0:
+                    self._end_scalar(buffer, index)
+            elif self._depth == 1:
+                if char == ":":
+                    self._expecting = "value"
+                    self._start = None
+                elif char == ",":
+                    self._end_scalar(buffer, index)
+                    self._expecting = "key"
+                elif not char.isspace() and self._expecting == "value" and self._start is None:
+                    self._start = index
+                    self._expecting = "scalar"
+        self._pos = len(buffer)
+
+    def _string_closed(self, buffer, index):
+        raw = buffer[self._start:index + 1]
+        if self._expecting == "key":
+            self._key = json.loads(raw)
+            self._expecting = "colon"
+        elif self._expecting == "value":
+            self._emit(raw)
+
+    def _end_scalar(self, buffer, index):
+        if self._expecting == "scalar":
+            self._emit(buffer[self._start:index].strip())
+
+    def _emit(self, raw):
+        self._expecting = "done"
+        self._start = None
+        try:
+            value = json.loads(raw)
+        except json.JSONDecodeError:
+            return
+        self.fields[self._key] = value
+        if self.on_field is not None:
+            self.on_field(self._key, value)
+
+    def result(self, with_next_question=False):
+        """Validate the complete reply; raises EvaluationFormatError if it was not JSON at all."""
+        return parse_evaluation(self.buffer, with_next_question)
+
+
+class EvaluationStats:
+    """Counts evaluation replies that parsed cleanly versus malformed ones (which are not scored)."""
+
+    def __init__(self):
+        self.parsed = 0
+        self.malformed = 0
+        self.errors = {}
+
+    def record(self, errors):
+        if not errors:
+            self.parsed += 1
+            return
+        self.malformed += 1
+        for error in errors:
+            self.errors[error] = self.errors.get(error, 0) + 1
+        logging.warning(f"Malformed evaluation reply: {'; '.join(errors)}")
+
+    def stats(self):
+        return {"parsed": self.parsed, "malformed": self.malformed, "errors": dict(self.errors)}
+
+
+class PromptCacheStats:
+    """Per-call record of prompt, completion and cached tokens, the prompt's sections, time to first token and latency."""
+
+    def __init__(self):
+        self.calls = []
+
+    def record(self, stage, response, elapsed, first_token_seconds=None, sections=None):
+        usage = getattr(response, "usage", None)
+        prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached_tokens = getattr(details, "cached_tokens", 0) or 0
+        self.calls.append({
+            "stage": stage,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": getattr(usage, "completion_tokens", 0) or 0,
+            "cached_tokens": cached_tokens,
+            "seconds": elapsed,
+            "first_token_seconds": elapsed if first_token_seconds is None else first_token_seconds,
+            "sections": dict(sections) if sections else {}
+        })
+        logging.debug(f"{stage}: {cached_tokens}/{prompt_tokens} prompt tokens cached, {elapsed:.2f}s, sections {sections}")
+
+    def cached_token_ratio(self):
+        prompt_tokens = sum(call["prompt_tokens"] for call in self.calls)
+        if not prompt_tokens:
+            return 0.0
+        return sum(call["cached_tokens"] for call in self.calls) / prompt_tokens
+
+    def token_report(self):
+        """Session totals, with prompt tokens split across sections in proportion to their estimated size."""
+        report = {
+            "calls": len(self.calls),
+            "prompt_tokens": sum(call["prompt_tokens"] for call in self.calls),
+            "completion_tokens": sum(call["completion_tokens"] for call in self.calls),
+            "cached_tokens": sum(call["cached_tokens"] for call in self.calls),
+            "sections": {}
+        }
+        for call in self.calls:
+            estimated = sum(call["sections"].values())
+            if not estimated:
+                continue
+            # Fall back to the estimate when the API reported no usage (e.g. streamed replies)
+            scale = call["prompt_tokens"] / estimated if call["prompt_tokens"] else 1.0
+            for name, tokens in call["sections"].items():
+                report["sections"][name] = report["sections"].get(name, 0) + round(tokens * scale)
+        return report
+
+    def summary(self):
+        if not self.calls:
+            return "No chat calls recorded."
+        average_seconds = sum(call["seconds"] for call in self.calls) / len(self.calls)
+        average_first_token = sum(call["first_token_seconds"] for call in self.calls) / len(self.calls)
+        return (f"{len(self.calls)} chat calls, cached-token ratio {self.cached_token_ratio():.0%}, "
+                f"average time to first token {average_first_token:.2f}s, average response time {average_seconds:.2f}s")
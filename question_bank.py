@@ -0,0 +1,235 @@
+import os
+import json
+import mmap
+import random
+import struct
+import hashlib
+import logging
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+import prompts
+from question_index import QuestionIndex
+
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".cache", "ai_interview_prep", "question_bank.bin")
+# Opening/behavioral questions the bank can serve; CV-specific follow-ups after these are generated live
+BANK_QUESTION_NUMBERS = range(2, 5)
+
+# File layout: header, then one fixed-size key record per combination sorted by key, then the questions of each
+# combination as length-prefixed UTF-8. Lookups binary-search the key records in the mapped file.
+MAGIC = b"QBANK001"
+HEADER = struct.Struct("<8sII")
+KEY_RECORD = struct.Struct("<QIH2x")
+LENGTH = struct.Struct("<H")
+
+
+def normalize_combination(industry, coverage="", vertical=""):
+    """Setup stores "None" for no coverage; the bank treats it like an empty choice."""
+    return industry, coverage if coverage and coverage != "None" else "", vertical or ""
+
+
+def combination_key(industry, coverage="", vertical=""):
+    text = "\x1f".join(normalize_combination(industry, coverage, vertical))
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def taxonomy_combinations():
+    """Every (industry, coverage, vertical) the setup menus can produce."""
+    for industry in prompts.INDUSTRIES:
+        if industry not in prompts.BLUE_INDUSTRIES:
+            yield normalize_combination(industry)
+            continue
+        for coverage in prompts.INDUSTRY_COVERAGE_OPTIONS:
+            if coverage in prompts.ORANGE_OPTIONS:
+                for vertical in prompts.VERTICALS:
+                    yield normalize_combination(industry, coverage, vertical)
+            else:
+                yield normalize_combination(industry, coverage)
+
+
+def write_bank(path, entries):
+    """Write {(industry, coverage, vertical): [questions]} to path, replacing any existing bank atomically."""
+    records = sorted((combination_key(*combination), questions) for combination, questions in entries.items() if questions)
+    offset = HEADER.size + KEY_RECORD.size * len(records)
+    keys, bodies = [], []
+    for key, questions in records:
+        encoded = [question.encode("utf-8")[:0xFFFF] for question in questions[:0xFFFF]]
+        keys.append(KEY_RECORD.pack(key, offset, len(encoded)))
+        body = b"".join(LENGTH.pack(len(data)) + data for data in encoded)
+        bodies.append(body)
+        offset += len(body)
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, len(records), 0))
+        f.writelines(keys)
+        f.writelines(bodies)
+    os.replace(tmp_path, path)
+
+
+class QuestionBank:
+    """Read-only, memory-mapped question bank; every session in a process can share one instance."""
+
+    def __init__(self, path):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count, _ = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            self._map.close()
+            raise ValueError(f"{path} is not a question bank")
+
+    def questions(self, industry, coverage="", vertical=""):
+        key = combination_key(industry, coverage, vertical)
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            record_key, offset, count = KEY_RECORD.unpack_from(self._map, HEADER.size + middle * KEY_RECORD.size)
+            if record_key < key:
+                low = middle + 1
+            elif record_key > key:
+                high = middle
+            else:
+                questions = []
+                for _ in range(count):
+                    (length,) = LENGTH.unpack_from(self._map, offset)
+                    offset += LENGTH.size
+                    questions.append(self._map[offset:offset + length].decode("utf-8"))
+                    offset += length
+                return questions
+        return []
+
+    def pick(self, industry, coverage, vertical, question_index):
+        """A random banked question for the combination that question_index has not seen, or None."""
+        candidates = [question for question in self.questions(industry, coverage, vertical)
+                      if question_index.closest(question)[0] < question_index.threshold]
+        if not candidates:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return random.choice(candidates)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {"combinations": self.count, "hits": self.hits, "misses": self.misses,
+                "hit_ratio": self.hits / total if total else 0.0}
+
+    def close(self):
+        self._map.close()
+
+
+def load_question_bank(path=None):
+    """Open the bank at QUESTION_BANK (default ~/.cache/ai_interview_prep/question_bank.bin), or None if there is none."""
+    path = path if path is not None else os.environ.get('QUESTION_BANK', DEFAULT_PATH)
+    if not os.path.exists(path):
+        return None
+    try:
+        return QuestionBank(path)
+    except (OSError, ValueError, struct.error) as e:
+        logging.error(f"Could not open question bank {path}: {e}")
+        return None
+
+
+def generate_questions(client, industry, coverage, vertical, count, model="gpt-4o-mini"):
+    """Ask for count distinct opening/behavioral questions for one combination; near-duplicates are dropped."""
+    prompt = f"""
+        Write {count} distinct interview questions for a candidate in the {industry} industry.
+        Industry Coverage: {coverage if coverage else "Not specified"}
+        Vertical: {vertical if vertical else "Not specified"}
+
+        They will be asked as questions 2-4 of an interview, after the candidate has introduced their background.
+        Focus on personal or behavioral questions related to the industry and role, reflecting the coverage and
+        vertical if given. Each question must be natural and conversational, as if coming from a human interviewer,
+        and must not depend on details of a particular candidate's CV.
+        """
+    response = client.chat.completions.create(
+        model=model,
+        messages=[
+            {"role": "system", "content": "You write interview question banks for finance interviews."},
+            {"role": "user", "content": prompt}
+        ],
+        response_format={
+            "type": "json_schema",
+            "json_schema": {
+                "name": "question_bank",
+                "strict": True,
+                "schema": {
+                    "type": "object",
+                    "properties": {"questions": {"type": "array", "items": {"type": "string"}}},
+                    "required": ["questions"],
+                    "additionalProperties": False
+                }
+            }
+        }
+    )
+    questions = json.loads(response.choices[0].message.content)["questions"]
+    index = QuestionIndex()
+    unique = []
+    for question in (question.strip() for question in questions if isinstance(question, str)):
+        if question and index.duplicate_of(question) is None:
+            index.add(question)
+            unique.append(question)
+    return unique
+
+
+def build_bank(client, path, per_combination=8, workers=8, model="gpt-4o-mini"):
+    """Generate questions for every taxonomy combination concurrently and write the bank; returns the entries.
+
+    Combinations whose request fails are left out and fall back to live generation.
+    """
+    combinations = list(taxonomy_combinations())
+
+    def generate(combination):
+        try:
+            return combination, generate_questions(client, *combination, per_combination, model)
+        except Exception as e:
+            logging.error(f"Could not generate questions for {combination}: {e}")
+            return combination, []
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        entries = dict(pool.map(generate, combinations))
+    write_bank(path, entries)
+    return entries
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or inspect the precomputed opening-question bank.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build_parser = subparsers.add_parser("build", help="generate questions for every industry/coverage/vertical")
+    build_parser.add_argument("--output", default=os.environ.get('QUESTION_BANK', DEFAULT_PATH))
+    build_parser.add_argument("--per-combination", type=int, default=8)
+    build_parser.add_argument("--workers", type=int, default=8)
+    build_parser.add_argument("--model", default="gpt-4o-mini")
+    show_parser = subparsers.add_parser("show", help="print the banked questions for one combination")
+    show_parser.add_argument("industry")
+    show_parser.add_argument("--coverage", default="")
+    show_parser.add_argument("--vertical", default="")
+    show_parser.add_argument("--bank", default=None)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+    if args.command == "build":
+        # An openai client without json_schema support fails every combination and would overwrite the bank with
+        # an empty one
+        if not prompts.check_openai_version():
+            raise SystemExit(1)
+        from openai import OpenAI
+        entries = build_bank(OpenAI(), args.output, args.per_combination, args.workers, args.model)
+        filled = sum(1 for questions in entries.values() if questions)
+        print(f"Wrote {sum(map(len, entries.values()))} questions for {filled}/{len(entries)} combinations "
+              f"to {args.output} ({os.path.getsize(args.output)} bytes)")
+        return
+
+    bank = load_question_bank(args.bank)
+    if bank is None:
+        print("No question bank found; run `python question_bank.py build` first.")
+        return
+    for question in bank.questions(args.industry, args.coverage, args.vertical):
+        print(question)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+import os
+
+from text_terms import tokenize
+
+MIN_PARTIAL_CHARS = 24
+PARTIAL_CONTAINMENT = 0.8
+# Interviewer phrasing shared by questions on different topics ("Walk me through a DCF" / "... an LBO"), including
+# openers such as "Great answer."; tokenize has already dropped the stop words and folded plurals
+TEMPLATE_WORDS = {
+    "great", "good", "thank", "thanks", "answer", "nice", "excellent", "interesting", "okay", "ok", "right", "next",
+    "let", "let's", "move", "moving",
+    "walk", "through", "explain", "describe", "discuss", "talk", "give", "share", "example", "time", "situation",
+    "please", "briefly", "detail", "analysi", "approach", "think", "know", "understand", "say", "should", "want",
+    "interested", "interest", "draw", "like", "work", "ever", "one", "recent", "recently", "handle",
+    "handled", "go", "any", "other", "most", "main", "bit", "use", "method", "now", "candidate", "question"
+}
+
+
+class DuplicateQuestion(Exception):
+    """A generated question was rejected as a near-duplicate of one already asked."""
+
+    def __init__(self, question, asked, released=False):
+        super().__init__(f"{question!r} repeats {asked!r}")
+        self.question = question
+        self.asked = asked
+        # Whether part of the question had already been streamed to the candidate when it was rejected
+        self.released = released
+
+
+def shingles(text, size=4):
+    """Weighted character shingles of a question's topic words.
+
+    Template words are dropped and each remaining word is shingled on its own, with its shingles sharing a weight
+    of 1, so a short term such as "DCF" counts as much as "depreciation" and rephrasings ("valuation" /
+    "valuing") still overlap.
+    """
+    weights = {}
+    for word in tokenize(text):
+        if word in TEMPLATE_WORDS:
+            continue
+        padded = f" {word} "
+        grams = [padded[start:start + size] for start in range(max(len(padded) - size + 1, 1))]
+        for gram in grams:
+            weights[gram] = weights.get(gram, 0.0) + 1.0 / len(grams)
+    return weights
+
+
+class QuestionIndex:
+    """Shingle weights of the questions asked in a session, used to reject near-duplicates before they are spoken.
+
+    A complete question is a duplicate when its weighted Jaccard similarity to an earlier question reaches
+    threshold (QUESTION_SIMILARITY, default 0.7). A partial question, e.g. the first sentence of a streamed one, is
+    a duplicate when PARTIAL_CONTAINMENT of its shingle weight is contained in an earlier question.
+    """
+
+    def __init__(self, threshold=None, shingle_size=4):
+        if threshold is None:
+            threshold = float(os.environ.get('QUESTION_SIMILARITY', '0.7'))
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        self.questions = []
+        self.shingle_sets = []
+        self.checked = 0
+        self.rejected = 0
+
+    def add(self, question):
+        self.questions.append(question)
+        self.shingle_sets.append(shingles(question, self.shingle_size))
+
+    def closest(self, question, partial=False):
+        """(similarity, earlier question) for the most similar question asked so far, or (0.0, None)."""
+        candidate = shingles(question, self.shingle_size)
+        best = (0.0, None)
+        if not candidate:
+            return best
+        total = sum(candidate.values())
+        for asked, asked_shingles in zip(self.questions, self.shingle_sets):
+            overlap = sum(min(weight, asked_shingles.get(gram, 0.0)) for gram, weight in candidate.items())
+            similarity = overlap / total if partial else overlap / (total + sum(asked_shingles.values()) - overlap)
+            if similarity > best[0]:
+                best = (similarity, asked)
+        return best
+
+    def judgeable(self, text):
+        """Whether a partial question has enough content (MIN_PARTIAL_CHARS) to be checked on its own."""
+        return len(" ".join(tokenize(text))) >= MIN_PARTIAL_CHARS
+
+    def duplicate_of(self, question, partial=False):
+        """The earlier question that question repeats, or None; counts every check and rejection."""
+        if partial and not self.judgeable(question):
+            return None
+        similarity, asked = self.closest(question, partial)
+        self.checked += 1
+        if similarity >= (PARTIAL_CONTAINMENT if partial else self.threshold):
+            self.rejected += 1
+            return asked
+        return None
+
+    def stats(self):
+        return {"questions": len(self.questions), "checked": self.checked, "rejected": self.rejected}
@@ -0,0 +1,297 @@
+import os
+import time
+import random
+import asyncio
+import inspect
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import openai
+
+
+class RequestFailed(Exception):
+    """Raised when a stage's attempts are exhausted or its deadline passes; callers fall back and count it."""
+
+    def __init__(self, stage, reason):
+        super().__init__(f"{stage}: {reason}")
+        self.stage = stage
+        self.reason = reason
+
+
+class StagePolicy:
+    """Deadline, per-attempt timeout, retry budget and hedging settings for one kind of request."""
+
+    def __init__(self, deadline, attempt_timeout, retries=2, backoff=0.25, hedge=False, hedge_after=2.0,
+                 min_hedge_samples=20):
+        self.deadline = deadline
+        self.attempt_timeout = attempt_timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.hedge = hedge
+        self.hedge_after = hedge_after
+        self.min_hedge_samples = min_hedge_samples
+
+
+def default_policies(hedge=None):
+    """Policies for the app's stages; hedging follows HEDGE_REQUESTS unless given explicitly."""
+    if hedge is None:
+        hedge = os.environ.get('HEDGE_REQUESTS') == 'TRUE'
+    return {
+        "generate_question": StagePolicy(deadline=20.0, attempt_timeout=10.0, hedge=hedge, hedge_after=3.0),
+        "evaluate_response": StagePolicy(deadline=30.0, attempt_timeout=15.0, hedge=hedge, hedge_after=5.0),
+        "evaluate_and_ask": StagePolicy(deadline=40.0, attempt_timeout=20.0, hedge=hedge, hedge_after=6.0),
+        "tts": StagePolicy(deadline=15.0, attempt_timeout=8.0, retries=1, hedge=hedge, hedge_after=2.0)
+    }
+
+
+def is_retryable(error):
+    """Timeouts, connection errors, rate limits and server errors are worth another attempt."""
+    if isinstance(error, (openai.APIConnectionError, TimeoutError, asyncio.TimeoutError)):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    return False
+
+
+def close_response(response):
+    """Release a response that will not be used, e.g. a hedged Stream that lost, so its connection is freed.
+
+    Returns the awaitable from an async response's close(), which the caller must await or schedule.
+    """
+    close = getattr(response, "close", None)
+    if not callable(close):
+        return None
+    try:
+        return close()
+    except Exception as e:
+        logging.debug(f"Could not close discarded response: {e}")
+        return None
+
+
+def _close_discarded(future):
+    """Done callback for an unused attempt (a concurrent future or an asyncio task)."""
+    if not future.cancelled() and future.exception() is None:
+        closing = close_response(future.result())
+        if inspect.isawaitable(closing):
+            asyncio.ensure_future(closing)
+
+
+class _ExecutorStats:
+    """Counters and a rolling latency window per stage; the p95 sets the hedging threshold."""
+
+    COUNTERS = ("calls", "attempts", "retries", "hedges", "hedge_wins", "timeouts", "failures", "fallbacks")
+
+    def __init__(self, policies=None, window=200):
+        self.policies = policies if policies is not None else default_policies()
+        self.latencies = {}
+        self.counters = {}
+        self.window = window
+        self._lock = threading.Lock()
+
+    def policy(self, stage):
+        return self.policies.get(stage) or StagePolicy(deadline=30.0, attempt_timeout=15.0)
+
+    def _count(self, stage, name, amount=1):
+        with self._lock:
+            counters = self.counters.setdefault(stage, dict.fromkeys(self.COUNTERS, 0))
+            counters[name] += amount
+
+    def _observe(self, stage, seconds):
+        with self._lock:
+            self.latencies.setdefault(stage, deque(maxlen=self.window)).append(seconds)
+
+    def hedge_delay(self, stage):
+        """Observed p95 once there are enough samples, otherwise the policy's fixed threshold."""
+        policy = self.policy(stage)
+        with self._lock:
+            samples = sorted(self.latencies.get(stage, ()))
+        if len(samples) < policy.min_hedge_samples:
+            return policy.hedge_after
+        return samples[min(int(len(samples) * 0.95), len(samples) - 1)]
+
+    def _backoff(self, policy, attempt):
+        # Full jitter: spreads retries from many sessions instead of synchronizing them
+        return random.uniform(0, policy.backoff * (2 ** attempt))
+
+    def record_fallback(self, stage):
+        """Count a canned response served because the stage failed."""
+        self._count(stage, "fallbacks")
+        logging.warning(f"{stage}: serving fallback response")
+
+    def stats(self):
+        stats = {}
+        with self._lock:
+            for stage, counters in self.counters.items():
+                samples = sorted(self.latencies.get(stage, ()))
+                stats[stage] = dict(counters)
+                stats[stage]["p50"] = samples[len(samples) // 2] if samples else None
+                stats[stage]["p95"] = samples[min(int(len(samples) * 0.95), len(samples) - 1)] if samples else None
+        return stats
+
+
+class RequestExecutor(_ExecutorStats):
+    """Runs blocking OpenAI calls under per-stage deadlines, with jittered retries and optional hedging.
+
+    fn is called with the remaining per-attempt time as its `timeout` keyword, which the OpenAI client honors.
+    For stream=True calls the deadline covers the time until the response starts; the caller reads the stream
+    afterwards, and each read is bounded only by the client's read timeout (the same `timeout`), not by the
+    deadline. Responses of losing hedged attempts are closed so a stream does not hold its connection open.
+    """
+
+    def __init__(self, policies=None, workers=8):
+        super().__init__(policies)
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="request")
+
+    def call(self, stage, fn, **kwargs):
+        policy = self.policy(stage)
+        self._count(stage, "calls")
+        start_time = time.perf_counter()
+        deadline = start_time + policy.deadline
+        last_error = None
+
+        for attempt in range(policy.retries + 1):
+            if attempt:
+                self._count(stage, "retries")
+                time.sleep(min(self._backoff(policy, attempt - 1), max(deadline - time.perf_counter(), 0)))
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                result = self._attempt(stage, policy, fn, kwargs, remaining)
+                self._observe(stage, time.perf_counter() - start_time)
+                return result
+            except Exception as e:
+                last_error = e
+                if not is_retryable(e):
+                    break
+                logging.warning(f"{stage} attempt {attempt + 1} failed: {e}")
+
+        if last_error is None or time.perf_counter() >= deadline:
+            self._count(stage, "timeouts")
+        self._count(stage, "failures")
+        raise RequestFailed(stage, last_error if last_error is not None else "deadline exceeded")
+
+    def _attempt(self, stage, policy, fn, kwargs, remaining):
+        timeout = min(policy.attempt_timeout, remaining)
+        attempt_deadline = time.perf_counter() + timeout
+        futures = [self._submit(stage, fn, kwargs, timeout)]
+
+        if policy.hedge:
+            done, _ = wait(futures, timeout=min(self.hedge_delay(stage), timeout))
+            if not done:
+                # The first request is past the usual tail; race a duplicate and keep whichever wins
+                self._count(stage, "hedges")
+                futures.append(self._submit(stage, fn, kwargs, max(attempt_deadline - time.perf_counter(), 0.1)))
+
+        pending = set(futures)
+        error = None
+        winner = None
+        try:
+            while pending:
+                done, pending = wait(pending, timeout=max(attempt_deadline - time.perf_counter(), 0), return_when=FIRST_COMPLETED)
+                if not done:
+                    raise TimeoutError(f"no response within {timeout:.1f}s")
+                for future in done:
+                    if future.exception() is None:
+                        winner = future
+                        if future is not futures[0]:
+                            self._count(stage, "hedge_wins")
+                        return future.result()
+                    error = future.exception()
+            raise error
+        finally:
+            for future in futures:
+                if future is not winner:
+                    # Closes the response of an attempt that finishes (or already finished) without being used
+                    future.cancel()
+                    future.add_done_callback(_close_discarded)
+
+    def _submit(self, stage, fn, kwargs, timeout):
+        self._count(stage, "attempts")
+        return self.pool.submit(fn, timeout=timeout, **kwargs)
+
+    def close(self):
+        self.pool.shutdown(wait=False)
+
+
+class AsyncRequestExecutor(_ExecutorStats):
+    """RequestExecutor for AsyncOpenAI: same policies and the same deadline scope for streams.
+
+    Losing hedged requests are cancelled if still in flight, and closed if they already returned a response.
+    """
+
+    async def call(self, stage, fn, **kwargs):
+        policy = self.policy(stage)
+        self._count(stage, "calls")
+        loop = asyncio.get_running_loop()
+        start_time = loop.time()
+        deadline = start_time + policy.deadline
+        last_error = None
+
+        for attempt in range(policy.retries + 1):
+            if attempt:
+                self._count(stage, "retries")
+                await asyncio.sleep(min(self._backoff(policy, attempt - 1), max(deadline - loop.time(), 0)))
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                result = await self._attempt(stage, policy, fn, kwargs, remaining)
+                self._observe(stage, loop.time() - start_time)
+                return result
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                last_error = e
+                if not is_retryable(e):
+                    break
+                logging.warning(f"{stage} attempt {attempt + 1} failed: {e}")
+
+        if last_error is None or loop.time() >= deadline:
+            self._count(stage, "timeouts")
+        self._count(stage, "failures")
+        raise RequestFailed(stage, last_error if last_error is not None else "deadline exceeded")
+
+    async def _attempt(self, stage, policy, fn, kwargs, remaining):
+        loop = asyncio.get_running_loop()
+        timeout = min(policy.attempt_timeout, remaining)
+        attempt_deadline = loop.time() + timeout
+        tasks = [self._submit(stage, fn, kwargs, timeout)]
+        winner = None
+        try:
+            if policy.hedge:
+                done, _ = await asyncio.wait(tasks, timeout=min(self.hedge_delay(stage), timeout))
+                if not done:
+                    self._count(stage, "hedges")
+                    tasks.append(self._submit(stage, fn, kwargs, max(attempt_deadline - loop.time(), 0.1)))
+
+            pending = set(tasks)
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, timeout=max(attempt_deadline - loop.time(), 0),
+                                                   return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    raise asyncio.TimeoutError(f"no response within {timeout:.1f}s")
+                for task in done:
+                    if task.exception() is None:
+                        winner = task
+                        if task is not tasks[0]:
+                            self._count(stage, "hedge_wins")
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                if task is not winner:
+                    # cancel() does nothing to a task that already returned, so its response is closed instead
+                    task.cancel()
+                    task.add_done_callback(_close_discarded)
+
+    def _submit(self, stage, fn, kwargs, timeout):
+        self._count(stage, "attempts")
+        return asyncio.ensure_future(fn(timeout=timeout, **kwargs))
+
+    def close(self):
+        return None
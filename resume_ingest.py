@@ -0,0 +1,149 @@
+import os
+import re
+import logging
+import argparse
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor
+
+from cv_digest import file_content_hash
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "ai_interview_prep", "resumes")
+SUPPORTED_EXTENSIONS = ('.pdf', '.docx')
+PARALLEL_PAGE_THRESHOLD = 8
+
+
+def normalize_text(text):
+    """Canonical form of extracted resume text: NFKC, no control characters, trimmed lines, at most one blank line."""
+    text = unicodedata.normalize("NFKC", text).replace("\x00", "")
+    lines = [re.sub(r"[ \t]+", " ", line).strip() for line in text.splitlines()]
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip()
+
+
+def _extract_pdf_range(file_path, start, stop):
+    """Process-pool worker: each worker opens its own reader, since PdfReader objects cannot be pickled."""
+    from PyPDF2 import PdfReader
+    reader = PdfReader(file_path)
+    return [reader.pages[index].extract_text() or "" for index in range(start, stop)]
+
+
+def iter_pdf_pages(file_path, workers=None, parallel_threshold=PARALLEL_PAGE_THRESHOLD):
+    """Yield each page's text in order as soon as it is available.
+
+    Short documents are read in-process; longer ones are split into page ranges extracted on a process pool,
+    and pages are still yielded in order while later ranges are being parsed.
+    """
+    from PyPDF2 import PdfReader
+    reader = PdfReader(file_path)
+    page_count = len(reader.pages)
+    if page_count < parallel_threshold:
+        for page in reader.pages:
+            yield page.extract_text() or ""
+        return
+
+    workers = workers if workers else min(os.cpu_count() or 1, 8)
+    span = -(-page_count // workers)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_extract_pdf_range, file_path, start, min(start + span, page_count))
+                   for start in range(0, page_count, span)]
+        for future in futures:
+            yield from future.result()
+
+
+def extract_docx_text(file_path):
+    """Text of a Word document: all paragraphs, then each table row with cells joined by " | "."""
+    try:
+        import docx
+    except ImportError as e:
+        raise ImportError("python-docx is needed to read DOCX files", name=e.name) from e
+    document = docx.Document(file_path)
+    parts = [paragraph.text for paragraph in document.paragraphs]
+    for table in document.tables:
+        for row in table.rows:
+            parts.append(" | ".join(cell.text for cell in row.cells))
+    return "\n".join(parts)
+
+
+class ResumeCache:
+    """Normalized resume text on disk, keyed by the source file's content hash."""
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+
+    def _path(self, content_hash):
+        return os.path.join(self.cache_dir, f"{content_hash}.txt")
+
+    def get(self, content_hash):
+        try:
+            with open(self._path(content_hash), 'r', encoding='utf-8') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def put(self, content_hash, text):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            path = self._path(content_hash)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(text)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logging.warning(f"Could not cache resume text: {e}")
+
+
+def load_resume(file_path, cache=None, on_page=None):
+    """Return the normalized text of a PDF or DOCX resume, or None if it cannot be read.
+
+    Results are cached by content hash, so the same file is only parsed once. on_page(index, text) is called
+    for each PDF page as it is extracted.
+    """
+    if not file_path.lower().endswith(SUPPORTED_EXTENSIONS):
+        logging.error(f"Unsupported resume format: {file_path}")
+        return None
+    cache = cache if cache is not None else ResumeCache()
+    try:
+        content_hash = file_content_hash(file_path)
+    except OSError as e:
+        logging.error(f"Error reading resume file: {e}")
+        return None
+
+    text = cache.get(content_hash)
+    if text is not None:
+        return text
+
+    try:
+        if file_path.lower().endswith('.pdf'):
+            pages = []
+            for index, page_text in enumerate(iter_pdf_pages(file_path)):
+                pages.append(page_text)
+                if on_page is not None:
+                    on_page(index, page_text)
+            text = "\n".join(pages)
+        else:
+            text = extract_docx_text(file_path)
+    except ImportError as e:
+        logging.error(f"Cannot read {file_path}: {e} (pip install -r requirements.txt)")
+        return None
+    except Exception as e:
+        logging.error(f"Error extracting resume text: {e}")
+        return None
+
+    text = normalize_text(text)
+    if not text:
+        logging.error(f"No text could be extracted from {file_path}")
+        return None
+    cache.put(content_hash, text)
+    return text
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract, normalize and cache a resume's text.")
+    parser.add_argument("resume", help="PDF or DOCX file")
+    args = parser.parse_args()
+
+    text = load_resume(args.resume, on_page=lambda index, page_text: print(f"page {index + 1}: {len(page_text)} chars"))
+    print(text if text is not None else "Could not read the resume.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,351 @@
+import os
+import json
+import time
+import uuid
+import base64
+import asyncio
+import logging
+import argparse
+from collections import deque
+
+import httpx
+from aiohttp import web, WSMsgType
+from openai import AsyncOpenAI
+
+import prompts
+from async_interview import AsyncAIInterviewPrep, InputPort, OutputPort
+from tts_cache import TTSCache
+from tracing import REGISTRY, Tracer
+from request_executor import AsyncRequestExecutor
+from question_bank import load_question_bank
+
+REQUIRED_FIELDS = ("job_position", "industry", "job_description", "candidate_cv")
+OPTIONAL_FIELDS = ("industry_coverage", "vertical", "cv_digest")
+MAX_QUESTIONS_LIMIT = 100
+# Event types that end a WebSocket stream
+CLOSING_EVENTS = ("finished", "closed")
+
+
+class ServerSession(InputPort, OutputPort):
+    """One isolated interview: answers arrive through an inbox, events are streamed to connected clients.
+
+    The most recent max_events events are kept for replay to clients that connect or poll later. Audio events
+    go only to clients connected at the time, so a session's memory does not grow with the speech it produces.
+    """
+
+    def __init__(self, session_id, metrics, tracer, max_events=500):
+        self.session_id = session_id
+        self.metrics = metrics
+        self.tracer = tracer
+        self.events = deque(maxlen=max_events)
+        self.next_seq = 0
+        self.inbox = asyncio.Queue()
+        self.subscribers = set()
+        self.interview = None
+        self.task = None
+        self.answered_at = None
+        self.finished = False
+        self.finished_at = None
+        self.active_at = time.monotonic()
+
+    def publish(self, event):
+        event["seq"] = self.next_seq
+        self.next_seq += 1
+        if event["type"] != "audio":
+            self.events.append(event)
+        for queue in self.subscribers:
+            queue.put_nowait(event)
+
+    def events_since(self, seq):
+        return [event for event in self.events if event["seq"] >= seq]
+
+    def answer(self, text):
+        self.active_at = time.monotonic()
+        self.inbox.put_nowait(text)
+
+    async def show(self, role, text):
+        self.publish({"type": "message", "role": role, "text": text})
+
+    async def speak(self, audio):
+        self.publish({"type": "audio", "format": "mp3", "audio": base64.b64encode(audio).decode("ascii")})
+
+    async def read_answer(self, question):
+        if self.answered_at is not None:
+            # Everything between receiving the last answer and asking for the next one is turn latency
+            seconds = time.perf_counter() - self.answered_at
+            self.metrics.record_turn(seconds)
+            self.tracer.record("turn", seconds)
+            self.answered_at = None
+        self.publish({"type": "awaiting_answer", "question": question})
+        answer = await self.inbox.get()
+        self.answered_at = time.perf_counter()
+        return answer
+
+    async def read_line(self, prompt):
+        self.publish({"type": "prompt", "text": prompt})
+        return await self.inbox.get()
+
+
+class ServerMetrics:
+    """Active sessions and a rolling window of turn latencies."""
+
+    def __init__(self, window=10000):
+        self.turn_latencies = deque(maxlen=window)
+        self.turns = 0
+        self.sessions_started = 0
+        self.started_at = time.time()
+
+    def record_turn(self, seconds):
+        self.turns += 1
+        self.turn_latencies.append(seconds)
+
+    def percentile(self, p):
+        if not self.turn_latencies:
+            return None
+        ordered = sorted(self.turn_latencies)
+        return ordered[min(int(len(ordered) * p / 100), len(ordered) - 1)]
+
+    def snapshot(self, active_sessions):
+        cores = os.cpu_count() or 1
+        return {
+            "active_sessions": active_sessions,
+            "sessions_started": self.sessions_started,
+            "cpu_cores": cores,
+            "sessions_per_core": active_sessions / cores,
+            "turns": self.turns,
+            "turn_latency_p50": self.percentile(50),
+            "turn_latency_p99": self.percentile(99),
+            "uptime_seconds": time.time() - self.started_at
+        }
+
+
+class InterviewServer:
+    """HTTP/WebSocket front end hosting many AsyncAIInterviewPrep sessions on one pooled OpenAI client.
+
+    Finished sessions are evicted SESSION_FINISHED_TTL seconds (default 300) after they end, and sessions with no
+    answer or client connection for SESSION_IDLE_TTL seconds (default 1800) are cancelled and evicted.
+    """
+
+    def __init__(self, client, tts_cache=None, question_bank=None, finished_ttl=None, idle_ttl=None):
+        if finished_ttl is None:
+            finished_ttl = float(os.environ.get('SESSION_FINISHED_TTL', '300'))
+        if idle_ttl is None:
+            idle_ttl = float(os.environ.get('SESSION_IDLE_TTL', '1800'))
+        self.client = client
+        self.finished_ttl = finished_ttl
+        self.idle_ttl = idle_ttl
+        self.reaper = None
+        self.tts_cache = tts_cache
+        # Memory-mapped once and shared read-only by every session
+        self.question_bank = question_bank
+        self.sessions = {}
+        self.metrics = ServerMetrics()
+        # Shared so every session's latencies feed the same hedging thresholds
+        self.executor = AsyncRequestExecutor()
+
+    def build_app(self):
+        app = web.Application()
+        app.add_routes([
+            web.post("/sessions", self.create_session),
+            web.get("/sessions/{session_id}", self.get_session),
+            web.post("/sessions/{session_id}/answer", self.post_answer),
+            web.get("/sessions/{session_id}/ws", self.websocket),
+            web.delete("/sessions/{session_id}", self.delete_session),
+            web.get("/metrics", self.get_metrics),
+            web.get("/metrics/prometheus", self.get_prometheus_metrics)
+        ])
+        app.on_startup.append(self._start_reaper)
+        app.on_cleanup.append(self._shutdown)
+        return app
+
+    def _session(self, request):
+        session = self.sessions.get(request.match_info["session_id"])
+        if session is None:
+            raise web.HTTPNotFound(text="Unknown session")
+        return session
+
+    @staticmethod
+    async def _json_body(request):
+        try:
+            body = await request.json()
+        except json.JSONDecodeError:
+            raise web.HTTPBadRequest(text="Expected a JSON body")
+        if not isinstance(body, dict):
+            raise web.HTTPBadRequest(text="Expected a JSON object")
+        return body
+
+    async def create_session(self, request):
+        params = await self._json_body(request)
+        missing = [field for field in REQUIRED_FIELDS if not params.get(field)]
+        if missing:
+            raise web.HTTPBadRequest(text=f"Missing fields: {', '.join(missing)}")
+        max_questions = params.get("max_questions", 10)
+        if isinstance(max_questions, bool) or not isinstance(max_questions, int) or not 0 <= max_questions <= MAX_QUESTIONS_LIMIT:
+            raise web.HTTPBadRequest(text=f"max_questions must be an integer from 0 (no limit) to {MAX_QUESTIONS_LIMIT}")
+
+        session_id = uuid.uuid4().hex
+        session = ServerSession(session_id, self.metrics, Tracer(session_id))
+        session.interview = AsyncAIInterviewPrep(
+            self.client, session, session,
+            tts_cache=self.tts_cache,
+            tracer=session.tracer,
+            executor=self.executor,
+            question_bank=self.question_bank,
+            speech_enabled=bool(params.get("speech", True)),
+            max_questions=max_questions,
+            **{field: params[field] for field in REQUIRED_FIELDS},
+            **{field: params.get(field, "") for field in OPTIONAL_FIELDS}
+        )
+        self.sessions[session.session_id] = session
+        self.metrics.sessions_started += 1
+        session.task = asyncio.create_task(self._run(session))
+        return web.json_response({"session_id": session.session_id}, status=201)
+
+    async def _run(self, session):
+        try:
+            average_score = await session.interview.run_interview()
+            session.publish({"type": "finished", "average_score": average_score})
+        finally:
+            session.finished = True
+            session.finished_at = time.monotonic()
+
+    async def get_session(self, request):
+        session = self._session(request)
+        try:
+            since = int(request.query.get("since", 0))
+        except ValueError:
+            raise web.HTTPBadRequest(text="since must be an integer event sequence number")
+        return web.json_response({
+            "session_id": session.session_id,
+            "finished": session.finished,
+            "scores": session.interview.scores,
+            "tokens": session.interview.prompt_cache_stats.token_report(),
+            "evaluations": session.interview.evaluation_stats.stats(),
+            "repeated_questions": session.interview.question_index.stats(),
+            "events": session.events_since(since)
+        })
+
+    async def post_answer(self, request):
+        session = self._session(request)
+        body = await self._json_body(request)
+        session.answer(body.get("text", ""))
+        return web.json_response({"accepted": True})
+
+    async def websocket(self, request):
+        """Replay past events, then stream new ones; client messages are {"text": ...} answers."""
+        session = self._session(request)
+        ws = web.WebSocketResponse(heartbeat=30)
+        await ws.prepare(request)
+
+        queue = asyncio.Queue()
+        session.subscribers.add(queue)
+        session.active_at = time.monotonic()
+        for event in list(session.events):
+            queue.put_nowait(event)
+
+        async def forward():
+            while True:
+                event = await queue.get()
+                await ws.send_json(event)
+                if event["type"] in CLOSING_EVENTS:
+                    await ws.close()
+                    return
+
+        sender = asyncio.create_task(forward())
+        try:
+            async for message in ws:
+                if message.type == WSMsgType.TEXT:
+                    try:
+                        session.answer(json.loads(message.data).get("text", ""))
+                    except (json.JSONDecodeError, AttributeError):
+                        await ws.send_json({"type": "error", "text": "Expected {\"text\": ...}"})
+                elif message.type == WSMsgType.ERROR:
+                    break
+        finally:
+            sender.cancel()
+            session.subscribers.discard(queue)
+            session.active_at = time.monotonic()
+        return ws
+
+    async def delete_session(self, request):
+        self._evict(self._session(request), "deleted")
+        return web.json_response({"deleted": True})
+
+    def _evict(self, session, reason):
+        session.task.cancel()
+        session.publish({"type": "closed", "reason": reason})
+        session.tracer.close()
+        REGISTRY.forget(session.session_id)
+        self.sessions.pop(session.session_id, None)
+
+    def evict_expired(self, now=None):
+        """Evict finished sessions past finished_ttl and unfinished ones idle past idle_ttl; returns how many."""
+        now = time.monotonic() if now is None else now
+        expired = []
+        for session in self.sessions.values():
+            if session.finished and now - session.finished_at >= self.finished_ttl:
+                expired.append((session, "finished"))
+            elif not session.finished and not session.subscribers and now - session.active_at >= self.idle_ttl:
+                expired.append((session, "idle"))
+        for session, reason in expired:
+            logging.info(f"Evicting {reason} session {session.session_id}")
+            self._evict(session, reason)
+        return len(expired)
+
+    async def _reap(self):
+        interval = max(min(self.finished_ttl, self.idle_ttl) / 4, 1.0)
+        while True:
+            await asyncio.sleep(interval)
+            self.evict_expired()
+
+    async def _start_reaper(self, app):
+        self.reaper = asyncio.create_task(self._reap())
+
+    async def get_metrics(self, request):
+        active = sum(1 for session in self.sessions.values() if not session.finished)
+        snapshot = self.metrics.snapshot(active)
+        snapshot["requests"] = self.executor.stats()
+        if self.question_bank is not None:
+            snapshot["question_bank"] = self.question_bank.stats()
+        return web.json_response(snapshot)
+
+    async def get_prometheus_metrics(self, request):
+        """Aggregate and per-session stage latency histograms in the Prometheus text format."""
+        return web.Response(text=REGISTRY.render_prometheus(), content_type="text/plain")
+
+    async def _shutdown(self, app):
+        if self.reaper is not None:
+            self.reaper.cancel()
+        for session in self.sessions.values():
+            session.task.cancel()
+            session.tracer.close()
+        await self.client.close()
+
+
+def create_client(max_connections=100):
+    """One AsyncOpenAI client with a shared keep-alive connection pool for every session.
+
+    Client-side retries are off: the request executor retries and hedges chat and speech calls itself.
+    """
+    http_client = httpx.AsyncClient(
+        limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        timeout=httpx.Timeout(60.0, connect=5.0)
+    )
+    return AsyncOpenAI(http_client=http_client, max_retries=0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve AI interview sessions over HTTP and WebSocket.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--max-connections", type=int, default=100)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    prompts.check_openai_version()
+    server = InterviewServer(create_client(args.max_connections), TTSCache(), load_question_bank())
+    web.run_app(server.build_app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+import os
+import json
+import time
+import logging
+import argparse
+import threading
+
+DEFAULT_DIR = os.path.join(os.path.expanduser("~"), ".cache", "ai_interview_prep", "sessions")
+
+
+class SessionJournal:
+    """Append-only JSON lines record of one session, written as it happens so a crashed session can be resumed.
+
+    Every record is flushed to the OS as soon as it is appended, which survives the process dying; fsync, which
+    also survives the machine going down, is batched to every JOURNAL_FSYNC_EVERY records (default 8) or
+    JOURNAL_FSYNC_SECONDS (default 1.0), whichever comes first, and always runs on close.
+    """
+
+    def __init__(self, session_id, directory=DEFAULT_DIR, fsync_every=None, fsync_seconds=None):
+        if fsync_every is None:
+            fsync_every = int(os.environ.get('JOURNAL_FSYNC_EVERY', '8'))
+        if fsync_seconds is None:
+            fsync_seconds = float(os.environ.get('JOURNAL_FSYNC_SECONDS', '1.0'))
+        self.session_id = session_id
+        self.path = os.path.join(directory, f"{session_id}.jsonl")
+        self.fsync_every = fsync_every
+        self.fsync_seconds = fsync_seconds
+        self.unsynced = 0
+        self.synced_at = time.monotonic()
+        self.fsyncs = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._file = open(self.path, 'a', encoding='utf-8')
+
+    def append(self, kind, **data):
+        record = json.dumps({"ts": time.time(), "type": kind, **data})
+        with self._lock:
+            if self._file is None:
+                return
+            try:
+                self._file.write(record + "\n")
+                self._file.flush()
+                self.unsynced += 1
+                if self.unsynced >= self.fsync_every or time.monotonic() - self.synced_at >= self.fsync_seconds:
+                    self._sync()
+            except (OSError, ValueError) as e:
+                logging.error(f"Could not write session journal: {e}")
+
+    def _sync(self):
+        os.fsync(self._file.fileno())
+        self.unsynced = 0
+        self.synced_at = time.monotonic()
+        self.fsyncs += 1
+
+    def close(self):
+        with self._lock:
+            if self._file is None:
+                return
+            try:
+                if self.unsynced:
+                    self._sync()
+                self._file.close()
+            except OSError as e:
+                logging.error(f"Could not close session journal: {e}")
+            self._file = None
+
+
+def journal_path(session, directory=DEFAULT_DIR):
+    """Path of a session's journal from its id or from a path to the file itself."""
+    if os.path.exists(session):
+        return session
+    return os.path.join(directory, f"{session}.jsonl")
+
+
+def read_journal(path):
+    """All records of a journal in order; a final line torn by a crash is skipped."""
+    records = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                logging.warning(f"Skipping unreadable journal record at {path}:{line_number}")
+    return records
+
+
+def list_sessions(directory=DEFAULT_DIR):
+    """One summary per journal in directory, most recently modified first."""
+    try:
+        names = [name for name in os.listdir(directory) if name.endswith(".jsonl")]
+    except OSError:
+        return []
+    paths = sorted((os.path.join(directory, name) for name in names), key=os.path.getmtime, reverse=True)
+    sessions = []
+    for path in paths:
+        records = read_journal(path)
+        if not records:
+            continue
+        setup = records[0]
+        sessions.append({
+            "session": os.path.basename(path)[:-len(".jsonl")],
+            "mode": setup.get("mode", "chat"),
+            "started": time.strftime("%Y-%m-%d %H:%M", time.localtime(setup.get("ts", 0))),
+            "title": setup.get("industry") or setup.get("role_type") or setup.get("job_params", {}).get("job_title", ""),
+            "records": len(records),
+            "finished": records[-1].get("type") == "end"
+        })
+    return sessions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="List journaled interview sessions that can be resumed.")
+    parser.add_argument("--directory", default=DEFAULT_DIR)
+    parser.add_argument("--unfinished", action="store_true", help="only sessions that did not reach the end")
+    args = parser.parse_args()
+
+    for session in list_sessions(args.directory):
+        if args.unfinished and session["finished"]:
+            continue
+        status = "finished" if session["finished"] else "resumable"
+        print(f"{session['session']}  {session['started']}  {session['mode']:<12} {session['title']:<28} "
+              f"{session['records']:>4} records  {status}")
+
+
+if __name__ == "__main__":
+    main()
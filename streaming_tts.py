@@ -0,0 +1,84 @@
+import re
+import queue
+import logging
+import threading
+
+SENTENCE_END = re.compile(r'[.!?]+["\')\]]*\s+')
+ABBREVIATIONS = {"e.g.", "i.e.", "mr.", "mrs.", "ms.", "dr.", "vs.", "etc.", "inc.", "co.", "corp.", "u.s.", "no."}
+
+
+class SentenceChunker:
+    """Splits streamed text into sentences as soon as each one is complete."""
+
+    def __init__(self, min_chars=20):
+        self.min_chars = min_chars
+        self.buffer = ""
+
+    def feed(self, text):
+        """Add streamed text and return the sentences it completed."""
+        self.buffer += text
+        sentences = []
+        start = 0
+        for match in SENTENCE_END.finditer(self.buffer):
+            candidate = self.buffer[start:match.end()].strip()
+            last_word = candidate.rsplit(None, 1)[-1].lower() if candidate else ""
+            if len(candidate) < self.min_chars or last_word in ABBREVIATIONS:
+                continue
+            sentences.append(candidate)
+            start = match.end()
+        self.buffer = self.buffer[start:]
+        return sentences
+
+    def flush(self):
+        """Return whatever text is left once the stream has ended."""
+        rest, self.buffer = self.buffer.strip(), ""
+        return rest
+
+
+class StreamingSpeaker:
+    """Synthesizes sentences on one worker and plays them on another, so speech starts after the first sentence."""
+
+    def __init__(self, synthesize, play, min_chars=20):
+        self.synthesize = synthesize
+        self.play = play
+        self.chunker = SentenceChunker(min_chars)
+        self.sentences = queue.Queue()
+        self.clips = queue.Queue()
+        self.synth_thread = threading.Thread(target=self._synthesize_loop, daemon=True)
+        self.play_thread = threading.Thread(target=self._play_loop, daemon=True)
+        self.synth_thread.start()
+        self.play_thread.start()
+
+    def feed(self, text):
+        for sentence in self.chunker.feed(text):
+            self.sentences.put(sentence)
+
+    def close(self):
+        """Flush the remaining text and wait until every clip has been handed to play."""
+        rest = self.chunker.flush()
+        if rest:
+            self.sentences.put(rest)
+        self.sentences.put(None)
+        self.synth_thread.join()
+        self.play_thread.join()
+
+    def _synthesize_loop(self):
+        while True:
+            sentence = self.sentences.get()
+            if sentence is None:
+                self.clips.put(None)
+                return
+            try:
+                self.clips.put(self.synthesize(sentence))
+            except Exception as e:
+                logging.error(f"Text-to-speech failed for sentence: {e}")
+
+    def _play_loop(self):
+        while True:
+            clip = self.clips.get()
+            if clip is None:
+                return
+            try:
+                self.play(clip)
+            except Exception as e:
+                logging.error(f"Audio playback failed: {e}")
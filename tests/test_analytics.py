@@ -0,0 +1,56 @@
+import os
+import sys
+import json
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import analytics
+
+DAY = 86400.0
+
+
+def write_journal(directory, session_id, industry, turns):
+    """One chat session journal with an evaluation record per (timestamp, score) turn."""
+    with open(os.path.join(directory, f"{session_id}.jsonl"), 'w', encoding='utf-8') as f:
+        f.write(json.dumps({"type": "setup", "mode": "chat", "industry": industry}) + "\n")
+        for number, (ts, score) in enumerate(turns, 1):
+            f.write(json.dumps({"type": "evaluation", "question_number": number, "score": score, "ts": ts}) + "\n")
+
+
+def industry_rows(report):
+    return {row["group"]: row for row in report["groups"]["industry"]}
+
+
+def test_trend_needs_a_minimum_span():
+    # Two turns ten seconds apart used to report a slope of about +1e6 points per 30 days
+    codes = np.zeros(2, dtype=np.int64)
+    slopes = analytics.grouped_trends(codes, np.array([3.0, 8.0]), np.array([0.0, 10.0 / DAY]), 1,
+                                      sessions=np.array([0, 1]))
+    assert np.isnan(slopes[0])
+
+
+def test_trend_needs_several_sessions():
+    codes = np.zeros(3, dtype=np.int64)
+    days = np.array([0.0, 10.0, 20.0])
+    scores = np.array([4.0, 5.0, 6.0])
+    assert np.isnan(analytics.grouped_trends(codes, scores, days, 1, sessions=np.zeros(3, dtype=np.int64))[0])
+    slopes = analytics.grouped_trends(codes, scores, days, 1, sessions=np.array([0, 1, 2]))
+    assert np.isclose(slopes[0], 3.0)
+
+
+def test_report_only_trends_groups_with_enough_history(tmp_path):
+    journals = tmp_path / "journals"
+    journals.mkdir()
+    start = 1_700_000_000.0
+    write_journal(journals, "a", "Banking", [(start, 4.0), (start + 10, 5.0)])
+    write_journal(journals, "b", "Banking", [(start + 14 * DAY, 6.0)])
+    write_journal(journals, "c", "Consulting", [(start, 3.0), (start + 10, 8.0)])
+    archive = analytics.ScoreArchive(str(tmp_path / "archive"))
+    archive.ingest(str(journals))
+
+    rows = industry_rows(analytics.build_report(archive))
+    assert rows["Consulting"]["trend_per_30_days"] is None
+    assert rows["Banking"]["trend_per_30_days"] is not None
+    assert 0 < rows["Banking"]["trend_per_30_days"] < 10
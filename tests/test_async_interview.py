@@ -0,0 +1,57 @@
+import os
+import sys
+import asyncio
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from async_interview import AsyncAIInterviewPrep, OutputPort
+
+
+class RecordingOutput(OutputPort):
+    def __init__(self):
+        self.spoken = []
+
+    async def show(self, role, text):
+        pass
+
+    async def speak(self, audio):
+        self.spoken.append(audio.decode())
+
+
+def make_interview(output, delays):
+    interview = AsyncAIInterviewPrep(None, None, output, "Analyst", "Investment Banking", "", "")
+
+    async def synthesize_speech(text, voice="alloy", model="tts-1"):
+        await asyncio.sleep(delays.get(text, 0.0))
+        if text == "broken":
+            raise RuntimeError("tts failed")
+        return text.encode()
+
+    interview.synthesize_speech = synthesize_speech
+    return interview
+
+
+def test_speech_is_delivered_in_the_order_it_was_queued():
+    async def run():
+        output = RecordingOutput()
+        # The comment is slow to synthesize; the start message and the next question are cache hits
+        interview = make_interview(output, {"Thanks, that's a clear answer.": 0.05})
+        interview.speak_in_background("Welcome")
+        interview.speak_in_background("Thanks, that's a clear answer.")
+        interview.speak_in_background("Walk me through a DCF.")
+        await interview.text_to_speech("Goodbye")
+        return output.spoken
+
+    assert asyncio.run(run()) == ["Welcome", "Thanks, that's a clear answer.", "Walk me through a DCF.", "Goodbye"]
+
+
+def test_failed_or_cancelled_speech_does_not_block_later_speech():
+    async def run():
+        output = RecordingOutput()
+        interview = make_interview(output, {"slow": 1.0})
+        interview.speak_in_background("broken")
+        interview.speak_in_background("slow").cancel()
+        await interview.text_to_speech("next")
+        return output.spoken
+
+    assert asyncio.run(run()) == ["next"]
@@ -0,0 +1,77 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cv_index import CVIndex, build_cv_index, heading_section, split_snippets
+
+CV = """Jordan Lee
+Finance graduate focused on technology M&A
+
+WORK EXPERIENCE
+GOLDMAN SACHS
+Project Finance Intern, Summer 2023
+- Modelled the financing of a 400 MW solar project
+- Built the debt sizing model used in the
+  lenders' presentation
+Regional Bank
+Summer Analyst, 2022
+• Prepared trading comps for a $250m software sale
+
+Selected Transactions:
+1. Sale of a software company to a strategic buyer
+
+Education
+London School of Economics, BSc Economics
+"""
+
+
+def test_headings_need_a_section_name_or_a_colon():
+    assert heading_section("WORK EXPERIENCE") == "experience"
+    assert heading_section("Skills & Interests") == "skills"
+    assert heading_section("Selected Transactions:") == "deals"
+    assert heading_section("Awards:") == "other"
+    assert heading_section("GOLDMAN SACHS") is None
+    assert heading_section("Project Finance Intern") is None
+    assert heading_section("- Experience:") is None
+    assert heading_section("Summer 2023 Projects:") is None
+
+
+def test_snippets_keep_section_heading_and_entry_title():
+    snippets = split_snippets(CV)
+    assert snippets[0] == {"section": "summary", "heading": None, "title": None,
+                           "text": "Jordan Lee Finance graduate focused on technology M&A"}
+    solar = snippets[1]
+    assert solar["section"] == "experience"
+    assert solar["heading"] == "WORK EXPERIENCE"
+    assert solar["title"] == "GOLDMAN SACHS Project Finance Intern, Summer 2023"
+    # A wrapped bullet continues the previous snippet
+    assert snippets[2]["text"] == "Built the debt sizing model used in the lenders' presentation"
+    assert snippets[3]["title"] == "Regional Bank Summer Analyst, 2022"
+    assert snippets[4] == {"section": "deals", "heading": "Selected Transactions", "title": None,
+                           "text": "Sale of a software company to a strategic buyer"}
+    assert snippets[5]["section"] == "education"
+
+
+def test_long_entries_are_split_into_bounded_snippets():
+    snippets = split_snippets("EXPERIENCE\n" + " ".join(["word"] * 130))
+    assert [len(snippet["text"].split()) for snippet in snippets] == [60, 60, 10]
+
+
+def test_search_matches_employer_and_heading_text():
+    index = CVIndex(CV)
+    assert index.snippets[index.search("Goldman Sachs solar", 1)[0]]["title"].startswith("GOLDMAN SACHS")
+    assert index.snippets[index.search("selected transactions", 1)[0]]["section"] == "deals"
+    rendered = index.render("solar financing", 1)
+    assert rendered.splitlines()[0] == "[experience] GOLDMAN SACHS Project Finance Intern, Summer 2023"
+
+
+def test_outline_is_headed_by_the_digest_when_given():
+    index = CVIndex(CV)
+    assert index.outline().startswith("Jordan Lee Finance graduate")
+    assert index.outline("Digest of the CV").startswith("Digest of the CV\n")
+
+
+def test_short_cvs_are_not_indexed():
+    assert build_cv_index(CV, min_tokens=800) is None
+    assert build_cv_index(CV, min_tokens=10) is not None
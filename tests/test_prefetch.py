@@ -0,0 +1,44 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from prefetch import QuestionPrefetcher, direction_changed
+
+CV = "Summer Analyst, Regional Bank M&A (2023): built DCF and trading comps for a $250m software sale."
+
+
+def test_answer_on_the_question_topic_keeps_the_prefetched_question():
+    prefetcher = QuestionPrefetcher(lambda number, context: f"Question {number}")
+    prefetcher.speculate(3, "", "Which deals have you worked on?")
+    prefetcher.resolve("I worked on a deal for a software company and built the DCF.", True, CV)
+    assert prefetcher.take(3) == "Question 3"
+    assert prefetcher.stats()["hits"] == 1
+    prefetcher.close()
+
+
+def test_opening_answer_is_not_held_to_the_question_wording():
+    prefetcher = QuestionPrefetcher(lambda number, context: f"Question {number}")
+    # The opening question is open-ended, so main passes no anchor for it
+    prefetcher.speculate(2, "", None)
+    prefetcher.resolve("I studied finance and spent last summer in M&A on a software sale.", True, CV)
+    assert prefetcher.take(2) == "Question 2"
+    prefetcher.close()
+
+
+def test_plurals_count_as_overlap():
+    assert not direction_changed("Tell me about the deals you closed.", "One deal stood out.", CV)
+
+
+def test_unrelated_answer_or_new_names_change_direction():
+    assert direction_changed("How would you value a bank?", "I enjoy hiking at weekends.", CV)
+    assert direction_changed(None, "At Goldman I worked with Morgan Stanley on the Vodafone listing.", CV)
+
+
+def test_failed_answer_discards_the_prefetched_question():
+    prefetcher = QuestionPrefetcher(lambda number, context: f"Question {number}")
+    prefetcher.speculate(3, "", "Which deals have you worked on?")
+    prefetcher.resolve("I worked on a deal.", False, CV)
+    assert prefetcher.take(3) is None
+    assert prefetcher.stats() == {"hits": 0, "misses": 1, "hit_ratio": 0.0}
+    prefetcher.close()
@@ -0,0 +1,118 @@
+import os
+import sys
+import json
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import prompts
+
+REPLY = {
+    "response_quality": True,
+    "interviewer_response": "Thanks, that's a clear \"walk-through\" of the DCF.\nNice.",
+    "score": 7.5,
+    "strengths": "Structure \\ clarity",
+    "improvement_areas": "Terminal value"
+}
+
+
+def stream(text, chunk_size):
+    """Feed text in chunks of chunk_size; returns the parser and the (name, value) fields in the order reported."""
+    events = []
+    parser = prompts.StreamingEvaluationParser(lambda name, value: events.append((name, value)))
+    for start in range(0, len(text), chunk_size):
+        parser.feed(text[start:start + chunk_size])
+    return parser, events
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 1000])
+def test_fields_are_reported_in_order_however_the_stream_is_split(chunk_size):
+    # Chunk sizes 1-3 split keys, numbers, literals and escape sequences across feeds
+    parser, events = stream(json.dumps(REPLY), chunk_size)
+    assert events == list(REPLY.items())
+    assert parser.fields == REPLY
+    parsed, errors = parser.result()
+    assert errors == []
+    assert parsed["interviewer_response"] == REPLY["interviewer_response"]
+    assert parsed["score"] == 7.5
+
+
+def test_a_chunk_ending_in_a_backslash_does_not_end_the_string():
+    parser, events = stream('{"interviewer_response": "a \\', 1000)
+    parser.feed('" quote", "score": 3}')
+    assert events == [("interviewer_response", 'a " quote'), ("score", 3)]
+
+
+def test_nested_values_are_reported_whole():
+    text = '{"strengths": {"points": ["a", {"b": "}"}], "n": 1}, "score": 4, "improvement_areas": []}'
+    _, events = stream(text, 1)
+    assert events == [("strengths", {"points": ["a", {"b": "}"}], "n": 1}), ("score", 4), ("improvement_areas", [])]
+
+
+def test_code_fences_around_the_object_are_skipped():
+    text = "```json\n" + json.dumps(REPLY) + "\n```"
+    parser, events = stream(text, 5)
+    assert events == list(REPLY.items())
+    assert parser.result()[1] == []
+
+
+def test_truncated_stream_keeps_the_completed_fields():
+    text = json.dumps(REPLY)
+    parser, events = stream(text[:text.index('"score"') + 12], 4)
+    assert [name for name, _ in events] == ["response_quality", "interviewer_response"]
+    with pytest.raises(prompts.EvaluationFormatError):
+        parser.result()
+    parsed, errors = prompts.validate_evaluation(parser.fields)
+    assert parsed["interviewer_response"] == REPLY["interviewer_response"]
+    assert parsed["score"] is None
+    assert "score missing or invalid" in errors
+
+
+def test_a_reply_without_json_is_a_format_error():
+    parser, events = stream("I cannot evaluate this answer.", 3)
+    assert events == []
+    with pytest.raises(prompts.EvaluationFormatError):
+        parser.result()
+
+
+def released_comments(reply, chunk_size=3):
+    released = []
+    parser = prompts.StreamingEvaluationParser(
+        lambda name, value: released.append(prompts.releasable_comment(name, value, parser.fields)))
+    for start in range(0, len(reply), chunk_size):
+        parser.feed(reply[start:start + chunk_size])
+    return [comment for comment in released if comment]
+
+
+def test_comment_is_released_once_response_quality_is_true():
+    assert released_comments(json.dumps(REPLY)) == [REPLY["interviewer_response"].strip()]
+
+
+def test_comment_is_held_when_the_answer_is_irrelevant_or_quality_comes_later():
+    assert released_comments(json.dumps({**REPLY, "response_quality": False})) == []
+    reordered = {"interviewer_response": "Good.", "response_quality": True, "score": 5}
+    assert released_comments(json.dumps(reordered)) == []
+    assert released_comments(json.dumps({"response_quality": "yes", "interviewer_response": "Good."})) == []
+    assert released_comments(json.dumps({"response_quality": True, "interviewer_response": "  "})) == []
+
+
+def test_invalid_fields_fall_back_field_by_field():
+    parsed, errors = prompts.validate_evaluation({"response_quality": True, "interviewer_response": "Fine.",
+                                                  "score": 11, "strengths": "s", "improvement_areas": "i"})
+    assert parsed["score"] is None and errors == ["score missing or invalid"]
+    parsed, errors = prompts.validate_evaluation({"score": True})
+    assert parsed["score"] is None
+    assert parsed["interviewer_response"] == prompts.FALLBACK_RESPONSE
+    # A broken reply never sends the candidate back to re-answer
+    assert parsed["response_quality"] is True
+    parsed, errors = prompts.validate_evaluation(["not", "an", "object"])
+    assert errors[0] == "not a JSON object"
+
+
+def test_next_question_is_validated_only_when_requested():
+    reply = {**REPLY, "next_question": "  What is WACC?  "}
+    assert prompts.validate_evaluation(reply)[0]["next_question"] is None
+    parsed, errors = prompts.validate_evaluation(reply, with_next_question=True)
+    assert parsed["next_question"] == "What is WACC?" and errors == []
+    assert "next_question missing or invalid" in prompts.validate_evaluation(REPLY, with_next_question=True)[1]
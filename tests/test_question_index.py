@@ -0,0 +1,54 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from question_index import QuestionIndex, shingles
+
+
+def index_of(*questions, threshold=0.7):
+    index = QuestionIndex(threshold=threshold)
+    for question in questions:
+        index.add(question)
+    return index
+
+
+def test_same_template_on_a_different_topic_is_not_a_repeat():
+    index = index_of("Walk me through a DCF.", "Can you walk me through a DCF analysis?")
+    assert index.closest("Walk me through an LBO.")[0] == 0.0
+    assert index.duplicate_of("Can you walk me through an LBO analysis?") is None
+
+
+def test_rephrasings_are_repeats():
+    index = index_of("Walk me through a DCF analysis.", "Why do you want to work in investment banking?",
+                     "Tell me about a time you worked in a team.")
+    assert index.duplicate_of("Could you explain how a DCF analysis works?") == "Walk me through a DCF analysis."
+    assert index.duplicate_of("Why are you interested in investment banking?") is not None
+    assert index.duplicate_of("Describe a time when you worked on a team.") is not None
+    assert index.stats() == {"questions": 3, "checked": 3, "rejected": 3}
+
+
+def test_short_terms_weigh_as_much_as_long_ones():
+    weights = shingles("DCF depreciation")
+    assert abs(sum(weight for gram, weight in weights.items() if "dcf" in gram) - 1.0) < 1e-9
+    assert abs(sum(weights.values()) - 2.0) < 1e-9
+
+
+def test_partial_question_needs_enough_content_before_it_is_judged():
+    index = index_of("Walk me through a DCF analysis for a software company.")
+    assert not index.judgeable("Great answer.")
+    assert index.duplicate_of("Great answer.", partial=True) is None
+    assert index.stats()["checked"] == 0
+    assert index.duplicate_of("Great answer. Walk me through a DCF analysis.", partial=True) is not None
+
+
+def test_threshold_comes_from_the_environment(monkeypatch):
+    monkeypatch.setenv("QUESTION_SIMILARITY", "0.9")
+    assert QuestionIndex().threshold == 0.9
+    monkeypatch.delenv("QUESTION_SIMILARITY")
+    assert QuestionIndex().threshold == 0.7
+
+
+def test_question_without_topic_words_matches_nothing():
+    index = index_of("Walk me through a DCF.")
+    assert index.closest("Can you walk me through it?") == (0.0, None)
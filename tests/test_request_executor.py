@@ -0,0 +1,181 @@
+import os
+import sys
+import time
+import asyncio
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from request_executor import AsyncRequestExecutor, RequestExecutor, RequestFailed, StagePolicy, _close_discarded
+
+
+def policies(**overrides):
+    settings = dict(deadline=5.0, attempt_timeout=2.0, retries=2, backoff=0.0)
+    settings.update(overrides)
+    return {"stage": StagePolicy(**settings)}
+
+
+class Response:
+    def __init__(self, name):
+        self.name = name
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class Flaky:
+    """Raises the given errors on successive calls, then returns a Response; records each call's timeout."""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.timeouts = []
+        self._lock = threading.Lock()
+
+    def __call__(self, timeout, **kwargs):
+        with self._lock:
+            self.timeouts.append(timeout)
+            error = self.errors.pop(0) if self.errors else None
+        if error is not None:
+            raise error
+        return Response(kwargs.get("name"))
+
+
+def test_retryable_errors_are_retried_until_success():
+    executor = RequestExecutor(policies())
+    fn = Flaky(TimeoutError("slow"), TimeoutError("slow"))
+    assert executor.call("stage", fn, name="ok").name == "ok"
+    stats = executor.stats()["stage"]
+    assert (stats["calls"], stats["attempts"], stats["retries"], stats["failures"]) == (1, 3, 2, 0)
+    assert all(timeout <= 2.0 for timeout in fn.timeouts)
+    executor.close()
+
+
+def test_other_errors_fail_without_retrying():
+    executor = RequestExecutor(policies())
+    with pytest.raises(RequestFailed) as raised:
+        executor.call("stage", Flaky(ValueError("bad request")))
+    assert raised.value.stage == "stage"
+    stats = executor.stats()["stage"]
+    assert (stats["attempts"], stats["retries"], stats["failures"], stats["timeouts"]) == (1, 0, 1, 0)
+    executor.close()
+
+
+def test_exhausted_retries_raise_request_failed():
+    executor = RequestExecutor(policies(retries=1))
+    with pytest.raises(RequestFailed):
+        executor.call("stage", Flaky(TimeoutError("a"), TimeoutError("b"), TimeoutError("c")))
+    assert executor.stats()["stage"]["attempts"] == 2
+    executor.close()
+
+
+def test_attempt_that_outlives_its_timeout_is_abandoned():
+    executor = RequestExecutor(policies(deadline=0.5, attempt_timeout=0.2, retries=0))
+
+    def hang(timeout):
+        time.sleep(0.4)
+        return Response("late")
+
+    started = time.perf_counter()
+    with pytest.raises(RequestFailed):
+        executor.call("stage", hang)
+    assert time.perf_counter() - started < 0.35
+    executor.close()
+
+
+def test_slow_request_is_hedged_and_the_losing_response_is_closed():
+    executor = RequestExecutor(policies(hedge=True, hedge_after=0.05, retries=0))
+    responses = []
+
+    def request(timeout):
+        slow = not responses
+        response = Response("slow" if slow else "fast")
+        responses.append(response)
+        time.sleep(0.3 if slow else 0.0)
+        return response
+
+    assert executor.call("stage", request).name == "fast"
+    stats = executor.stats()["stage"]
+    assert (stats["attempts"], stats["hedges"], stats["hedge_wins"]) == (2, 1, 1)
+    time.sleep(0.4)
+    assert responses[0].closed and not responses[1].closed
+    executor.close()
+
+
+def test_hedge_delay_follows_the_observed_p95_once_there_are_enough_samples():
+    executor = RequestExecutor({"stage": StagePolicy(deadline=5.0, attempt_timeout=2.0, hedge_after=3.0,
+                                                     min_hedge_samples=20)})
+    assert executor.hedge_delay("stage") == 3.0
+    for index in range(20):
+        executor._observe("stage", index / 10)
+    assert executor.hedge_delay("stage") == 1.9
+    executor.close()
+
+
+def test_async_retries_and_hedging():
+    async def run():
+        executor = AsyncRequestExecutor(policies(hedge=True, hedge_after=0.05))
+        calls = []
+
+        async def request(timeout):
+            calls.append(timeout)
+            if len(calls) == 1:
+                raise TimeoutError("first attempt failed")
+            if len(calls) == 2:
+                # The retry is slow, so it is hedged; the hedge wins and the slow attempt is cancelled
+                await asyncio.sleep(1.0)
+                return Response("slow")
+            return Response("fast")
+
+        result = await executor.call("stage", request)
+        return result.name, executor.stats()["stage"]
+
+    name, stats = asyncio.run(run())
+    assert name == "fast"
+    assert (stats["attempts"], stats["retries"], stats["hedges"], stats["hedge_wins"]) == (3, 1, 1, 1)
+
+
+def test_async_losing_request_in_flight_is_cancelled():
+    async def run():
+        executor = AsyncRequestExecutor(policies(hedge=True, hedge_after=0.05, retries=0))
+        started, finished = [], []
+
+        async def request(timeout):
+            name = "fast" if started else "slow"
+            started.append(name)
+            await asyncio.sleep(0.5 if name == "slow" else 0.0)
+            finished.append(name)
+            return Response(name)
+
+        result = await executor.call("stage", request)
+        await asyncio.sleep(0.6)
+        return result.name, finished
+
+    name, finished = asyncio.run(run())
+    assert name == "fast"
+    assert finished == ["fast"]
+
+
+def test_discarded_attempts_that_already_returned_are_closed():
+    class AsyncResponse(Response):
+        def close(self):
+            async def closing():
+                self.closed = True
+            return closing()
+
+    async def run():
+        async def respond(response):
+            return response
+
+        sync_response, async_response = Response("sync"), AsyncResponse("async")
+        for response in (sync_response, async_response):
+            task = asyncio.ensure_future(respond(response))
+            await task
+            _close_discarded(task)
+        await asyncio.sleep(0)
+        return sync_response, async_response
+
+    sync_response, async_response = asyncio.run(run())
+    assert sync_response.closed and async_response.closed
@@ -0,0 +1,74 @@
+import os
+import sys
+import types
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import prompts
+from context_manager import estimate_tokens
+from cv_index import CVIndex
+
+
+def session(cv, cv_index=None):
+    return types.SimpleNamespace(job_position="Analyst", industry="Investment Banking", industry_coverage="",
+                                 vertical="", job_description="Builds valuation models.", candidate_cv=cv,
+                                 cv_digest="", cv_index=cv_index)
+
+
+def suffix(history):
+    return prompts.build_question_suffix(3, history)
+
+
+def total(sections):
+    return sum(sections.values())
+
+
+def test_prompt_under_budget_is_left_alone():
+    budget = prompts.TokenBudget(max_prompt_tokens=4000, cv_snippets=4)
+    messages, sections = budget.build_messages(session("Analyst at a bank."), suffix, "Q: Why banking? A: Deals.")
+    assert "Q: Why banking? A: Deals." in messages[2]["content"]
+    assert "Analyst at a bank." in messages[1]["content"]
+    assert total(sections) <= 4000
+    assert budget.stats()["history_compactions"] == 0 and budget.stats()["cv_limit"] is None
+
+
+def test_history_is_compacted_before_the_cv():
+    budget = prompts.TokenBudget(max_prompt_tokens=1500, cv_snippets=4)
+    history = "Q: Tell me about a deal. A: " + "We modelled the synergies carefully. " * 300
+    messages, sections = budget.build_messages(session("Analyst at a bank. " * 20), suffix, history)
+    assert total(sections) <= 1500
+    assert sections["history"] < estimate_tokens(history)
+    assert budget.stats()["history_compactions"] == 1
+    assert budget.stats()["cv_truncations"] == 0
+
+
+def test_cv_truncation_is_sticky_so_the_profile_stays_cacheable():
+    budget = prompts.TokenBudget(max_prompt_tokens=1500, min_cv_tokens=300, cv_snippets=4)
+    cv = "Built a DCF for a software sale. " * 400
+    first, sections = budget.build_messages(session(cv), suffix, "Q: Why banking? A: Deals.")
+    assert total(sections) <= 1500
+    assert first[1]["content"].rstrip().endswith("[...]")
+    limit = budget.stats()["cv_limit"]
+    assert limit is not None and limit % 256 == 0
+    # A later, shorter prompt keeps the same truncated profile message
+    second, _ = budget.build_messages(session(cv), suffix, "")
+    assert second[1]["content"] == first[1]["content"]
+    assert budget.stats()["cv_truncations"] == 1
+
+
+def test_indexed_cv_sends_excerpts_instead_of_being_truncated():
+    cv = "Jordan Lee\n\nEXPERIENCE\n" + "\n".join(f"- Deal {i}: built the DCF for a software sale" for i in range(200))
+    index = CVIndex(cv)
+    budget = prompts.TokenBudget(max_prompt_tokens=1500, cv_snippets=3)
+    messages, sections = budget.build_messages(session(cv, index), suffix, "", query="software DCF")
+    assert "Relevant CV excerpts:" in messages[2]["content"]
+    assert messages[2]["content"].count("  - Deal") == 3
+    assert "Sections: experience (200 snippets)" in messages[1]["content"]
+    assert budget.stats()["cv_truncations"] == 0
+    assert sections["cv"] < estimate_tokens(cv)
+
+
+def test_prompt_that_cannot_fit_is_counted():
+    budget = prompts.TokenBudget(max_prompt_tokens=200, min_history_tokens=150, min_cv_tokens=300, cv_snippets=4)
+    budget.build_messages(session("Analyst at a bank."), suffix, "Q: Why banking? A: Deals.")
+    assert budget.stats()["over_budget"] == 1
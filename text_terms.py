@@ -0,0 +1,23 @@
+import re
+
+STOP_WORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "but", "by", "can", "could", "did", "do", "does", "for",
+    "from", "had", "has", "have", "how", "i", "if", "in", "into", "is", "it", "its", "me", "my", "of", "on",
+    "or", "our", "so", "that", "the", "their", "them", "then", "there", "these", "they", "this", "to", "us",
+    "was", "we", "were", "what", "when", "where", "which", "while", "who", "why", "will", "with", "would",
+    "you", "your", "about", "tell", "more", "some", "also", "just", "been", "very", "really"
+}
+WORD_PATTERN = re.compile(r"[A-Za-z][A-Za-z&'-]+|\d+(?:\.\d+)?%?")
+
+
+def tokenize(text):
+    """Lowercased content words with a plural "s" folded, so "deals" matches "deal"."""
+    tokens = []
+    for word in WORD_PATTERN.findall(text):
+        word = word.lower()
+        if word in STOP_WORDS:
+            continue
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        tokens.append(word)
+    return tokens
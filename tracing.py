@@ -0,0 +1,183 @@
+import os
+import json
+import time
+import uuid
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class Histogram:
+    """Cumulative latency histogram in the Prometheus bucket layout."""
+
+    BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+    def __init__(self):
+        self.counts = [0] * len(self.BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds):
+        self.count += 1
+        self.sum += seconds
+        for index, bound in enumerate(self.BUCKETS):
+            if seconds <= bound:
+                self.counts[index] += 1
+
+    def render(self, name, labels):
+        label_text = ",".join(f'{key}="{value}"' for key, value in labels.items())
+        lines = [f'{name}_bucket{{{label_text},le="{bound}"}} {count}' for bound, count in zip(self.BUCKETS, self.counts)]
+        lines.append(f'{name}_bucket{{{label_text},le="+Inf"}} {self.count}')
+        lines.append(f'{name}_sum{{{label_text}}} {self.sum:.6f}')
+        lines.append(f'{name}_count{{{label_text}}} {self.count}')
+        return lines
+
+
+class TraceRegistry:
+    """Process-wide aggregate and per-session stage histograms fed by every Tracer."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.aggregate = {}
+        self.sessions = {}
+
+    def observe(self, session_id, stage, seconds):
+        with self._lock:
+            self.aggregate.setdefault(stage, Histogram()).observe(seconds)
+            self.sessions.setdefault((session_id, stage), Histogram()).observe(seconds)
+
+    def forget(self, session_id):
+        """Drop a finished session's histograms; the aggregate keeps its samples."""
+        with self._lock:
+            for key in [key for key in self.sessions if key[0] == session_id]:
+                del self.sessions[key]
+
+    def render_prometheus(self):
+        lines = [
+            "# HELP interview_stage_seconds Duration of each interview stage across all sessions.",
+            "# TYPE interview_stage_seconds histogram"
+        ]
+        with self._lock:
+            for stage, histogram in sorted(self.aggregate.items()):
+                lines.extend(histogram.render("interview_stage_seconds", {"stage": stage}))
+            lines.append("# HELP interview_session_stage_seconds Duration of each interview stage per session.")
+            lines.append("# TYPE interview_session_stage_seconds histogram")
+            for (session_id, stage), histogram in sorted(self.sessions.items()):
+                lines.extend(histogram.render("interview_session_stage_seconds", {"session": session_id, "stage": stage}))
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = TraceRegistry()
+
+
+class Span:
+    """Times one stage; attributes such as sizes can be added with set() before the span ends."""
+
+    def __init__(self, tracer, stage, attrs):
+        self.tracer = tracer
+        self.stage = stage
+        self.attrs = attrs
+        self.start = None
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        self.tracer.record(self.stage, time.perf_counter() - self.start, **self.attrs)
+        return False
+
+
+class Tracer:
+    """Per-session span recorder; spans go to the shared registry and, if TRACE_FILE is set, to a JSON lines file."""
+
+    def __init__(self, session_id=None, path=None, registry=REGISTRY):
+        self.session_id = session_id if session_id else uuid.uuid4().hex[:12]
+        self.path = path if path is not None else os.environ.get('TRACE_FILE')
+        self.registry = registry
+        self.turn = 0
+        self.durations = {}
+        self._lock = threading.Lock()
+        self._file = open(self.path, 'a', encoding='utf-8') if self.path else None
+
+    def span(self, stage, **attrs):
+        return Span(self, stage, attrs)
+
+    def record(self, stage, seconds, **attrs):
+        """Record a stage whose start and end were observed separately (e.g. in different callbacks)."""
+        entry = {
+            "ts": time.time() - seconds,
+            "session": self.session_id,
+            "turn": self.turn,
+            "stage": stage,
+            "seconds": round(seconds, 6),
+            **attrs
+        }
+        with self._lock:
+            self.durations.setdefault(stage, []).append(seconds)
+            if self._file is not None:
+                try:
+                    self._file.write(json.dumps(entry) + "\n")
+                    self._file.flush()
+                except (OSError, ValueError) as e:
+                    logging.error(f"Could not write trace span: {e}")
+        self.registry.observe(self.session_id, stage, seconds)
+
+    def summary(self):
+        summary = {}
+        with self._lock:
+            for stage, samples in self.durations.items():
+                ordered = sorted(samples)
+                summary[stage] = {
+                    "count": len(ordered),
+                    "total_seconds": sum(ordered),
+                    "p50": ordered[len(ordered) // 2],
+                    "p95": ordered[min(int(len(ordered) * 0.95), len(ordered) - 1)]
+                }
+        return summary
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def serve_metrics(port, registry=REGISTRY, host="127.0.0.1"):
+    """Serve registry.render_prometheus() at /metrics from a daemon thread; returns the HTTP server."""
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            return
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def start_metrics_server_from_env():
+    """Start serve_metrics() when METRICS_PORT is set; returns the server or None."""
+    port = os.environ.get('METRICS_PORT')
+    if not port:
+        return None
+    try:
+        return serve_metrics(int(port))
+    except OSError as e:
+        logging.error(f"Could not start metrics endpoint on port {port}: {e}")
+        return None
@@ -0,0 +1,170 @@
+import os
+import time
+import hashlib
+import logging
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import speech_recognition as sr
+
+
+class TranscriptionBackend:
+    """A speech-to-text engine; transcribe() returns text, raises sr.UnknownValueError if nothing was understood."""
+
+    name = "base"
+
+    def transcribe(self, audio):
+        raise NotImplementedError
+
+
+class GoogleBackend(TranscriptionBackend):
+    """Google Web Speech API (network round-trip per call)."""
+
+    name = "google"
+
+    def __init__(self):
+        self.recognizer = sr.Recognizer()
+
+    def transcribe(self, audio):
+        return self.recognizer.recognize_google(audio)
+
+
+class SphinxBackend(TranscriptionBackend):
+    """CMU PocketSphinx, fully offline (requires the pocketsphinx package)."""
+
+    name = "sphinx"
+
+    def __init__(self):
+        self.recognizer = sr.Recognizer()
+
+    def transcribe(self, audio):
+        return self.recognizer.recognize_sphinx(audio)
+
+
+class LocalStubBackend(TranscriptionBackend):
+    """Deterministic local stand-in for benchmarks: known clips map to scripted text, others to a fixed label."""
+
+    name = "local"
+
+    def __init__(self, transcripts=None):
+        self.transcripts = transcripts if transcripts else {}
+
+    @staticmethod
+    def clip_key(audio):
+        return hashlib.sha1(audio.frame_data).hexdigest()
+
+    def register(self, audio, text):
+        self.transcripts[self.clip_key(audio)] = text
+
+    def transcribe(self, audio):
+        if not audio.frame_data:
+            raise sr.UnknownValueError()
+        key = self.clip_key(audio)
+        if key in self.transcripts:
+            return self.transcripts[key]
+        seconds = len(audio.frame_data) / (audio.sample_rate * audio.sample_width)
+        return f"local transcript {key[:8]} ({seconds:.1f}s)"
+
+
+BACKENDS = {
+    GoogleBackend.name: GoogleBackend,
+    SphinxBackend.name: SphinxBackend,
+    LocalStubBackend.name: LocalStubBackend
+}
+
+
+class TranscriptionService:
+    """Runs transcriptions on a worker pool, falling back through backends in order, with per-backend latency metrics."""
+
+    def __init__(self, backends, workers=2, tracer=None):
+        self.backends = backends
+        self.tracer = tracer
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="transcription")
+        self.latencies = {backend.name: [] for backend in backends}
+        self.errors = {backend.name: 0 for backend in backends}
+        self._lock = threading.Lock()
+
+    def transcribe(self, audio):
+        """Return the first backend's transcript, or None if the speech was not understood or every backend failed."""
+        for backend in self.backends:
+            start_time = time.time()
+            try:
+                text = backend.transcribe(audio)
+                self._record(backend.name, time.time() - start_time, audio, recognized=True)
+                return text
+            except sr.UnknownValueError:
+                self._record(backend.name, time.time() - start_time, audio, recognized=False)
+                logging.debug(f"{backend.name} could not understand audio")
+                return None
+            except Exception as e:
+                with self._lock:
+                    self.errors[backend.name] += 1
+                if self.tracer is not None:
+                    self.tracer.record("stt", time.time() - start_time, backend=backend.name,
+                                       bytes=len(audio.frame_data), error=type(e).__name__)
+                logging.error(f"{backend.name} transcription failed: {e}")
+        return None
+
+    def transcribe_pcm(self, pcm, rate, sample_width=2):
+        return self.transcribe(sr.AudioData(pcm, rate, sample_width))
+
+    def submit(self, audio):
+        """Transcribe on the worker pool; returns a Future resolving to the transcript or None."""
+        return self.executor.submit(self.transcribe, audio)
+
+    def _record(self, name, seconds, audio, recognized):
+        with self._lock:
+            self.latencies[name].append(seconds)
+        if self.tracer is not None:
+            self.tracer.record("stt", seconds, backend=name, bytes=len(audio.frame_data), recognized=recognized)
+
+    def stats(self):
+        stats = {}
+        with self._lock:
+            for name, samples in self.latencies.items():
+                ordered = sorted(samples)
+                stats[name] = {
+                    "calls": len(ordered),
+                    "errors": self.errors[name],
+                    "p50": ordered[len(ordered) // 2] if ordered else None,
+                    "p95": ordered[min(int(len(ordered) * 0.95), len(ordered) - 1)] if ordered else None
+                }
+        return stats
+
+    def close(self, wait=False):
+        self.executor.shutdown(wait=wait)
+
+
+def create_service(names=None, workers=2, tracer=None):
+    """Build a service from a comma-separated backend list, defaulting to TRANSCRIPTION_BACKENDS or 'google'."""
+    if names is None:
+        names = os.environ.get('TRANSCRIPTION_BACKENDS', GoogleBackend.name)
+    backends = []
+    for name in names.split(","):
+        name = name.strip()
+        if name not in BACKENDS:
+            raise ValueError(f"Unknown transcription backend: {name}")
+        backends.append(BACKENDS[name]())
+    return TranscriptionService(backends, workers, tracer)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark transcription backends on a WAV file.")
+    parser.add_argument("wav_file")
+    parser.add_argument("--backends", default="local")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with sr.AudioFile(args.wav_file) as source:
+        audio = sr.Recognizer().record(source)
+    for name in args.backends.split(","):
+        service = create_service(name, workers=1)
+        text = None
+        for _ in range(args.repeat):
+            text = service.transcribe(audio)
+        print(f"{name}: {service.stats()[name.strip()]} -> {text!r}")
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
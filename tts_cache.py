@@ -0,0 +1,139 @@
+import os
+import hashlib
+import logging
+import argparse
+import threading
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "ai_interview_prep", "tts")
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+class TTSCache:
+    """Content-addressed on-disk cache of synthesized speech, keyed by (text, voice, model), with LRU eviction."""
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.total_bytes = sum(size for _, _, size in self._entries())
+
+    @staticmethod
+    def key(text, voice, model):
+        return hashlib.sha256(f"{model}\0{voice}\0{text.strip()}".encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.mp3")
+
+    def _entries(self):
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_file() and entry.name.endswith(".mp3"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, entry.path, stat.st_size))
+        return entries
+
+    def get(self, text, voice, model):
+        """Return cached audio bytes or None; a hit refreshes the entry's position in the LRU order."""
+        path = self._path(self.key(text, voice, model))
+        try:
+            with open(path, 'rb') as f:
+                audio = f.read()
+            os.utime(path)
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+            self.bytes_saved += len(audio)
+        return audio
+
+    def put(self, text, voice, model, audio):
+        path = self._path(self.key(text, voice, model))
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            existed = os.path.exists(path)
+            with open(tmp_path, 'wb') as f:
+                f.write(audio)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logging.warning(f"Could not cache synthesized speech: {e}")
+            return
+        if not existed:
+            with self._lock:
+                self.total_bytes += len(audio)
+        if self.total_bytes > self.max_bytes:
+            self.evict()
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits within max_bytes."""
+        with self._lock:
+            entries = sorted(self._entries())
+            total = sum(size for _, _, size in entries)
+            for _, path, size in entries:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                except OSError:
+                    pass
+            self.total_bytes = total
+
+    def synthesize(self, client, text, voice="alloy", model="tts-1", executor=None):
+        """Return speech for text from the cache, calling the TTS API only on a miss (through executor, if given)."""
+        audio = self.get(text, voice, model)
+        if audio is not None:
+            return audio
+        if executor is not None:
+            response = executor.call("tts", client.audio.speech.create, model=model, voice=voice, input=text.strip())
+        else:
+            response = client.audio.speech.create(model=model, voice=voice, input=text.strip())
+        audio = response.content
+        self.put(text, voice, model, audio)
+        return audio
+
+    def prewarm(self, client, phrases, voice="alloy", model="tts-1"):
+        """Synthesize and store phrases that are not cached yet."""
+        for phrase in phrases:
+            if os.path.exists(self._path(self.key(phrase, voice, model))):
+                continue
+            self.synthesize(client, phrase, voice, model)
+            logging.info(f"Cached speech for: {phrase}")
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "bytes_saved": self.bytes_saved,
+            "cache_bytes": self.total_bytes
+        }
+
+
+def main():
+    from openai import OpenAI
+    import prompts
+
+    parser = argparse.ArgumentParser(description="Manage the on-disk text-to-speech cache.")
+    parser.add_argument("--prewarm", action="store_true", help="synthesize the app's fixed phrases")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    parser.add_argument("--max-mb", type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024))
+    parser.add_argument("--voice", default="alloy")
+    parser.add_argument("--model", default="tts-1")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    cache = TTSCache(args.cache_dir, args.max_mb * 1024 * 1024)
+    if args.prewarm:
+        cache.prewarm(OpenAI(), prompts.FIXED_PHRASES, args.voice, args.model)
+    print(f"{len(cache._entries())} cached clips, {cache.total_bytes} bytes in {cache.cache_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+import numpy as np
+
+
+def frame_features(pcm, rate, frame_ms=30):
+    """RMS energy and zero-crossing rate of each complete frame of 16-bit mono PCM."""
+    samples = np.frombuffer(pcm, dtype=np.int16)
+    frame_len = rate * frame_ms // 1000
+    count = len(samples) // frame_len
+    frames = samples[:count * frame_len].reshape(count, frame_len).astype(np.float32)
+    energy = np.sqrt(np.mean(frames * frames, axis=1)) if count else np.zeros(0, dtype=np.float32)
+    signs = np.signbit(frames)
+    zcr = np.mean(signs[:, 1:] != signs[:, :-1], axis=1) if count else np.zeros(0)
+    return energy, zcr
+
+
+class EndpointDetector:
+    """Energy and zero-crossing voice activity detector that signals end of speech after trailing silence.
+
+    If no speech at all has been heard after no_speech_ms, it gives up and signals with no_speech set instead.
+    """
+
+    def __init__(self, rate, frame_ms=30, trailing_silence_ms=800, min_speech_ms=200,
+                 energy_ratio=3.0, min_energy=300.0, fricative_zcr=0.25, calibration_ms=300, tail_ms=150,
+                 no_speech_ms=12000):
+        self.rate = rate
+        self.frame_ms = frame_ms
+        self.frame_bytes = rate * frame_ms // 1000 * 2
+        self.trailing_silence_frames = max(trailing_silence_ms // frame_ms, 1)
+        self.min_speech_frames = max(min_speech_ms // frame_ms, 1)
+        self.calibration_frames = max(calibration_ms // frame_ms, 1)
+        self.tail_frames = tail_ms // frame_ms
+        self.no_speech_frames = max(no_speech_ms // frame_ms, 1)
+        self.energy_ratio = energy_ratio
+        self.min_energy = min_energy
+        self.fricative_zcr = fricative_zcr
+        self.reset()
+
+    def reset(self):
+        self._carry = b""
+        self._calibration = []
+        self.noise_floor = None
+        self.frames_seen = 0
+        self.speech_frames = 0
+        self.silent_run = 0
+        self.last_speech_frame = None
+        self.endpoint = False
+        self.no_speech = False
+
+    def threshold(self):
+        if self.noise_floor is None:
+            return self.min_energy
+        return max(self.min_energy, self.noise_floor * self.energy_ratio)
+
+    def is_speech(self, energy, zcr):
+        threshold = self.threshold()
+        # Unvoiced consonants are quiet but noisy, so accept them at half the energy when ZCR is high.
+        return (energy > threshold) | ((energy > threshold / 2) & (zcr > self.fricative_zcr))
+
+    def process(self, pcm):
+        """Feed the next chunk of captured PCM; returns True once end of speech or no speech has been detected."""
+        data = self._carry + pcm
+        energy, zcr = frame_features(data, self.rate, self.frame_ms)
+        self._carry = data[len(energy) * self.frame_bytes:]
+        if not len(energy):
+            return self.endpoint or self.no_speech
+
+        if self.noise_floor is None:
+            self._calibration.extend(energy.tolist())
+            if len(self._calibration) >= self.calibration_frames:
+                self.noise_floor = float(np.percentile(self._calibration, 20))
+
+        speech = self.is_speech(energy, zcr)
+        hits = np.flatnonzero(speech)
+        if len(hits):
+            self.speech_frames += len(hits)
+            self.last_speech_frame = self.frames_seen + int(hits[-1])
+            self.silent_run = len(speech) - 1 - int(hits[-1])
+        else:
+            self.silent_run += len(speech)
+        self.frames_seen += len(speech)
+
+        if self.speech_frames >= self.min_speech_frames and self.silent_run >= self.trailing_silence_frames:
+            self.endpoint = True
+        elif self.speech_frames < self.min_speech_frames and self.frames_seen >= self.no_speech_frames:
+            self.no_speech = True
+        return self.endpoint or self.no_speech
+
+    def trim(self, pcm, dropped_bytes=0):
+        """Drop trailing silence after the last speech frame, keeping a short tail.
+
+        dropped_bytes is how much audio from the start of the recording is missing from pcm
+        (for example after a ring buffer wrapped), so frame positions can be mapped onto it.
+        """
+        if self.last_speech_frame is None:
+            return pcm
+        end = (self.last_speech_frame + 1 + self.tail_frames) * self.frame_bytes - dropped_bytes
+        return pcm[:max(end, 0)]